@@ -0,0 +1,68 @@
+import logging
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from app.services.llm_service import LLMService, get_llm_service
+from app.db.session import pool_stats, session_tracker
+from app.services.log_writer import get_log_writer
+from app.services import payload_store, prompt_response_cache, tag_cache
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/llm/stats")
+async def get_llm_stats(llm_service: LLMService = Depends(get_llm_service)) -> Dict[str, Any]:
+    """
+    Returns runtime statistics for the LLM service, including response cache hit/miss counters.
+    """
+    return llm_service.stats()
+
+@router.delete("/llm/cache")
+async def flush_llm_cache(llm_service: LLMService = Depends(get_llm_service)) -> Dict[str, Any]:
+    """
+    Flushes the in-memory LLM response cache.
+    """
+    flushed = llm_service.clear_cache()
+    logger.info(f"LLM response cache flushed via admin endpoint ({flushed} entries).")
+    return {"flushed": flushed}
+
+@router.get("/logs/writer")
+async def get_log_writer_stats() -> Dict[str, Any]:
+    """
+    Returns counters for the background ApiLog writer (queued, dropped, flushed rows, queue depth).
+    """
+    writer = get_log_writer()
+    if writer is None:
+        return {"running": False}
+    return writer.stats()
+
+@router.get("/logs/payloads")
+async def get_log_payload_stats() -> Dict[str, Any]:
+    """
+    Returns payload sampling counters (kept/dropped, and why kept) and blob deduplication
+    counters (new blobs and bytes written vs. bytes saved by reusing existing blobs).
+    """
+    return payload_store.stats()
+
+@router.get("/prompts/tag-cache")
+async def get_tag_cache_stats() -> Dict[str, Any]:
+    """Returns occupancy and hit/miss counters of the process-local tag name -> id cache."""
+    return tag_cache.stats()
+
+@router.get("/prompts/response-cache")
+async def get_prompt_response_cache_stats() -> Dict[str, Any]:
+    """Returns occupancy and hit/miss counters of the cached prompt and list page bodies."""
+    return prompt_response_cache.stats()
+
+@router.get("/db/sessions")
+async def get_db_session_stats(older_than_seconds: float = 0.0) -> Dict[str, Any]:
+    """
+    Returns connection pool occupancy, checkout and acquisition-wait statistics, and session
+    open/close counts. With DB_SESSION_LEAK_DETECTION enabled, also lists the sessions that
+    are currently open (at least `older_than_seconds` old) with the stack that acquired them.
+    """
+    stats = pool_stats()
+    stats["open_sessions"] = session_tracker.open_sessions(older_than_seconds) if session_tracker.enabled else None
+    return stats
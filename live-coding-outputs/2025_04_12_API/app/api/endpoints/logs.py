@@ -0,0 +1,67 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.session import get_async_session
+from app.schemas.log import ApiLogEntry, ApiLogList, LogStatsResponse
+from app.services.log_partitions import log_partitions, resolve_payloads
+from app.services.log_rollups import query_stats
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+def _naive_utc(value: datetime) -> datetime:
+    """Log timestamps are stored as naive UTC."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+@router.get("/", response_model=ApiLogList)
+async def list_logs(
+    since: Optional[datetime] = Query(None, description="Start of the window (UTC). Defaults to one hour before `until`."),
+    until: Optional[datetime] = Query(None, description="End of the window (UTC). Defaults to now."),
+    endpoint: Optional[str] = Query(None, description="Exact endpoint, e.g. 'POST /api/v1/prompts/analyze'."),
+    status_code: Optional[int] = Query(None, description="Only rows with this HTTP status."),
+    limit: int = Query(100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Returns the most recent API log rows in a time window, newest first.
+    Only the log partitions overlapping the window are read. Payloads are resolved from
+    their blobs; they are null for rows whose payloads were not sampled.
+    """
+    if not settings.LOG_PARTITIONING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Log queries require LOG_PARTITIONING_ENABLED.")
+    until = _naive_utc(until) if until else datetime.utcnow()
+    since = _naive_utc(since) if since else until - timedelta(hours=1)
+    if since > until:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="`since` must not be after `until`.")
+
+    rows = await log_partitions.fetch(session, since, until, endpoint=endpoint, status_code=status_code, limit=limit)
+    await resolve_payloads(await session.connection(), rows)
+    return ApiLogList(since=since, until=until, items=[ApiLogEntry(**row) for row in rows])
+
+@router.get("/stats", response_model=LogStatsResponse)
+async def get_log_stats(
+    since: Optional[datetime] = Query(None, description="Start of the window (UTC). Defaults to one hour before `until`."),
+    until: Optional[datetime] = Query(None, description="End of the window (UTC). Defaults to now."),
+    endpoint: Optional[str] = Query(None, description="Limit to one endpoint, e.g. 'POST /api/v1/prompts/analyze'."),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Request counts, error rates (`server_errors / requests`) and p50/p95/p99 processing time
+    per endpoint, computed from per-minute rollups (minute resolution) rather than log rows.
+    Rows still queued in the background writer are not yet included.
+    """
+    if not settings.LOG_ROLLUPS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Log stats require LOG_ROLLUPS_ENABLED.")
+    until = _naive_utc(until) if until else datetime.utcnow()
+    since = _naive_utc(since) if since else until - timedelta(hours=1)
+    if since > until:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="`since` must not be after `until`.")
+
+    stats = await query_stats(session, since, until, endpoint=endpoint)
+    return LogStatsResponse(since=since, until=until, **stats)
@@ -0,0 +1,46 @@
+import logging
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core import metrics
+from app.services import llm_service as llm_service_module
+from app.services.log_writer import get_log_writer
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _collect_runtime_stats() -> None:
+    """Copies cache and log writer counters into the registry at scrape time."""
+    service = llm_service_module._llm_service_instance # Not created just for a scrape
+    if service is not None:
+        stats = service.stats()
+        for cache in ("cache", "semantic_cache"):
+            cache_stats = stats[cache]
+            if "hits" not in cache_stats:
+                continue # Disabled tier
+            label = "response" if cache == "cache" else "semantic"
+            metrics.CACHE_HITS.labels(label).set(cache_stats["hits"])
+            metrics.CACHE_MISSES.labels(label).set(cache_stats["misses"])
+            metrics.CACHE_HIT_RATIO.labels(label).set(cache_stats["hit_ratio"])
+            metrics.CACHE_ENTRIES.labels(label).set(cache_stats["entries"])
+
+    writer = get_log_writer()
+    if writer is not None:
+        writer_stats = writer.stats()
+        metrics.LOG_QUEUE_DEPTH.set(writer_stats["queue_depth"])
+        metrics.LOG_ROWS_DROPPED.labels().set(writer_stats["dropped"])
+        metrics.LOG_ROWS_FLUSHED.labels().set(writer_stats["flushed"])
+
+metrics.REGISTRY.add_collector(_collect_runtime_stats)
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Prometheus text exposition of the in-process metrics: request, LLM call and DB latency
+    histograms, cache hit ratios and the log writer queue depth.
+    """
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,29 +1,60 @@
 import logging
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, Query, HTTPException, status, Response # Added Response
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, Request, status, Response # Added Response
+from fastapi.responses import StreamingResponse
 
 # Corrected schema imports and added missing ones
+from app.core.tracing import TimedRoute
 from app.schemas.prompt_mgmt import (
+    BulkImportResponse,
     PromptCreate, 
     PromptUpdate, 
     PromptResponse, 
     PaginatedPromptResponse, 
-    PromptSearchQuery
+    PaginatedPromptSearchResponse,
+    PromptSearchQuery,
+    TagWithCountResponse
 )
 # Corrected service import and added custom exception
 from app.services.prompt_mgmt_service import (
+    COUNT_ESTIMATE,
     PromptManagementService, 
+    PromptPage,
     get_prompt_mgmt_service, 
-    PromptManagementServiceError
+    PromptManagementServiceError,
+    stream_prompt_export
 )
+from app.services import prompt_json, prompt_response_cache
 
 logger = logging.getLogger(__name__)
 
+CountMode = Literal["exact", "estimate", "none"]
+_CURSOR_DESCRIPTION = "Opaque `next_cursor` from the previous page. Takes precedence over `skip`."
+_COUNT_DESCRIPTION = "How `total` is computed: exact (count every page), estimate (recently counted) or none"
+
+def _page_fields(page: PromptPage, skip: int, limit: int, cursor: Optional[str]) -> dict:
+    """Pagination fields shared by the list and search responses."""
+    return {
+        "total": page.total,
+        "total_is_estimate": page.total_is_estimate,
+        "page": None if cursor else (skip // limit) + 1,
+        "size": limit,
+        "next_cursor": page.next_cursor,
+    }
+
+def _json_with_etag(body: bytes, etag: str) -> Response:
+    # no-cache: clients may store the body but must revalidate it (If-None-Match) before reuse
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
 # Define the router with a prefix and tags for better organization in docs
 router = APIRouter(
     prefix="/prompts",
-    tags=["Prompt Management"]
+    tags=["Prompt Management"],
+    route_class=TimedRoute,
 )
 
 # --- Phase 6: CRUD Endpoints ---
@@ -51,25 +82,74 @@ async def create_prompt(
             detail=f"Internal server error creating prompt: {str(e)}"
         )
 
-@router.get("/", response_model=PaginatedPromptResponse)
+@router.post(
+    "/bulk",
+    response_model=BulkImportResponse,
+    openapi_extra={"requestBody": {"required": True, "content": {"application/x-ndjson": {"schema": {"type": "string"}}}}},
+)
+async def bulk_import_prompts(
+    request: Request,
+    service: PromptManagementService = Depends(get_prompt_mgmt_service)
+):
+    """
+    Imports many prompts from an NDJSON body: one `PromptCreate` object per line (the output of
+    `GET /prompts/export` is accepted as is). The body is read as a stream and written in chunked
+    transactions; lines that fail are listed in `errors` while the rest are imported.
+    """
+    try:
+        return await service.bulk_import(request.stream())
+    except Exception as e:
+        logger.exception("Unexpected API error importing prompts")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error importing prompts: {str(e)}"
+        )
+
+# Declared before /{prompt_id}, which would otherwise capture "export"
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One PromptExportItem JSON object per line."}},
+)
+async def export_prompts():
+    """
+    Streams the whole prompt library as NDJSON (one `PromptExportItem` per line, oldest first),
+    reading it from the database in batches.
+    """
+    return StreamingResponse(
+        stream_prompt_export(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="prompts.ndjson"'},
+    )
+
+@router.get("/", response_model=PaginatedPromptResponse, responses={304: {"description": "The page is unchanged (If-None-Match matched its ETag)."}})
 async def list_prompts(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=100, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description=_CURSOR_DESCRIPTION),
+    count: CountMode = Query(COUNT_ESTIMATE, description=_COUNT_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None),
     service: PromptManagementService = Depends(get_prompt_mgmt_service)
 ):
     """
-    Lists prompts with pagination.
+    Lists prompts, newest first. Follow `next_cursor` to page through: each page is a keyset
+    seek, so deep pages cost the same as the first (unlike large `skip` values).
+    The ETag changes whenever any prompt or tag changes; send it back in If-None-Match to get
+    a 304 while the library is unchanged.
     """
     try:
-        prompts, total = await service.list_prompts(skip=skip, limit=limit)
-        # Convert each Prompt model to PromptResponse
-        items = [PromptResponse.from_orm(p) for p in prompts]
-        return PaginatedPromptResponse(
-            items=items,
-            total=total,
-            page=(skip // limit) + 1,
-            size=limit
-        )
+        generation = await service.library_generation()
+        query_key = f"list|{skip}|{limit}|{cursor}|{count}"
+        etag = prompt_response_cache.list_etag(generation, query_key)
+        if prompt_response_cache.etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+        body = prompt_response_cache.get_list_body(service.cache_scope, generation, query_key)
+        if body is None:
+            # Projected rows are encoded directly (same JSON as PaginatedPromptResponse, no ORM objects or validation)
+            page = await service.list_prompts(skip=skip, limit=limit, cursor=cursor, count=count, projection=True)
+            body = prompt_json.dumps({"items": page.items, **_page_fields(page, skip, limit, cursor)})
+            prompt_response_cache.set_list_body(service.cache_scope, generation, query_key, body)
+        return _json_with_etag(body, etag)
     except PromptManagementServiceError as e:
         logger.error(f"API Error listing prompts: {e.detail}")
         raise HTTPException(status_code=e.status_code, detail=e.detail)
@@ -80,24 +160,63 @@ async def list_prompts(
             detail=f"Internal server error listing prompts: {str(e)}"
         )
 
-@router.get("/{prompt_id}", response_model=PromptResponse)
+@router.get("/tags", response_model=List[TagWithCountResponse])
+async def list_tags(
+    with_counts: bool = Query(False, description="Include how many prompts have each tag"),
+    service: PromptManagementService = Depends(get_prompt_mgmt_service)
+):
+    """
+    Lists all tags by name, optionally with their prompt counts (maintained on every write,
+    so this never groups the prompt/tag links).
+    """
+    try:
+        rows = await service.list_tags(with_counts=with_counts)
+        return [TagWithCountResponse(id=tag_id, name=name, prompt_count=prompt_count) for tag_id, name, prompt_count in rows]
+    except PromptManagementServiceError as e:
+        logger.error(f"API Error listing tags: {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        logger.exception("Unexpected API error listing tags")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error listing tags: {str(e)}"
+        )
+
+@router.get("/{prompt_id}", response_model=PromptResponse, responses={304: {"description": "The prompt is unchanged (If-None-Match matched its ETag)."}})
 async def get_prompt(
     prompt_id: int,
+    if_none_match: Optional[str] = Header(None),
     service: PromptManagementService = Depends(get_prompt_mgmt_service)
 ):
     """
     Retrieves a specific prompt by its ID.
+    The response carries a strong ETag built from the prompt's creation time and version; send it back in
+    If-None-Match to get a 304 while the prompt is unchanged.
     """
     try:
+        # A revision lookup answers revalidations and validates the cached body without loading the prompt
+        revision = await service.get_prompt_revision(prompt_id)
+        if revision is not None:
+            etag = prompt_response_cache.prompt_etag(prompt_id, *revision)
+            if prompt_response_cache.etag_matches(if_none_match, etag):
+                return _not_modified(etag)
+            body = prompt_response_cache.get_prompt_body(service.cache_scope, prompt_id, *revision)
+            if body is not None:
+                return _json_with_etag(body, etag)
+
         prompt = await service.get_prompt_by_id(prompt_id=prompt_id)
         if not prompt:
             logger.warning(f"Prompt not found in API endpoint: ID {prompt_id}")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Prompt not found")
-        # Convert Prompt model to PromptResponse
-        return PromptResponse.from_orm(prompt)
+        # Convert Prompt model to PromptResponse; cached under the revision actually loaded
+        body = PromptResponse.from_orm(prompt).model_dump_json().encode("utf-8")
+        prompt_response_cache.set_prompt_body(service.cache_scope, prompt.id, prompt.created_at, prompt.version, body)
+        return _json_with_etag(body, prompt_response_cache.prompt_etag(prompt.id, prompt.created_at, prompt.version))
     except PromptManagementServiceError as e:
         logger.error(f"API Error getting prompt {prompt_id}: {e.detail}")
         raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"Unexpected API error getting prompt {prompt_id}")
         raise HTTPException(
@@ -160,33 +279,39 @@ async def delete_prompt(
 # --- Phase 7: Search Endpoint (Corrected) ---
 
 # Corrected path to be relative to the router prefix "/prompts"
-@router.post("/search", response_model=PaginatedPromptResponse)
+@router.post("/search", response_model=PaginatedPromptSearchResponse)
 async def search_prompts(
     request: PromptSearchQuery,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=100, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description=_CURSOR_DESCRIPTION),
+    count: CountMode = Query(COUNT_ESTIMATE, description=_COUNT_DESCRIPTION),
+    with_facets: bool = Query(False, description="Include tag counts over all matching prompts"),
     service: PromptManagementService = Depends(get_prompt_mgmt_service)
 ):
     """
     Searches for prompts based on query text and/or tags.
+    Text matches are ranked by relevance and include a highlighted `snippet`.
+    Page with `next_cursor` (valid for the same query and tags) as in the list endpoint.
+    With `with_facets=true`, `facets` lists the most used tags among all matches.
     """
     try:
-        prompts, total = await service.search_prompts(
+        page = await service.search_prompts(
             query=request.query,
             tags=request.tags,
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor,
+            count=count,
+            with_facets=with_facets,
+            projection=True,
         )
         
-        # FIX: Convert list of Prompt models to list of PromptResponse schemas
-        items = [PromptResponse.from_orm(p) for p in prompts]
-        
-        return PaginatedPromptResponse(
-            items=items, # Use the converted list
-            total=total,
-            page=(skip // limit) + 1,
-            size=limit
-        )
+        # Projected items are encoded directly in the PaginatedPromptSearchResponse layout
+        items = [dict(item, snippet=page.snippets.get(item["id"])) for item in page.items]
+        facets = None if page.facets is None else [{"name": name, "count": n} for name, n in page.facets]
+        body = prompt_json.dumps({"items": items, **_page_fields(page, skip, limit, cursor), "facets": facets})
+        return Response(content=body, media_type="application/json")
     except PromptManagementServiceError as e:
         logger.error(f"API Error searching prompts: {e.detail}")
         raise HTTPException(status_code=e.status_code, detail=e.detail)
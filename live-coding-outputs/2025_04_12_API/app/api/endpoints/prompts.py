@@ -1,50 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from typing import Optional
-import time
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import logging
 
-from sqlmodel.ext.asyncio.session import AsyncSession
-from app.db.session import get_async_session
+from app.core.config import settings
+from app.core.tracing import TimedRoute
 from app.services.llm_service import LLMService, get_llm_service, LLMServiceError
-# Update import to use the LoggingService class instead of log_request function
-from app.services.logging_service import LoggingService
 from app.schemas.prompt import (
     AnalyzeRequest, AnalyzeResponse,
+    BatchAnalyzeRequest, BatchAnalyzeResult, BatchAnalyzeError,
     RemixRequest, RemixResponse,
     CreateRequest, CreateResponse
 )
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Add a dependency to get the logging service
-async def get_logging_service(session: AsyncSession = Depends(get_async_session)) -> LoggingService:
-    return LoggingService(session)
+# TimedRoute splits traced requests into deps / handler / serialize spans (Server-Timing)
+router = APIRouter(route_class=TimedRoute)
+
+# Requests to these endpoints (bodies, status, timing) are logged by RequestCaptureMiddleware.
+
+# Header clients can send to skip the LLM response cache for a single request
+CACHE_BYPASS_HEADER = "X-Cache-Bypass"
+
+async def get_use_cache(
+    x_cache_bypass: Optional[str] = Header(None, alias=CACHE_BYPASS_HEADER),
+    cache_control: Optional[str] = Header(None),
+) -> bool:
+    """
+    Returns False when the caller asked to bypass the LLM response cache,
+    either with `X-Cache-Bypass: true` or `Cache-Control: no-cache`.
+    """
+    if x_cache_bypass and x_cache_bypass.strip().lower() in ("1", "true", "yes"):
+        return False
+    if cache_control and "no-cache" in cache_control.lower():
+        return False
+    return True
 
 @router.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_prompt(
     request: Request,
     analyze_req: AnalyzeRequest,
     llm_service: LLMService = Depends(get_llm_service),
-    logging_service: LoggingService = Depends(get_logging_service),
-    session: AsyncSession = Depends(get_async_session)
+    use_cache: bool = Depends(get_use_cache)
 ):
     """Analyzes a prompt for clarity and suggests improvements."""
-    start_time = time.time()
     try:
         # Process with LLM service
-        result = await llm_service.analyze(analyze_req.prompt)
-        
-        # Calculate processing time
-        processing_time_ms = (time.time() - start_time) * 1000
-        
-        # Log request and response
-        await logging_service.log_request(
-            request=request,
-            response=None,  # No access to actual response object in FastAPI
-            status_code=status.HTTP_200_OK,
-            processing_time_ms=processing_time_ms
-        )
-        
-        return result
+        return await llm_service.analyze(analyze_req, use_cache=use_cache)
     except LLMServiceError as e:
         # Error logging is handled by exception handlers in main.py
         raise
@@ -55,31 +61,91 @@ async def analyze_prompt(
             detail=f"An unexpected error occurred: {str(e)}"
         )
 
+async def _analyze_one(index: int, prompt: str, llm_service: LLMService, use_cache: bool) -> BatchAnalyzeResult:
+    """Analyzes a single batch item, turning failures into a per-item error instead of aborting the batch."""
+    try:
+        result = await llm_service.analyze(AnalyzeRequest(prompt=prompt), use_cache=use_cache)
+        return BatchAnalyzeResult(index=index, result=result)
+    except ValidationError as e:
+        return BatchAnalyzeResult(index=index, error=BatchAnalyzeError(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e.errors()[0]["msg"])
+        ))
+    except LLMServiceError as e:
+        return BatchAnalyzeResult(index=index, error=BatchAnalyzeError(
+            status_code=e.status_code, detail=f"LLM service error: {e.detail}"
+        ))
+    except Exception as e:
+        logger.exception(f"Unexpected error analyzing batch item {index}")
+        return BatchAnalyzeResult(index=index, error=BatchAnalyzeError(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An unexpected error occurred: {str(e)}"
+        ))
+
+async def _stream_batch_analysis(
+    prompts: List[str],
+    concurrency: int,
+    llm_service: LLMService,
+    use_cache: bool,
+) -> AsyncIterator[str]:
+    """
+    Runs the batch through a fixed pool of `concurrency` workers and yields one NDJSON
+    line per prompt as soon as its analysis finishes (results are NOT in request order).
+    If the client disconnects, the generator is closed and the remaining workers are cancelled.
+    """
+    results: asyncio.Queue = asyncio.Queue()
+    next_index = iter(range(len(prompts)))
+
+    async def worker():
+        for index in next_index:  # Shared iterator: each index is taken by exactly one worker
+            await results.put(await _analyze_one(index, prompts[index], llm_service, use_cache))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(prompts)))]
+    try:
+        for _ in range(len(prompts)):
+            item: BatchAnalyzeResult = await results.get()
+            yield item.model_dump_json(exclude_none=True) + "\n"
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+@router.post(
+    "/analyze/batch",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One BatchAnalyzeResult JSON object per line."}},
+)
+async def analyze_prompts_batch(
+    request: Request,
+    batch_req: BatchAnalyzeRequest,
+    llm_service: LLMService = Depends(get_llm_service),
+    use_cache: bool = Depends(get_use_cache)
+):
+    """
+    Analyzes many prompts in one request. Results are streamed back as NDJSON
+    (one `BatchAnalyzeResult` per line) in completion order; use `index` to match them up.
+    """
+    if len(batch_req.prompts) > settings.BATCH_ANALYZE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Batch too large: {len(batch_req.prompts)} prompts (maximum is {settings.BATCH_ANALYZE_MAX_ITEMS})."
+        )
+    concurrency = min(batch_req.concurrency or settings.BATCH_ANALYZE_MAX_CONCURRENCY, settings.BATCH_ANALYZE_MAX_CONCURRENCY)
+
+    return StreamingResponse(
+        _stream_batch_analysis(batch_req.prompts, concurrency, llm_service, use_cache),
+        media_type="application/x-ndjson",
+    )
+
 @router.post("/remix", response_model=RemixResponse)
 async def remix_prompt(
     request: Request,
     remix_req: RemixRequest,
     llm_service: LLMService = Depends(get_llm_service),
-    logging_service: LoggingService = Depends(get_logging_service)
+    use_cache: bool = Depends(get_use_cache)
 ):
     """Generates variations of a prompt based on specified styles."""
-    start_time = time.time()
     try:
         # Process with LLM service
-        result = await llm_service.remix(remix_req.prompt, remix_req.styles)
-        
-        # Calculate processing time
-        processing_time_ms = (time.time() - start_time) * 1000
-        
-        # Log request and response
-        await logging_service.log_request(
-            request=request,
-            response=None,
-            status_code=status.HTTP_200_OK,
-            processing_time_ms=processing_time_ms
-        )
-        
-        return result
+        return await llm_service.remix(remix_req, use_cache=use_cache)
     except LLMServiceError as e:
         # Error logging is handled by exception handlers in main.py
         raise
@@ -90,31 +156,75 @@ async def remix_prompt(
             detail=f"An unexpected error occurred: {str(e)}"
         )
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Formats one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _stream_sse(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """
+    Relays events from an LLMService streaming method as SSE. Errors raised mid-stream
+    are sent as a final `error` event, since the 200 status has already been sent.
+    """
+    try:
+        async for item in events:
+            yield _sse_event(item["event"], item["data"])
+    except LLMServiceError as e:
+        status_code, detail = e.status_code, f"LLM service error: {e.detail}"
+        logger.error(f"LLM Service Error during stream: {e.detail}")
+        yield _sse_event("error", {"status_code": status_code, "detail": detail})
+    except Exception as e:
+        status_code, detail = status.HTTP_500_INTERNAL_SERVER_ERROR, "An unexpected internal server error occurred."
+        logger.exception(f"Unexpected error during stream: {e}")
+        yield _sse_event("error", {"status_code": status_code, "detail": detail})
+
+_SSE_RESPONSES = {200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events stream."}}
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.post("/remix/stream", response_class=StreamingResponse, responses=_SSE_RESPONSES)
+async def remix_prompt_stream(
+    request: Request,
+    remix_req: RemixRequest,
+    llm_service: LLMService = Depends(get_llm_service),
+    use_cache: bool = Depends(get_use_cache)
+):
+    """
+    Streaming variant of `/remix` over Server-Sent Events. Emits a `variation` event
+    (`{"index", "text"}`) as each remix completes, then a `result` event with the full RemixResponse.
+    """
+    return StreamingResponse(
+        _stream_sse(llm_service.remix_stream(remix_req, use_cache=use_cache)),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+@router.post("/create/stream", response_class=StreamingResponse, responses=_SSE_RESPONSES)
+async def create_prompt_stream(
+    request: Request,
+    create_req: CreateRequest,
+    llm_service: LLMService = Depends(get_llm_service),
+    use_cache: bool = Depends(get_use_cache)
+):
+    """
+    Streaming variant of `/create` over Server-Sent Events. Emits `delta` events
+    (`{"text"}`) as the generated prompt arrives, then a `result` event with the full CreateResponse.
+    """
+    return StreamingResponse(
+        _stream_sse(llm_service.create_stream(create_req, use_cache=use_cache)),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
 @router.post("/create", response_model=CreateResponse)
 async def create_prompt(
     request: Request,
     create_req: CreateRequest,
     llm_service: LLMService = Depends(get_llm_service),
-    logging_service: LoggingService = Depends(get_logging_service)
+    use_cache: bool = Depends(get_use_cache)
 ):
     """Generates a new prompt based on a goal description."""
-    start_time = time.time()
     try:
         # Process with LLM service
-        result = await llm_service.create(create_req.goal, create_req.context)
-        
-        # Calculate processing time
-        processing_time_ms = (time.time() - start_time) * 1000
-        
-        # Log request and response
-        await logging_service.log_request(
-            request=request,
-            response=None,
-            status_code=status.HTTP_200_OK,
-            processing_time_ms=processing_time_ms
-        )
-        
-        return result
+        return await llm_service.create(create_req, use_cache=use_cache)
     except LLMServiceError as e:
         # Error logging is handled by exception handlers in main.py
         raise
@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
-# Import both endpoint modules
-from app.api.endpoints import prompts, prompt_mgmt 
+# Import endpoint modules
+from app.api.endpoints import prompts, prompt_mgmt, admin, logs
 
 api_router = APIRouter()
 
@@ -13,5 +13,11 @@ api_router.include_router(prompts.router, prefix="/prompts", tags=["Prompt Actio
 # It already has the "/prompts" prefix defined within its own router definition
 api_router.include_router(prompt_mgmt.router, tags=["Prompt Management"]) 
 
+# Recent API request logs (read from time-partitioned log tables)
+api_router.include_router(logs.router, prefix="/logs", tags=["Logs"])
+
+# Operational endpoints (cache control, runtime stats)
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
+
 # Add other resource routers later if needed
 # e.g., api_router.include_router(users.router, prefix="/users", tags=["Users"])
@@ -1,14 +1,142 @@
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import List
+
+class LLMBackendConfig(BaseModel):
+    """
+    One OpenAI-compatible backend for LLM_BACKENDS.
+    `api_key` defaults to LLM_API_KEY when omitted.
+    """
+    name: str
+    base_url: str
+    api_key: str | None = None
+    weight: float = 1.0
 
 class Settings(BaseSettings):
     """
     Application settings loaded from environment variables.
     """
     DATABASE_URL: str = "sqlite+aiosqlite:///./promptsculptor_proto.db"
+    # Debug aid: record the stack that created each DB session, to report sessions that are never closed
+    DB_SESSION_LEAK_DETECTION: bool = False
+    DB_SESSION_LEAK_STACK_DEPTH: int = 15
     LLM_API_KEY: str = "YOUR_LLM_API_KEY_HERE" # Default placeholder
     LLM_API_BASE_URL: str | None = None
 
+    # Optional list of weighted backends, as JSON, e.g.
+    # LLM_BACKENDS='[{"name": "openai", "base_url": "https://api.openai.com/v1", "weight": 3},
+    #                {"name": "azure-proxy", "base_url": "https://proxy.example.com/v1", "api_key": "...", "weight": 1}]'
+    # A weight of 0 makes a backend hedge-only (never chosen as primary).
+    # When empty, a single backend is built from LLM_API_KEY / LLM_API_BASE_URL.
+    LLM_BACKENDS: List[LLMBackendConfig] = []
+
+    # Hedged requests: if the primary backend has not answered within its rolling latency
+    # percentile, send a duplicate to a secondary backend and take the first good answer.
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_INITIAL_DELAY_MS: float = 2000.0 # Used until enough latency samples are collected
+    LLM_HEDGE_MIN_DELAY_MS: float = 100.0
+    LLM_HEDGE_MAX_DELAY_MS: float = 10000.0
+    LLM_HEDGE_WINDOW_SIZE: int = 200
+
+    # LLM response cache (exact match on the final request sent upstream)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_TTL_ANALYZE_SECONDS: float = 3600.0
+    LLM_CACHE_TTL_REMIX_SECONDS: float = 300.0
+    LLM_CACHE_TTL_CREATE_SECONDS: float = 300.0
+    # Near-duplicate ("semantic") cache for analyze: hashing TF-IDF + cosine similarity (requires numpy)
+    LLM_SEMANTIC_CACHE_ENABLED: bool = True
+    LLM_SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    LLM_SEMANTIC_CACHE_MAX_ENTRIES: int = 2048
+    LLM_SEMANTIC_CACHE_DIMENSIONS: int = 4096
+    # Coalesce identical concurrent upstream calls into one request
+    LLM_SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Client-side upstream rate limiting and retries (0 disables a limit)
+    LLM_RATE_LIMIT_RPM: int = 3500
+    LLM_RATE_LIMIT_TPM: int = 90000
+    LLM_MAX_RETRIES: int = 4
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 30.0
+
+    # Shared HTTP connection pool for upstream LLM calls
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    LLM_HTTP2_ENABLED: bool = False # Requires the 'h2' package (httpx[http2])
+    LLM_HTTP_TIMEOUT_SECONDS: float = 30.0
+    LLM_HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+
+    # Prompt budgeting: requests are truncated to fit the model context minus the completion budget
+    LLM_CONTEXT_WINDOW_TOKENS: int = 16385 # gpt-3.5-turbo
+    LLM_MAX_INPUT_TOKENS: int = 8000 # Upper bound on the prompt side of a request, regardless of context size
+
+    # Background ApiLog writer (batched inserts off the request path)
+    LOG_WRITER_ENABLED: bool = True
+    LOG_WRITER_MAX_QUEUE: int = 10000 # Oldest rows are dropped beyond this
+    LOG_WRITER_BATCH_SIZE: int = 200
+    LOG_WRITER_FLUSH_INTERVAL_MS: float = 500.0
+
+    # ApiLog partitioning: one table per day or hour, archived to gzip JSONL and dropped after retention
+    LOG_PARTITIONING_ENABLED: bool = True
+    LOG_PARTITION_GRANULARITY: str = "day" # "day" or "hour"
+    LOG_RETENTION_HOURS: int = 24 * 7
+    LOG_ARCHIVE_DIR: str = "./log_archive"
+    LOG_PARTITION_MAINTENANCE_INTERVAL_SECONDS: float = 300.0
+
+    # Per-minute log rollups (counts, errors, DDSketch latency percentiles) behind /logs/stats
+    LOG_ROLLUPS_ENABLED: bool = True
+    LOG_ROLLUP_SKETCH_ALPHA: float = 0.01 # Relative accuracy of percentiles
+    LOG_ROLLUP_RETENTION_DAYS: int = 90
+
+    # Request/response capture middleware: which paths are logged, and how much of each body is kept
+    LOG_CAPTURE_PATH_PREFIXES: List[str] = ["/api/v1/prompts/analyze", "/api/v1/prompts/remix", "/api/v1/prompts/create"]
+    LOG_CAPTURE_MAX_BODY_BYTES: int = 16384
+
+    # Log payloads: kept for errors, slow requests and a sample of the rest; stored once per distinct content
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.01 # Fraction of successful, fast requests whose payloads are kept
+    LOG_PAYLOAD_SLOW_MS: float = 2000.0 # Requests at least this slow always keep their payloads
+    LOG_PAYLOAD_DEDUP_ENABLED: bool = True
+
+    # Prometheus-format /metrics endpoint and the request latency middleware behind it
+    METRICS_ENABLED: bool = True
+
+    # Per-request spans (Server-Timing header) and optional OTLP/JSON trace export
+    TRACING_ENABLED: bool = True
+    TRACING_PATH_PREFIXES: List[str] = ["/api/"]
+    TRACE_EXPORT_FILE: str | None = None # Appends one OTLP/JSON ExportTraceServiceRequest per line
+    TRACE_EXPORT_OTLP_ENDPOINT: str | None = None # e.g. http://localhost:4318/v1/traces
+    TRACE_EXPORT_SAMPLE_RATE: float = 1.0
+    TRACE_EXPORT_MAX_QUEUE: int = 1000
+
+    # Prompt library: full-text index for search (FTS5 on SQLite, a tsvector GIN index on
+    # PostgreSQL). When disabled, or unavailable, search falls back to unranked ILIKE scans.
+    PROMPT_SEARCH_FTS_ENABLED: bool = True
+    # With count=estimate (the default), list/search totals are reused for this long instead of
+    # running count(*) on every page. Writes in this process reset them immediately.
+    PROMPT_COUNT_CACHE_TTL_SECONDS: float = 30.0
+    PROMPT_FACET_LIMIT: int = 50 # Tags returned in search facets, most used first
+    # NDJSON bulk import (one transaction per chunk) and streaming export
+    PROMPT_BULK_CHUNK_SIZE: int = 500
+    PROMPT_BULK_MAX_LINE_BYTES: int = 1024 * 1024
+    PROMPT_BULK_MAX_REPORTED_ERRORS: int = 100
+    PROMPT_EXPORT_BATCH_SIZE: int = 500
+    # Tag name -> id cache, warmed at startup. The TTL bounds staleness when another worker deletes a tag.
+    TAG_CACHE_MAX_ENTRIES: int = 50000
+    TAG_CACHE_TTL_SECONDS: float = 3600.0
+    # Serialized GET /prompts/{id} and list page bodies, revalidated against the prompt version or
+    # library generation on every request (which also drive their ETags and 304 responses)
+    PROMPT_RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    PROMPT_LIST_CACHE_MAX_ENTRIES: int = 256
+    PROMPT_RESPONSE_CACHE_TTL_SECONDS: float = 3600.0
+
+    # Batch analyze endpoint
+    BATCH_ANALYZE_MAX_ITEMS: int = 1000
+    BATCH_ANALYZE_MAX_CONCURRENCY: int = 8
+
     # Load settings from a .env file
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
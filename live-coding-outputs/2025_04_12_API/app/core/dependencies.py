@@ -1,5 +1,4 @@
-from typing import AsyncGenerator
-from fastapi import Request
+from fastapi import Depends
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 # Re-export database session dependency for easier access
@@ -10,20 +9,14 @@ from app.services.llm_service import get_llm_service, LLMService
 
 from app.services.logging_service import LoggingService
 
-async def get_logging_service(request: Request, session: AsyncSession = None) -> LoggingService:
+async def get_logging_service(session: AsyncSession = Depends(get_async_session)) -> LoggingService:
     """
     Dependency to get a LoggingService instance with a database session.
     Use this in endpoints where you need to log request/response info.
-    
-    If session is not provided, it will try to get one from get_async_session.
+
+    The session is the request's unit-of-work session (see get_unit_of_work), shared with
+    every other dependency of the request and closed when the request ends.
     """
-    if session is None:
-        # Get a session from the dependency injection system
-        # Note: This is a bit tricky because get_async_session is a generator,
-        # we need to get the next value from it
-        session_generator = get_async_session()
-        session = await session_generator.__anext__()
-    
     return LoggingService(session)
 
 # You can add other common dependencies here as the application grows.
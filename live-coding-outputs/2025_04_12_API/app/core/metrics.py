@@ -0,0 +1,232 @@
+import bisect
+import logging
+import math
+from typing import Callable, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers sub-millisecond DB queries up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    """
+    Base for a metric family: one child per distinct tuple of label values.
+
+    Children are created on first use and cached, so recording a sample is a dict lookup
+    plus an attribute update. There is no locking: samples are recorded from the event
+    loop thread only (SQLAlchemy cursor events included), which makes updates atomic.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Returns the child for these label values (positional, in `labelnames` order)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"Metric '{self.name}' expects labels {self.labelnames}, got {values}.")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def clear(self) -> None:
+        """Drops all labelled children (e.g. before re-populating a scrape-time metric)."""
+        self._children = {} if self.labelnames else {(): self._new_child()}
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+
+class _ValueChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter. `labels(...).set()` is only meant for mirroring a counter that is
+    maintained elsewhere (e.g. cache hit counts), refreshed at scrape time.
+    """
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}" for values, child in self._children.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self._children[()].set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Sequence[float]):
+        self._upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1) # Per bucket (not cumulative); last is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        # `le` buckets: a value equal to a bound belongs to that bound's bucket
+        self.counts[bisect.bisect_left(self._upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bounds; cumulative bucket counts are computed at render time."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip((*self.upper_bounds, math.inf), child.counts):
+                cumulative += count
+                labels = _format_labels((*self.labelnames, "le"), (*values, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds metric families and renders them in the Prometheus text exposition format
+    (version 0.0.4). Collectors are callbacks run just before rendering, used to copy
+    values that are tracked elsewhere (cache stats, queue depth) into gauges.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                # A broken collector must not take the whole scrape down
+                logger.error(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}", exc_info=True)
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# --- Application metrics (recorded on the hot path) ---
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "promptsculptor_http_request_duration_seconds",
+    "Time from receiving a request until its response is fully sent, by route template.",
+    ("method", "route", "status"),
+)
+LLM_CALL_DURATION = REGISTRY.histogram(
+    "promptsculptor_llm_call_duration_seconds",
+    "Duration of LLMService._call_openai_chat, by requested model and outcome (ok, cache_hit, error).",
+    ("model", "outcome"),
+)
+DB_SESSION_ACQUIRE_DURATION = REGISTRY.histogram(
+    "promptsculptor_db_session_acquire_seconds",
+    "Time to obtain a database connection for a request's session (pool checkout and connect).",
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "promptsculptor_db_query_duration_seconds",
+    "Database statement execution time, by statement type.",
+    ("statement",),
+)
+
+# --- Mirrored at scrape time by the /metrics endpoint's collector ---
+
+CACHE_HITS = REGISTRY.counter("promptsculptor_cache_hits_total", "Cache lookups that were served from the cache.", ("cache",))
+CACHE_MISSES = REGISTRY.counter("promptsculptor_cache_misses_total", "Cache lookups that missed.", ("cache",))
+CACHE_HIT_RATIO = REGISTRY.gauge("promptsculptor_cache_hit_ratio", "Hits / lookups since startup.", ("cache",))
+CACHE_ENTRIES = REGISTRY.gauge("promptsculptor_cache_entries", "Entries currently held.", ("cache",))
+LOG_QUEUE_DEPTH = REGISTRY.gauge("promptsculptor_log_writer_queue_depth", "ApiLog rows waiting for the background writer.")
+LOG_ROWS_DROPPED = REGISTRY.counter("promptsculptor_log_writer_dropped_total", "ApiLog rows dropped because the writer queue was full.")
+LOG_ROWS_FLUSHED = REGISTRY.counter("promptsculptor_log_writer_flushed_total", "ApiLog rows written by the background writer.")
@@ -0,0 +1,175 @@
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+# The trace of the request being handled, and the innermost open span in it
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+# Stages reported in the Server-Timing header (other spans are only exported)
+SERVER_TIMING_STAGES = ("deps", "db_session", "handler", "llm", "db", "serialize")
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], start_ns: int, attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = start_ns
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or self.start_ns) - self.start_ns) / 1e6
+
+
+class Trace:
+    """
+    Spans recorded while handling one request. Timestamps are wall-clock nanoseconds
+    derived from a monotonic clock, so durations are immune to clock adjustments and
+    start times can still be exported as Unix time.
+    """
+
+    def __init__(self, name: str, **attributes: Any):
+        self.trace_id = os.urandom(16).hex()
+        self._wall_anchor_ns = time.time_ns()
+        self._perf_anchor_ns = time.perf_counter_ns()
+        self.spans: List[Span] = []
+        self.root = self.start_span(name, parent=None, **attributes)
+
+    def now_ns(self) -> int:
+        return self._wall_anchor_ns + (time.perf_counter_ns() - self._perf_anchor_ns)
+
+    def start_span(self, name: str, parent: Optional[Span], start_ns: Optional[int] = None, **attributes: Any) -> Span:
+        span = Span(name, parent.span_id if parent else None, start_ns or self.now_ns(), attributes)
+        self.spans.append(span)
+        return span
+
+    def end_span(self, span: Span) -> None:
+        if span.end_ns is None: # Idempotent: a span can be closed early by the next stage
+            span.end_ns = self.now_ns()
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: finished stage durations (summed per stage) plus the total so far."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            if span.name in SERVER_TIMING_STAGES and span.end_ns is not None:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        metrics = [f"{name};dur={totals[name]:.2f}" for name in SERVER_TIMING_STAGES if name in totals]
+        metrics.append(f"total;dur={(self.now_ns() - self.root.start_ns) / 1e6:.2f}")
+        return ", ".join(metrics)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def start_trace(name: str, **attributes: Any) -> Trace:
+    """Starts a trace for the current request; spans opened in this context (and tasks it spawns) join it."""
+    trace = Trace(name, **attributes)
+    _current_trace.set(trace)
+    _current_span.set(trace.root)
+    return trace
+
+
+def end_trace(trace: Trace) -> None:
+    """Closes the root span and detaches the trace from the current context."""
+    trace.end_span(trace.root)
+    _current_trace.set(None)
+    _current_span.set(None)
+
+
+@contextmanager
+def span(name: str, parent: Optional[Span] = None, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Records a child span of the innermost open span (or of `parent`). Outside a traced
+    request this is a no-op that yields None, so instrumentation costs one ContextVar read.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    current = trace.start_span(name, parent or _current_span.get(), **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        if current.end_ns is None: # Not already handed over to a later stage
+            current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        trace.end_span(current)
+        _current_span.reset(token)
+
+
+def start_detached_span(name: str, **attributes: Any) -> Optional[Span]:
+    """
+    Opens a span without making it current, for code that cannot wrap a block (e.g. the
+    SQLAlchemy before/after cursor events). Close it with `end_detached_span`.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    return trace.start_span(name, _current_span.get(), **attributes)
+
+
+def end_detached_span(span: Optional[Span]) -> None:
+    trace = _current_trace.get()
+    if span is not None and trace is not None:
+        trace.end_span(span)
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    """Wraps an async endpoint so its body is recorded as the `handler` span, closing `deps`."""
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint # Sync endpoints run in the threadpool; their time stays in `deps`
+
+    @functools.wraps(endpoint) # FastAPI reads the signature through __wrapped__
+    async def timed(*args: Any, **kwargs: Any) -> Any:
+        deps = _current_span.get()
+        trace = _current_trace.get()
+        if trace is None or deps is None or deps.name != "deps":
+            return await endpoint(*args, **kwargs)
+        trace.end_span(deps)
+        with span("handler", parent=trace.root):
+            return await endpoint(*args, **kwargs)
+
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that splits a traced request into `deps` (body parsing and dependency
+    resolution), `handler` (the endpoint body) and `serialize` (response validation and
+    rendering) spans. Spans opened by dependencies and the endpoint nest under these.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        original = super().get_route_handler()
+
+        async def timed_route_handler(request: Request) -> Response:
+            trace = _current_trace.get()
+            if trace is None:
+                return await original(request)
+            with span("deps"):
+                response = await original(request)
+            handler = next((s for s in reversed(trace.spans) if s.name == "handler"), None)
+            if handler is not None and handler.end_ns is not None:
+                trace.end_span(trace.start_span("serialize", trace.root, start_ns=handler.end_ns))
+            return response
+
+        return timed_route_handler
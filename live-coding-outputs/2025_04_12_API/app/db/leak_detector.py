@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+import traceback
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _OpenSession:
+    opened_at: float # time.monotonic()
+    task: Optional[str]
+    stack: str
+    finalizer: weakref.finalize
+
+
+class SessionLeakDetector:
+    """
+    Tracks database sessions from creation until close, plus pool checkout activity.
+
+    Counters are always kept. With `enabled` (debug mode), each session also records the
+    stack that created it, so sessions that stay open (or are garbage-collected without
+    ever being closed) can be traced back to the code that acquired them. Capturing the
+    stack costs tens of microseconds per session, which is why it is opt-in.
+    """
+
+    def __init__(self, enabled: bool = False, stack_depth: int = 15):
+        self.enabled = enabled
+        self.stack_depth = stack_depth
+        self._open: Dict[int, _OpenSession] = {}
+
+        # Metrics
+        self.sessions_opened = 0
+        self.sessions_closed = 0
+        self.sessions_leaked = 0 # Garbage-collected without close (only detected when enabled)
+        self.pool_checkouts = 0
+        self.pool_checkins = 0
+        self.pool_checked_out_peak = 0
+        self.acquire_count = 0
+        self.acquire_total_ms = 0.0
+        self.acquire_max_ms = 0.0
+
+    def opened(self, session: Any) -> None:
+        self.sessions_opened += 1
+        if not self.enabled:
+            return
+        key = id(session)
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        # Drop the frames of the session constructor and this method
+        stack = "".join(traceback.format_list(traceback.extract_stack(limit=self.stack_depth + 2)[:-2]))
+        finalizer = weakref.finalize(session, self._collected, key)
+        self._open[key] = _OpenSession(time.monotonic(), task.get_name() if task else None, stack, finalizer)
+
+    def closed(self, session: Any) -> None:
+        self.sessions_closed += 1
+        info = self._open.pop(id(session), None)
+        if info is not None:
+            info.finalizer.detach()
+
+    def _collected(self, key: int) -> None:
+        info = self._open.pop(key, None)
+        if info is None:
+            return
+        self.sessions_leaked += 1
+        logger.warning(f"Database session garbage-collected without being closed (task {info.task}). Acquired at:\n{info.stack}")
+
+    def record_acquire(self, seconds: float) -> None:
+        """Time a session waited for its connection (pool checkout, and connect if the pool had none)."""
+        ms = seconds * 1000
+        self.acquire_count += 1
+        self.acquire_total_ms += ms
+        self.acquire_max_ms = max(self.acquire_max_ms, ms)
+
+    def record_checkout(self, checked_out: int) -> None:
+        self.pool_checkouts += 1
+        self.pool_checked_out_peak = max(self.pool_checked_out_peak, checked_out)
+
+    def record_checkin(self) -> None:
+        self.pool_checkins += 1
+
+    def open_sessions(self, older_than_seconds: float = 0.0) -> List[Dict[str, Any]]:
+        """Sessions still open (oldest first), with where they were acquired. Empty unless enabled."""
+        now = time.monotonic()
+        sessions = [
+            {"age_seconds": round(now - info.opened_at, 3), "task": info.task, "acquired_at": info.stack}
+            for info in self._open.values()
+            if now - info.opened_at >= older_than_seconds
+        ]
+        return sorted(sessions, key=lambda s: s["age_seconds"], reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "leak_detection": self.enabled,
+            "sessions": {
+                "opened": self.sessions_opened,
+                "closed": self.sessions_closed,
+                "open": self.sessions_opened - self.sessions_closed,
+                "leaked": self.sessions_leaked,
+            },
+            "pool": {
+                "checkouts": self.pool_checkouts,
+                "checkins": self.pool_checkins,
+                "checked_out_peak": self.pool_checked_out_peak,
+            },
+            "acquire_wait_ms": {
+                "count": self.acquire_count,
+                "avg": (self.acquire_total_ms / self.acquire_count) if self.acquire_count else None,
+                "max": self.acquire_max_ms if self.acquire_count else None,
+            },
+        }
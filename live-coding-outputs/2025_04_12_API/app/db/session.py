@@ -1,12 +1,19 @@
 import logging
 from contextlib import asynccontextmanager  # Add this import for asynccontextmanager
-from typing import AsyncGenerator  # Add this import for type annotation
+from typing import Any, AsyncGenerator, Dict, Optional  # Add this import for type annotation
+from fastapi import Request, Depends
 from sqlmodel import SQLModel, create_engine, Session
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
+import time
+from sqlalchemy import Table, event, inspect, text
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine  # Import from sqlalchemy.ext.asyncio
 
 from app.core.config import settings
+from app.core.metrics import DB_QUERY_DURATION, DB_SESSION_ACQUIRE_DURATION
+from app.core.tracing import end_detached_span, span, start_detached_span
+from app.db.leak_detector import SessionLeakDetector
 
 logger = logging.getLogger(__name__)
 
@@ -15,17 +22,103 @@ logger = logging.getLogger(__name__)
 connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
 async_engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True, connect_args=connect_args)
 
+# Session and pool accounting; with DB_SESSION_LEAK_DETECTION it also records where each open session was created
+session_tracker = SessionLeakDetector(enabled=settings.DB_SESSION_LEAK_DETECTION, stack_depth=settings.DB_SESSION_LEAK_STACK_DEPTH)
+
+class TrackedAsyncSession(AsyncSession):
+    """AsyncSession that reports itself to `session_tracker` from creation until it is closed."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tracked_open = True
+        session_tracker.opened(self)
+
+    async def close(self) -> None:
+        try:
+            await super().close()
+        finally:
+            # close() may be called more than once (e.g. explicitly, then by `async with`); count it once
+            if self._tracked_open:
+                self._tracked_open = False
+                session_tracker.closed(self)
+
+@event.listens_for(async_engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool = async_engine.sync_engine.pool
+    session_tracker.record_checkout(pool.checkedout() if hasattr(pool, "checkedout") else 0)
+
+@event.listens_for(async_engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    session_tracker.record_checkin()
+
 # Create the async session factory
 AsyncSessionFactory = sessionmaker(
     bind=async_engine,
-    class_=AsyncSession,
+    class_=TrackedAsyncSession,
     expire_on_commit=False, # Important for async sessions
 )
 
-async def get_async_session() -> AsyncSession:
-    """Dependency to get an async database session."""
-    async with AsyncSessionFactory() as session:
-        yield session
+def _statement_type(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+
+# Statement timing for DB_QUERY_DURATION and `db` trace spans. Cursor events run on the event
+# loop thread (the async driver is adapted through greenlets) and see the request's context
+# variables, so the start time and span can live on the execution context.
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_span = start_detached_span("db", **{"db.statement_type": _statement_type(statement)})
+    context._query_start = time.perf_counter()
+
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERY_DURATION.labels(_statement_type(statement)).observe(time.perf_counter() - context._query_start)
+    end_detached_span(context._query_span)
+
+class UnitOfWork:
+    """
+    The database work of one request: a single session, created on first use and closed
+    (rolling back anything left uncommitted) when the request's dependencies are torn down.
+    Services still decide when to commit.
+    """
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or AsyncSessionFactory
+        self._session: Optional[AsyncSession] = None
+
+    async def session(self) -> AsyncSession:
+        """The request's session, connected. Every caller in the request gets the same one."""
+        if self._session is None:
+            self._session = self._session_factory()
+            # Connect up front so pool checkout time is measured on its own
+            with span("db_session"):
+                start = time.perf_counter()
+                await self._session.connection()
+                elapsed = time.perf_counter() - start
+            DB_SESSION_ACQUIRE_DURATION.observe(elapsed)
+            session_tracker.record_acquire(elapsed)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+async def get_unit_of_work(request: Request) -> AsyncGenerator[UnitOfWork, None]:
+    """
+    Dependency providing the request's UnitOfWork (cached per request by FastAPI, and also
+    reachable as `request.state.unit_of_work`). Its session is closed when the request ends,
+    including when the endpoint or a later dependency raises.
+    """
+    unit_of_work = UnitOfWork()
+    request.state.unit_of_work = unit_of_work
+    try:
+        yield unit_of_work
+    finally:
+        await unit_of_work.close()
+
+async def get_async_session(unit_of_work: UnitOfWork = Depends(get_unit_of_work)) -> AsyncSession:
+    """Dependency to get the request's async database session (shared by all dependencies of the request)."""
+    return await unit_of_work.session()
 
 async def create_db_and_tables():
     """Creates database tables based on SQLModel metadata."""
@@ -34,14 +127,55 @@ async def create_db_and_tables():
         try:
             # SQLModel uses the metadata from all imported models inheriting from SQLModel
             await conn.run_sync(SQLModel.metadata.create_all)
+            # create_all never alters existing tables; add columns introduced since they were created
+            for table in SQLModel.metadata.sorted_tables:
+                await conn.run_sync(add_missing_columns, table)
+                await conn.run_sync(add_missing_indexes, table)
             logger.info("Database tables checked/created successfully.")
         except Exception as e:
             logger.error(f"Error creating database tables: {e}", exc_info=True)
             raise # Re-raise the exception to potentially halt startup if critical
 
+def add_missing_columns(sync_conn: Connection, table: Table) -> None:
+    """
+    Adds columns that exist on `table`'s model but not yet in the database.
+    A minimal stand-in for migrations in this prototype: only non-key columns that are nullable
+    or have a server default (which fills existing rows) are added.
+    """
+    inspector = inspect(sync_conn)
+    if not inspector.has_table(table.name):
+        return
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing or column.primary_key:
+            continue
+        if not column.nullable and column.server_default is None:
+            continue
+        column_type = column.type.compile(dialect=sync_conn.dialect)
+        definition = column_type
+        if column.server_default is not None:
+            default = column.server_default.arg
+            default_sql = f"'{default}'" if isinstance(default, str) else default.compile(dialect=sync_conn.dialect)
+            definition += f"{'' if column.nullable else ' NOT NULL'} DEFAULT {default_sql}"
+        sync_conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {definition}'))
+        logger.info(f"Added column {table.name}.{column.name} ({definition}).")
+
+def add_missing_indexes(sync_conn: Connection, table: Table) -> None:
+    """Creates indexes declared on `table`'s model after the table itself was created."""
+    inspector = inspect(sync_conn)
+    if not inspector.has_table(table.name):
+        return
+    existing = {index["name"] for index in inspector.get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name not in existing:
+            index.create(sync_conn)
+            logger.info(f"Created index {index.name} on {table.name}.")
+
 async def close_db_connection():
     """Closes the database engine connection."""
     logger.info("Closing database engine connection...")
+    for leaked in session_tracker.open_sessions():
+        logger.warning(f"Database session still open at shutdown (age {leaked['age_seconds']}s, task {leaked['task']}). Acquired at:\n{leaked['acquired_at']}")
     await async_engine.dispose()
     logger.info("Database engine connection closed.")
 
@@ -68,5 +202,15 @@ async def get_standalone_session() -> AsyncGenerator[AsyncSession, None]:
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
+        # `async with` closes the session
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool occupancy plus session/checkout counters from `session_tracker`."""
+    pool = async_engine.sync_engine.pool
+    occupancy: Dict[str, Any] = {"class": type(pool).__name__}
+    for name in ("size", "checkedout", "overflow", "checkedin"):
+        if hasattr(pool, name):
+            occupancy[name] = getattr(pool, name)()
+    stats = session_tracker.stats()
+    stats["pool"] = {**occupancy, **stats["pool"]}
+    return stats
@@ -6,13 +6,22 @@ from fastapi.exceptions import RequestValidationError
 
 # Import settings and database functions
 from app.core.config import settings
-from app.db.session import create_db_and_tables, close_db_connection, get_async_session
+from app.db.session import async_engine, create_db_and_tables, close_db_connection
 from app.services.llm_service import LLMServiceError, close_llm_service, get_llm_service
-from app.services.logging_service import LoggingService  # This should be defined now
+from app.services.log_writer import start_log_writer, stop_log_writer
+from app.services.log_partitions import start_partition_maintenance, stop_partition_maintenance
+from app.services.prompt_search import ensure_search_index
+from app.services.tag_cache import warm_tag_cache
+from app.services.tag_stats import ensure_tag_stats
+from app.middleware.request_capture import RequestCaptureMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.services.trace_exporter import start_trace_exporter, stop_trace_exporter
 from app.schemas.prompt import ErrorDetail  # Make sure to use the correct import path
 
 # Import API routers
 from app.api.router import api_router
+from app.api.endpoints import metrics
 
 # Import models to ensure they are registered with SQLModel metadata
 from app.models import log
@@ -26,14 +35,7 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Set up a dependency to get the logging service
-async def get_logging_service(request: Request):
-    """
-    Dependency to get a LoggingService instance with a database session.
-    Use this in endpoints where you need to log request/response info.
-    """
-    session = await get_async_session().__anext__()
-    return LoggingService(session)
+# The LoggingService dependency lives in app.core.dependencies (request-scoped session)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -49,14 +51,25 @@ async def lifespan(app: FastAPI):
 
     try:
         await create_db_and_tables()
+        await ensure_search_index(async_engine)
+        await warm_tag_cache(async_engine)
+        await ensure_tag_stats(async_engine)
     except Exception as e:
         logger.error(f"Database initialization failed: {e}. Halting application startup.")
         raise e # Halt startup if DB connection fails
 
+    # Request logs are written in batches by a background task, into per-period partitions
+    await start_log_writer()
+    start_partition_maintenance(async_engine)
+    await start_trace_exporter()
+
     yield
     # Shutdown
     logger.info("Application shutdown...")
     await close_llm_service()
+    await stop_partition_maintenance()
+    await stop_log_writer() # Flush queued log rows before the engine is disposed
+    await stop_trace_exporter()
     await close_db_connection()
     logger.info("Application shutdown complete.")
 
@@ -70,6 +83,20 @@ app = FastAPI(
     # openapi_url="/api/v1/openapi.json"
 )
 
+# --- Middleware ---
+# Logs one ApiLog record per LLM action request, including error responses from the handlers below
+app.add_middleware(
+    RequestCaptureMiddleware,
+    path_prefixes=settings.LOG_CAPTURE_PATH_PREFIXES,
+    max_body_bytes=settings.LOG_CAPTURE_MAX_BODY_BYTES,
+)
+# Starts a trace per request; wraps the capture so the log write is part of the trace
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, path_prefixes=settings.TRACING_PATH_PREFIXES)
+# Added last so it is outermost: request latency per route, including the capture above
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # --- Exception Handlers ---
 
 @app.exception_handler(LLMServiceError)
@@ -79,20 +106,7 @@ async def llm_service_exception_handler(request: Request, exc: LLMServiceError):
     # Use the status code from the exception object
     status_code = exc.status_code
     error_detail = ErrorDetail(detail=f"LLM service error: {exc.detail}") # Simplified detail for client
-
-    # Attempt to log the error to the database
-    try:
-        async for db in get_async_session():
-             await log_request(
-                 db=db,
-                 endpoint=request.url.path,
-                 status_code=status_code, # Log the actual status code
-                 response_payload=error_detail,
-                 timestamp=datetime.utcnow()
-             )
-             logger.info(f"LLMServiceError logged for endpoint: {request.url.path}")
-    except Exception as log_e:
-        logger.error(f"Failed to log LLMServiceError to DB: {log_e}", exc_info=True)
+    # The error response is logged to the database by RequestCaptureMiddleware
 
     return JSONResponse(
         status_code=status_code, # Return the correct status code
@@ -105,20 +119,7 @@ async def generic_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled Exception: {exc}", exc_info=True) # Log with traceback
     status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
     error_detail = ErrorDetail(detail="An unexpected internal server error occurred.")
-
-    # Attempt to log the error to the database
-    try:
-        async for db in get_async_session():
-             await log_request(
-                 db=db,
-                 endpoint=request.url.path,
-                 status_code=status_code,
-                 response_payload=error_detail,
-                 timestamp=datetime.utcnow()
-             )
-             logger.info(f"Unhandled Exception logged for endpoint: {request.url.path}")
-    except Exception as log_e:
-        logger.error(f"Failed to log unhandled Exception to DB: {log_e}", exc_info=True)
+    # Logged to the database by RequestCaptureMiddleware (as a 500 with the exception)
 
     return JSONResponse(
         status_code=status_code,
@@ -129,6 +130,9 @@ async def generic_exception_handler(request: Request, exc: Exception):
 # --- Mount Routers ---
 # Include the API router with a prefix for versioning
 app.include_router(api_router, prefix="/api/v1")
+# Prometheus scrape endpoint, unversioned like /health
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router, tags=["Health"])
 
 # --- Health Check Endpoint ---
 @app.get("/health", tags=["Health"], status_code=status.HTTP_200_OK, include_in_schema=True)
@@ -0,0 +1,60 @@
+import time
+from typing import Callable, Dict, Optional
+
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import HTTP_REQUEST_DURATION
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _route_paths(routes, prefix: str = "") -> Dict[Callable, str]:
+    """Maps each endpoint function to its route template, e.g. '/api/v1/prompts/{prompt_id}'."""
+    paths: Dict[Callable, str] = {}
+    for route in routes:
+        if isinstance(route, Mount):
+            paths.update(_route_paths(route.routes, prefix + route.path))
+        elif getattr(route, "endpoint", None) is not None:
+            paths.setdefault(route.endpoint, prefix + route.path)
+    return paths
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that records request latency per route template into
+    HTTP_REQUEST_DURATION. Requests that match no route share one label, so unknown
+    paths cannot inflate the number of series.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._paths: Optional[Dict[Callable, str]] = None
+
+    def _route_label(self, scope: Scope) -> str:
+        # The router stores the matched endpoint in the (shared) scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if self._paths is None:
+            self._paths = _route_paths(scope["app"].routes)
+        return self._paths.get(endpoint, UNMATCHED_ROUTE)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_DURATION.labels(scope["method"], self._route_label(scope), str(status_code)).observe(time.perf_counter() - start)
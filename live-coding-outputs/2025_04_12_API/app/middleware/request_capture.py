@@ -0,0 +1,97 @@
+import logging
+import time
+from typing import Iterable, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.tracing import span
+from app.models.log import ApiLog
+from app.services.logging_service import LoggingService
+
+logger = logging.getLogger(__name__)
+
+
+class _BodyCapture:
+    """Keeps the first `limit` bytes of a body that is passed through in chunks."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.size = 0
+        self._chunks = bytearray()
+
+    def add(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        room = self.limit - len(self._chunks)
+        if room > 0:
+            self._chunks += chunk[:room]
+
+    def text(self) -> Optional[str]:
+        if not self.size:
+            return None
+        text = bytes(self._chunks).decode("utf-8", errors="replace")
+        if self.size > len(self._chunks):
+            text += f"... [truncated, {self.size} bytes total]"
+        return text
+
+
+class RequestCaptureMiddleware:
+    """
+    Pure ASGI middleware that logs one ApiLog record per request under `path_prefixes`.
+
+    Request and response bodies are teed as they pass through (the first `max_body_bytes`
+    of each are kept), so handlers never re-read the body and streaming responses are
+    forwarded chunk by chunk without buffering. Processing time is measured with a
+    monotonic clock from the start of the request until its last body chunk is sent.
+    """
+
+    def __init__(self, app: ASGIApp, path_prefixes: Iterable[str] = (), max_body_bytes: int = 16384):
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_body = _BodyCapture(self.max_body_bytes)
+        response_body = _BodyCapture(self.max_body_bytes)
+        status_code: Optional[int] = None
+        error_detail: Optional[str] = None
+
+        async def capture_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body.add(message.get("body", b""))
+            return message
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_body.add(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        except Exception as e:
+            # Unhandled errors are turned into a 500 by the outermost ServerErrorMiddleware
+            if status_code is None:
+                status_code = 500
+            error_detail = f"Unhandled exception: {type(e).__name__}: {e}"
+            raise
+        finally:
+            # Also reached when the client disconnects mid-stream (the app is cancelled)
+            processing_time_ms = (time.perf_counter() - start) * 1000
+            entry = ApiLog(
+                endpoint=f"{scope['method']} {scope['path']}",
+                request_payload=request_body.text(),
+                response_payload=response_body.text() or error_detail,
+                status_code=status_code or 500,
+                processing_time_ms=processing_time_ms,
+            )
+            with span("log_write"):
+                await LoggingService().write(entry)
+
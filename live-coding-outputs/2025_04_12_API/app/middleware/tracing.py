@@ -0,0 +1,43 @@
+from typing import Iterable
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.tracing import end_trace, start_trace
+from app.services.trace_exporter import get_trace_exporter
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware that starts a trace for each request under `path_prefixes`,
+    adds a `Server-Timing` header with the per-stage breakdown recorded before the
+    response started, and hands the finished trace to the exporter (if one is running).
+    """
+
+    def __init__(self, app: ASGIApp, path_prefixes: Iterable[str] = ("/",)):
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        trace = start_trace(f"{scope['method']} {scope['path']}", **{"http.method": scope["method"], "http.target": scope["path"]})
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                trace.root.attributes["http.status_code"] = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception as e:
+            trace.root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            end_trace(trace)
+            exporter = get_trace_exporter()
+            if exporter is not None:
+                exporter.export(trace)
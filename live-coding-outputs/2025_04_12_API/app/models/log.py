@@ -12,6 +12,10 @@ class ApiLogBase(SQLModel):
     response_payload: Optional[str] = Field(default=None) # Store as JSON string
     status_code: int = Field(index=True, nullable=False)
     processing_time_ms: Optional[float] = Field(default=None)
+    # Content hashes of the payloads, stored once in PayloadBlob. New rows set these
+    # instead of the payload columns; None when the payload was not sampled.
+    request_payload_hash: Optional[str] = Field(default=None, max_length=64)
+    response_payload_hash: Optional[str] = Field(default=None, max_length=64)
 
 class ApiLog(ApiLogBase, table=True):
     """
@@ -23,3 +27,31 @@ class ApiLog(ApiLogBase, table=True):
 
 # Note: Storing payloads as TEXT (implied by str) is sufficient for the prototype.
 # For complex JSON querying later, consider specific JSON types if the DB supports them well.
+
+class ApiLogRollup(SQLModel, table=True):
+    """
+    Per-minute, per-endpoint aggregate of API log rows, updated as logs are written.
+    `latency_sketch` is a serialized DDSketch of processing_time_ms; sketches from
+    different buckets merge exactly, so any window can be summarised from its buckets.
+    """
+    __tablename__ = "api_log_rollup"
+
+    bucket_start: datetime = Field(primary_key=True) # Start of the minute (UTC)
+    endpoint: str = Field(primary_key=True)
+    request_count: int = Field(default=0, nullable=False)
+    client_error_count: int = Field(default=0, nullable=False) # 4xx
+    server_error_count: int = Field(default=0, nullable=False) # 5xx
+    total_time_ms: float = Field(default=0.0, nullable=False)
+    latency_sketch: str = Field(nullable=False)
+
+class PayloadBlob(SQLModel, table=True):
+    """
+    Content-addressed store for logged request/response payloads: each distinct payload is
+    stored once, keyed by its SHA-256, and referenced from ApiLog rows by hash.
+    """
+    __tablename__ = "payload_blob"
+
+    hash: str = Field(primary_key=True, max_length=64)
+    content: str = Field(nullable=False)
+    size: int = Field(nullable=False) # UTF-8 bytes
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
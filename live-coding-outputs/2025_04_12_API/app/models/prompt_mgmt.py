@@ -1,3 +1,4 @@
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
 from datetime import datetime
@@ -21,6 +22,12 @@ class Tag(TagBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     prompts: List["Prompt"] = Relationship(back_populates="tags", link_model=PromptTag)
 
+# Number of prompts linked to each tag, kept up to date by PromptManagementService on every
+# write so tag counts never need a GROUP BY over PromptTag (see app/services/tag_stats.py)
+class TagStat(SQLModel, table=True):
+    tag_id: Optional[int] = Field(default=None, foreign_key="tag.id", primary_key=True)
+    prompt_count: int = Field(default=0)
+
 # --- Core Prompt ---
 
 class PromptBase(SQLModel):
@@ -28,12 +35,23 @@ class PromptBase(SQLModel):
     description: Optional[str] = Field(default=None)
     full_prompt: str # SQLite uses TEXT implicitly for large strings
     created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
-    # updated_at: Optional[datetime] = Field(default=None, index=True) # Add later if needed
+    updated_at: Optional[datetime] = Field(default=None)
+    # Incremented on every change to the prompt or its tags; drives the ETag of GET /prompts/{id}
+    version: int = Field(default=1, sa_column_kwargs={"server_default": text("1")})
 
 class Prompt(PromptBase, table=True):
+    # Keyset pagination seeks on (created_at, id), newest first
+    __table_args__ = (Index("ix_prompt_created_at_id", "created_at", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     tags: List[Tag] = Relationship(back_populates="prompts", link_model=PromptTag)
 
+# Single row holding a generation number that every library write increments (in the same
+# transaction), so list responses can be cached and revalidated across worker processes
+class LibraryState(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    generation: int = Field(default=0)
+
 # --- Schemas for API interaction will be in app/schemas/prompt_mgmt.py ---
 # Define Read/Create schemas separately to avoid exposing relationship lists directly in create requests
 # and to control what's returned in responses.
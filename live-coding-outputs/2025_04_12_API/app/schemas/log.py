@@ -0,0 +1,37 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, List, Optional
+from datetime import datetime
+
+class ApiLogEntry(BaseModel):
+    id: int
+    timestamp: datetime
+    endpoint: str
+    status_code: int
+    processing_time_ms: Optional[float] = None
+    request_payload: Optional[str] = None
+    response_payload: Optional[str] = None
+    request_payload_hash: Optional[str] = None
+    response_payload_hash: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class ApiLogList(BaseModel):
+    since: datetime
+    until: datetime
+    items: List[ApiLogEntry]
+
+class LatencyStats(BaseModel):
+    requests: int
+    client_errors: int
+    server_errors: int
+    error_rate: float
+    avg_ms: Optional[float] = None
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+
+class LogStatsResponse(BaseModel):
+    since: datetime
+    until: datetime
+    endpoints: Dict[str, LatencyStats]
+    total: LatencyStats
+    buckets_read: int
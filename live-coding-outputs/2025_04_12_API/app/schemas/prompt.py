@@ -5,11 +5,31 @@ from typing import List, Optional, Dict, Any
 class AnalyzeRequest(BaseModel):
     prompt: str = Field(..., min_length=1, description="The prompt text to analyze.")
 
+class AnalyzeMetadata(BaseModel):
+    semantic_cache_hit: bool = Field(..., description="True if this analysis was reused from a near-identical, previously analyzed prompt.")
+    similarity: Optional[float] = Field(None, description="Cosine similarity (0-1) to the closest previously analyzed prompt, if any.")
+
 class AnalyzeResponse(BaseModel):
     clarity_score: Optional[int] = Field(None, ge=0, le=100, description="Estimated clarity score (0-100). Calculation TBD.")
     issues: List[str] = Field(default_factory=list, description="List of identified potential issues (e.g., 'Vague', 'Too Long').")
     suggestions: List[str] = Field(default_factory=list, description="Brief suggestions for improvement.")
     model_used: Optional[str] = Field(None, description="The specific LLM model used for the analysis.") # Added field
+    metadata: Optional[AnalyzeMetadata] = Field(None, description="How the analysis was served (semantic cache details).")
+
+# --- Batch Analyze ---
+class BatchAnalyzeRequest(BaseModel):
+    prompts: List[str] = Field(..., min_length=1, description="The prompt texts to analyze.")
+    concurrency: Optional[int] = Field(None, ge=1, description="Maximum number of prompts analyzed concurrently. Capped by the server limit.")
+
+class BatchAnalyzeError(BaseModel):
+    status_code: int
+    detail: str
+
+class BatchAnalyzeResult(BaseModel):
+    """One NDJSON line of a batch analyze response. Exactly one of `result` or `error` is set."""
+    index: int = Field(..., description="Position of the prompt in the request's `prompts` list.")
+    result: Optional[AnalyzeResponse] = None
+    error: Optional[BatchAnalyzeError] = None
 
 # --- Remix ---
 class RemixRequest(BaseModel):
@@ -14,6 +14,13 @@ class TagResponse(TagBase):
     id: int
     model_config = ConfigDict(from_attributes=True) # Compatibility with ORM models
 
+class TagWithCountResponse(TagResponse):
+    prompt_count: Optional[int] = Field(None, description="Prompts with this tag (only with `with_counts=true`)")
+
+class TagFacet(BaseModel):
+    name: str
+    count: int = Field(..., description="Matching prompts with this tag")
+
 # --- Prompt Schemas ---
 
 class PromptBase(BaseModel):
@@ -30,9 +37,17 @@ class PromptUpdate(BaseModel):
     full_prompt: Optional[str] = None
     tags: Optional[List[str]] = Field(None, description="List of tag names to associate. This will replace existing tags.")
 
+class PromptExportItem(PromptBase):
+    """One NDJSON line of GET /prompts/export; also valid as a line for POST /prompts/bulk."""
+    id: int
+    created_at: datetime
+    tags: List[str] = Field(default_factory=list)
+
 class PromptResponse(PromptBase):
     id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
+    version: int = Field(1, description="Incremented on every change; GET /prompts/{id} sends it in the ETag")
     tags: List[TagResponse] = Field(default_factory=list) # Return associated tags
     model_config = ConfigDict(from_attributes=True)
 
@@ -41,9 +56,29 @@ class PromptResponse(PromptBase):
 # Or import from a shared location like app/schemas/common.py
 class PaginatedPromptResponse(BaseModel):
     items: List[PromptResponse]
-    total: int
-    page: int
+    total: Optional[int] = Field(None, description="Matching prompts; null when count=none, possibly stale when total_is_estimate")
+    total_is_estimate: bool = False
+    page: Optional[int] = Field(None, description="Page number for offset (skip) paging; null when paging by cursor")
     size: int
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page; null on the last page")
+
+class PromptSearchResult(PromptResponse):
+    # Best-matching fragment with query terms wrapped in <mark></mark> (full-text search only)
+    snippet: Optional[str] = None
+
+class PaginatedPromptSearchResponse(PaginatedPromptResponse):
+    items: List[PromptSearchResult]
+    facets: Optional[List[TagFacet]] = Field(None, description="Tag counts over all matches (only with `with_facets=true`)")
+
+# --- Bulk import ---
+class BulkImportError(BaseModel):
+    line: int = Field(..., description="1-based line number in the uploaded NDJSON.")
+    detail: str
+
+class BulkImportResponse(BaseModel):
+    created: int = 0
+    failed: int = 0
+    errors: List[BulkImportError] = Field(default_factory=list, description="Per-line errors (the first PROMPT_BULK_MAX_REPORTED_ERRORS).")
 
 # Add this if not already present
 class PromptSearchQuery(BaseModel):
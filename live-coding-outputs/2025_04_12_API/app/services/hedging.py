@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Rolling window of recent successful call latencies (seconds)."""
+
+    def __init__(self, window_size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window_size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None if it is empty."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, min(len(ordered), math.ceil(pct / 100.0 * len(ordered))))
+        return ordered[rank - 1]
+
+
+class LLMBackend:
+    """One OpenAI-compatible upstream, with its own client, weight and latency history."""
+
+    def __init__(self, name: str, client: AsyncOpenAI, base_url: Optional[str], weight: float = 1.0, window_size: int = 200):
+        self.name = name
+        self.client = client
+        self.base_url = base_url
+        self.weight = weight
+        self.latency = LatencyTracker(window_size)
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0  # Hedged races won by this backend
+
+    def hedge_delay(self, percentile: float, min_samples: int, initial_s: float, min_s: float, max_s: float) -> float:
+        """
+        How long to wait for this backend before sending a hedged duplicate: its rolling
+        latency percentile once enough samples exist, clamped to [min_s, max_s].
+        """
+        observed = self.latency.percentile(percentile) if len(self.latency) >= min_samples else None
+        delay = initial_s if observed is None else observed
+        return min(max_s, max(min_s, delay))
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.latency.percentile(50), self.latency.percentile(95)
+        return {
+            "name": self.name,
+            "base_url": self.base_url,
+            "weight": self.weight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "hedge_wins": self.wins,
+            "p50_ms": p50 * 1000 if p50 is not None else None,
+            "p95_ms": p95 * 1000 if p95 is not None else None,
+        }
+
+
+def pick_backends(backends: List[LLMBackend]) -> Tuple[LLMBackend, Optional[LLMBackend]]:
+    """
+    Chooses a primary by weight, and a different secondary by weight from the rest (None if only one).
+    A backend with weight 0 is never picked as primary, so it only ever receives hedged duplicates.
+    """
+    candidates = [b for b in backends if b.weight > 0] or backends
+    primary = random.choices(candidates, weights=[b.weight or 1.0 for b in candidates])[0]
+    others = [b for b in backends if b is not primary]
+    secondary = random.choices(others, weights=[b.weight or 1.0 for b in others])[0] if others else None
+    return primary, secondary
+
+
+async def hedged_call(
+    primary: Callable[[], Awaitable[T]],
+    secondary: Optional[Callable[[], Awaitable[T]]],
+    delay: float,
+) -> Tuple[T, int, bool]:
+    """
+    Runs `primary()`; if it has not finished after `delay` seconds (or fails before then),
+    also runs `secondary()`. The first successful result wins and the other call is cancelled.
+    If both fail, the primary's error is raised.
+
+    Returns (result, winner, hedged) where winner is 0 for primary and 1 for secondary.
+    """
+    primary_task = asyncio.ensure_future(primary())
+    tasks = [primary_task]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if secondary is None or (done and primary_task.exception() is None):
+            return await primary_task, 0, False
+
+        tasks.append(asyncio.ensure_future(secondary()))
+        pending = {task for task in tasks if not task.done()}
+        errors: Dict[int, BaseException] = {}
+        if primary_task.done():
+            errors[0] = primary_task.exception()
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = tasks.index(task)
+                if task.exception() is None:
+                    return task.result(), index, True
+                errors[index] = task.exception()
+        raise errors.get(0) or errors[1]
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
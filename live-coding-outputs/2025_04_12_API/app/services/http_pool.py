@@ -0,0 +1,95 @@
+import importlib.util
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Process-wide client for upstream LLM calls. Every LLMService, and every backend of each, sends
+# through this one pool, so warm connections are reused across service instances. Closed on
+# application shutdown by close_http_client() (via close_llm_service).
+_shared_client: Optional[httpx.AsyncClient] = None
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Builds an httpx.AsyncClient for upstream LLM calls, with pool limits, keepalive expiry
+    and (optionally) HTTP/2 taken from Settings. The caller owns the client and must
+    `aclose()` it; the app uses the shared one from get_http_client().
+    """
+    http2 = settings.LLM_HTTP2_ENABLED
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("LLM_HTTP2_ENABLED is set but the 'h2' package is not installed (pip install 'httpx[http2]'). Falling back to HTTP/1.1.")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    timeout = httpx.Timeout(settings.LLM_HTTP_TIMEOUT_SECONDS, connect=settings.LLM_HTTP_CONNECT_TIMEOUT_SECONDS)
+    logger.info(
+        f"Creating LLM HTTP connection pool (max_connections={limits.max_connections}, "
+        f"max_keepalive={limits.max_keepalive_connections}, keepalive_expiry={limits.keepalive_expiry}s, http2={http2})"
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the shared LLM HTTP client, building it on first use (or after it was closed)."""
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = build_http_client()
+    return _shared_client
+
+
+async def close_http_client() -> None:
+    """Closes the shared LLM HTTP client, releasing its pooled connections."""
+    global _shared_client
+    client, _shared_client = _shared_client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("LLM HTTP connection pool closed.")
+
+
+def pool_stats(client: httpx.AsyncClient) -> Dict[str, Any]:
+    """
+    Reports utilisation of the client's connection pool.
+
+    httpx does not expose pool state publicly, so this reads the underlying httpcore
+    pool defensively; fields that cannot be read are reported as None.
+    """
+    stats: Dict[str, Any] = {
+        "max_connections": settings.LLM_HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "keepalive_expiry_seconds": settings.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        "closed": client.is_closed,
+        "connections": None,
+        "active": None,
+        "idle": None,
+        "http2_connections": None,
+        "queued_requests": None,
+    }
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return stats
+
+    try:
+        idle = sum(1 for conn in connections if conn.is_idle())
+        stats.update(
+            connections=len(connections),
+            idle=idle,
+            active=len(connections) - idle,
+            http2_connections=sum(1 for conn in connections if "HTTP/2" in conn.info()),
+        )
+        pending = getattr(pool, "_requests", None)
+        if pending is not None:
+            # Requests not yet assigned a connection are waiting on the pool limit
+            stats["queued_requests"] = sum(1 for request in pending if getattr(request, "connection", None) is None)
+    except Exception as e:
+        logger.debug(f"Could not read HTTP pool stats: {e}")
+    return stats
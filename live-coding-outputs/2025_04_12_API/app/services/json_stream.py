@@ -0,0 +1,168 @@
+import json
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+JSONPath = Tuple[Union[str, int], ...]
+
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+@dataclass
+class JSONStreamEvent:
+    """
+    An event emitted while parsing a JSON document incrementally.
+
+    kind is either "string_delta" (new characters of a string value that is still open)
+    or "string_end" (a string value has been fully read; `value` is the complete string).
+    `path` locates the value, e.g. ("remixes", 1) for the second element of "remixes".
+    """
+    kind: str
+    path: JSONPath
+    value: str
+
+
+class _Frame:
+    __slots__ = ("is_object", "key", "index", "state")
+
+    def __init__(self, is_object: bool):
+        self.is_object = is_object
+        self.key: Optional[str] = None
+        self.index = 0
+        # Objects: "key" -> "colon" -> "value" -> "comma"; arrays: "value" -> "comma"
+        self.state = "key" if is_object else "value"
+
+    @property
+    def slot(self) -> Union[str, int, None]:
+        return self.key if self.is_object else self.index
+
+
+class IncrementalJSONParser:
+    """
+    Minimal incremental JSON parser that reports string values as they stream in.
+
+    Only string values are surfaced (which is all the LLM response formats need);
+    numbers, booleans and nulls are skipped. Text before the first '{' or '[' and
+    after the root value closes is ignored. The full text is kept so the finished
+    document can still be validated with `json.loads`.
+    """
+
+    def __init__(self):
+        self._stack: List[_Frame] = []
+        self._done = False
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._unicode_digits: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        self._string_chars: List[str] = []
+        self._emitted_upto = 0
+        self._chunks: List[str] = []
+
+    @property
+    def text(self) -> str:
+        """All text fed so far."""
+        return "".join(self._chunks)
+
+    def _path(self) -> JSONPath:
+        return tuple(frame.slot for frame in self._stack)
+
+    def _append_char(self, char: str) -> None:
+        self._string_chars.append(char)
+
+    def _append_code_point(self, code: int) -> None:
+        if 0xD800 <= code <= 0xDBFF:
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        self._append_char(chr(code))
+
+    def _after_value(self) -> None:
+        if self._stack:
+            self._stack[-1].state = "comma"
+        else:
+            self._done = True
+
+    def feed(self, chunk: str) -> List[JSONStreamEvent]:
+        """Consumes the next chunk of text and returns the events it produced."""
+        self._chunks.append(chunk)
+        events: List[JSONStreamEvent] = []
+
+        for char in chunk:
+            if self._done:
+                break
+
+            if self._in_string:
+                if self._unicode_digits is not None:
+                    self._unicode_digits += char
+                    if len(self._unicode_digits) == 4:
+                        try:
+                            self._append_code_point(int(self._unicode_digits, 16))
+                        except ValueError:
+                            pass  # Invalid escape; json.loads will reject the final document
+                        self._unicode_digits = None
+                elif self._escape:
+                    self._escape = False
+                    if char == "u":
+                        self._unicode_digits = ""
+                    else:
+                        self._append_char(_SIMPLE_ESCAPES.get(char, char))
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    value = "".join(self._string_chars)
+                    frame = self._stack[-1] if self._stack else None
+                    if self._string_is_key and frame is not None:
+                        frame.key = value
+                        frame.state = "colon"
+                    else:
+                        path = self._path()
+                        if len(value) > self._emitted_upto:
+                            events.append(JSONStreamEvent("string_delta", path, value[self._emitted_upto:]))
+                        events.append(JSONStreamEvent("string_end", path, value))
+                        self._after_value()
+                else:
+                    self._append_char(char)
+                continue
+
+            if not self._stack and char not in "{[":
+                continue  # Preamble before the root value (e.g. a code fence)
+
+            if char in "{[":
+                self._stack.append(_Frame(is_object=(char == "{")))
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                self._after_value()
+            elif char == '"':
+                frame = self._stack[-1]
+                self._in_string = True
+                self._string_is_key = frame.is_object and frame.state == "key"
+                self._string_chars = []
+                self._emitted_upto = 0
+            elif char == ":":
+                self._stack[-1].state = "value"
+            elif char == ",":
+                frame = self._stack[-1]
+                if frame.is_object:
+                    frame.state = "key"
+                else:
+                    frame.index += 1
+                    frame.state = "value"
+            # Whitespace and scalar characters (numbers, true/false/null) need no tracking
+
+        # Flush the visible part of a string value that is still open
+        if self._in_string and not self._string_is_key and len(self._string_chars) > self._emitted_upto:
+            events.append(JSONStreamEvent("string_delta", self._path(), "".join(self._string_chars[self._emitted_upto:])))
+            self._emitted_upto = len(self._string_chars)
+
+        return events
+
+    def result(self):
+        """Parses and returns the complete document. Raises json.JSONDecodeError if it is invalid."""
+        return json.loads(self.text)
@@ -1,17 +1,32 @@
+import asyncio
 import httpx
 import logging
-from typing import List, Dict, Any, Optional
+import random
+import time
+from typing import AsyncIterator, List, Dict, Any, Optional
 import json
 
 import openai
-from openai import AsyncOpenAI, APIError, AuthenticationError, RateLimitError, APIConnectionError
+from openai import AsyncOpenAI, APIError, AuthenticationError, RateLimitError, APIConnectionError, InternalServerError
 from pydantic import ValidationError # Import ValidationError
 
-from app.core.config import settings
-from app.schemas.prompt import AnalyzeRequest, AnalyzeResponse, RemixRequest, RemixResponse, CreateRequest, CreateResponse
+from app.core.config import settings, LLMBackendConfig
+from app.core.metrics import LLM_CALL_DURATION
+from app.core.tracing import span
+from app.schemas.prompt import AnalyzeRequest, AnalyzeResponse, AnalyzeMetadata, RemixRequest, RemixResponse, CreateRequest, CreateResponse
+from app.services.response_cache import ResponseCache, make_chat_cache_key
+from app.services.single_flight import SingleFlight
+from app.services.semantic_cache import SemanticCache, semantic_cache_available
+from app.services.json_stream import IncrementalJSONParser
+from app.services.rate_limiter import UpstreamRateLimiter, estimate_request_tokens
+from app.services.http_pool import close_http_client, get_http_client, pool_stats
+from app.services.hedging import LLMBackend, hedged_call, pick_backends
+from app.services.prompt_templates import TEMPLATES, DEFAULT_REMIX_STYLES, BuiltPrompt, PromptTooLargeError, TokenCounter
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
 class LLMServiceError(Exception):
     """Custom exception for LLM service errors."""
     def __init__(self, detail: str, status_code: int = 500): # Add status_code
@@ -23,121 +38,386 @@ class LLMService:
     """
     Service class to interact with the OpenAI API.
     """
-    def __init__(self, api_key: str, base_url: Optional[str] = None):
-        if not api_key or api_key == "YOUR_LLM_API_KEY_HERE":
-            logger.warning("LLM_API_KEY is not configured or is set to the default placeholder.")
-            # Raise a specific error if the key is missing/invalid for OpenAI
-            raise LLMServiceError("OpenAI API key is missing or invalid.", status_code=500)
+    def __init__(self, api_key: str, base_url: Optional[str] = None, backends: Optional[List[LLMBackendConfig]] = None):
+        # One (name, base_url, api_key, weight) per upstream; a single default backend unless configured
+        if backends:
+            specs = [(b.name, b.base_url, b.api_key or api_key, b.weight) for b in backends]
+        else:
+            specs = [("default", base_url, api_key, 1.0)]
+        for name, _, key, _ in specs:
+            if not key or key == "YOUR_LLM_API_KEY_HERE":
+                logger.warning(f"API key for LLM backend '{name}' is not configured or is set to the default placeholder.")
+                # Raise a specific error if the key is missing/invalid for OpenAI
+                raise LLMServiceError("OpenAI API key is missing or invalid.", status_code=500)
 
+        self.base_url = base_url
         try:
-            # Initialize the AsyncOpenAI client
-            self._client = AsyncOpenAI(
-                api_key=api_key,
-                base_url=base_url, # Pass base_url if provided (for proxies etc.)
-                timeout=30.0
-            )
-            logger.info("AsyncOpenAI client initialized.")
+            # Explicitly managed connection pool, shared by every backend's AsyncOpenAI client and
+            # by every LLMService in the process; close_llm_service() closes it on shutdown.
+            self._http_client = get_http_client()
+            self._backends: List[LLMBackend] = []
+            for name, backend_url, key, weight in specs:
+                client = AsyncOpenAI(
+                    api_key=key,
+                    base_url=backend_url, # Pass base_url if provided (for proxies etc.)
+                    timeout=settings.LLM_HTTP_TIMEOUT_SECONDS,
+                    max_retries=0, # Retries are handled by _create_completion so they go through the rate limiter
+                    http_client=self._http_client,
+                )
+                self._backends.append(LLMBackend(name, client, backend_url, weight, window_size=settings.LLM_HEDGE_WINDOW_SIZE))
+            # The first backend's client, kept for code that needs a single client
+            self._client = self._backends[0].client
+            logger.info(f"AsyncOpenAI client initialized ({len(self._backends)} backend(s): {', '.join(b.name for b in self._backends)}).")
         except Exception as e:
             logger.exception("Failed to initialize AsyncOpenAI client.")
             raise LLMServiceError(f"Failed to initialize OpenAI client: {e}", status_code=500)
 
+        self._hedging_enabled = settings.LLM_HEDGE_ENABLED and len(self._backends) > 1
+        self._hedges_sent = 0
+        self._hedge_wins = 0
+
+        # In-memory LRU+TTL cache of raw completions, keyed on the exact upstream request
+        self._cache_enabled = settings.LLM_CACHE_ENABLED
+        self._cache = ResponseCache(max_entries=settings.LLM_CACHE_MAX_ENTRIES)
+        # Near-duplicate tier for analyze, in front of the exact-match cache
+        self._semantic_cache: Optional[SemanticCache] = None
+        if settings.LLM_CACHE_ENABLED and settings.LLM_SEMANTIC_CACHE_ENABLED:
+            if semantic_cache_available():
+                self._semantic_cache = SemanticCache(
+                    threshold=settings.LLM_SEMANTIC_CACHE_THRESHOLD,
+                    max_entries=settings.LLM_SEMANTIC_CACHE_MAX_ENTRIES,
+                    dimensions=settings.LLM_SEMANTIC_CACHE_DIMENSIONS,
+                    ttl_seconds=settings.LLM_CACHE_TTL_ANALYZE_SECONDS,
+                )
+            else:
+                logger.warning("LLM_SEMANTIC_CACHE_ENABLED is set but numpy is not installed. Semantic cache disabled.")
+        # Identical concurrent requests share one upstream call
+        self._single_flight_enabled = settings.LLM_SINGLE_FLIGHT_ENABLED
+        self._single_flight = SingleFlight()
+        # Client-side RPM/TPM limiter in front of the OpenAI client
+        self._rate_limiter = UpstreamRateLimiter(
+            requests_per_minute=settings.LLM_RATE_LIMIT_RPM,
+            tokens_per_minute=settings.LLM_RATE_LIMIT_TPM,
+        )
+        self._retries = 0
+        # Local tokenizer for prompt budgeting (tiktoken if installed, heuristic otherwise)
+        self._token_counter = TokenCounter(DEFAULT_MODEL)
+        self._truncated_inputs = 0
+
+    def clear_cache(self) -> int:
+        """
+        Flushes the response caches (exact and semantic). Returns the number of response
+        cache entries removed; the semantic tier holds a subset of the same results.
+        """
+        removed = self._cache.clear()
+        if self._semantic_cache is not None:
+            self._semantic_cache.clear()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns runtime statistics for the service (cache counters etc.)."""
+        return {
+            "cache": {"enabled": self._cache_enabled, **self._cache.stats()},
+            "semantic_cache": {"enabled": self._semantic_cache is not None, **(self._semantic_cache.stats() if self._semantic_cache else {})},
+            "single_flight": {"enabled": self._single_flight_enabled, **self._single_flight.stats()},
+            "rate_limiter": {"retries": self._retries, **self._rate_limiter.stats()},
+            "http_pool": pool_stats(self._http_client),
+            "hedging": {"enabled": self._hedging_enabled, "hedges_sent": self._hedges_sent, "hedge_wins": self._hedge_wins},
+            "backends": [backend.stats() for backend in self._backends],
+            "prompt_budget": {"tokenizer": self._token_counter.kind, "truncated_inputs": self._truncated_inputs},
+        }
+
     async def close(self):
-        """Closes the underlying OpenAI client's resources (if applicable)."""
-        # The AsyncOpenAI client uses httpx internally, which should ideally be closed.
-        # However, the OpenAI library doesn't expose a direct close method easily.
-        # We rely on the underlying httpx client managed by the library to handle connections.
-        # If resource leakage becomes an issue, further investigation is needed.
-        logger.info("LLMService close called (OpenAI client resources managed internally).")
-        pass # No explicit close needed for openai client itself currently
+        """
+        Releases this service. The HTTP connection pool is shared with other LLMService instances,
+        so it is left open here (AsyncOpenAI.close() would close it too); close_llm_service()
+        closes it on shutdown.
+        """
+        logger.info("LLMService closed.")
 
     # Update return type hint to include model name
-    async def _call_openai_chat(self, messages: List[Dict[str, str]], model: str = "gpt-3.5-turbo", temperature: float = 0.7, max_tokens: int = 250) -> tuple[str, str]:
-        """Helper function to call the OpenAI Chat Completions API. Returns (content, model_name)."""
+    async def _call_openai_chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        max_tokens: int = 250,
+        cache_ttl: Optional[float] = None,
+        use_cache: bool = True,
+    ) -> tuple[str, str]:
+        """
+        Calls the OpenAI Chat Completions API, serving repeated requests from the response cache.
+        `cache_ttl` sets how long a fresh result is kept; `use_cache=False` bypasses the cache
+        for both lookup and store. Identical requests already in flight are coalesced into
+        a single upstream call. Returns (content, model_name).
+        """
+        with span("llm", model=model) as trace_span:
+            start = time.perf_counter()
+            request_key = make_chat_cache_key(messages, model, temperature, max_tokens)
+            caching = self._cache_enabled and use_cache and cache_ttl is not None and cache_ttl > 0
+            if caching:
+                cached = self._cache.get(request_key)
+                if cached is not None:
+                    logger.debug(f"LLM response cache hit (key={request_key[:12]}...)")
+                    self._record_call(model, "cache_hit", start, trace_span)
+                    return cached
+
+            try:
+                if self._single_flight_enabled:
+                    result = await self._single_flight.do(
+                        request_key, lambda: self._request_completion(messages, model, temperature, max_tokens)
+                    )
+                else:
+                    result = await self._request_completion(messages, model, temperature, max_tokens)
+            except Exception:
+                self._record_call(model, "error", start, trace_span)
+                raise
+            self._record_call(model, "ok", start, trace_span)
+
+            if caching:
+                self._cache.set(request_key, result, ttl_seconds=cache_ttl)
+            return result
+
+    @staticmethod
+    def _record_call(model: str, outcome: str, start: float, trace_span) -> None:
+        """Records one _call_openai_chat in the latency histogram and on its trace span (if traced)."""
+        LLM_CALL_DURATION.labels(model, outcome).observe(time.perf_counter() - start)
+        if trace_span is not None:
+            trace_span.attributes["outcome"] = outcome
+
+    def _map_openai_error(self, e: Exception) -> LLMServiceError:
+        """Translates an exception raised by the OpenAI client into an LLMServiceError."""
+        if isinstance(e, LLMServiceError):
+            return e
+        if isinstance(e, AuthenticationError):
+            logger.error(f"OpenAI Authentication Error: {e}")
+            return LLMServiceError("OpenAI API key is invalid or expired.", status_code=500)
+        if isinstance(e, RateLimitError):
+            logger.error(f"OpenAI Rate Limit Error: {e}")
+            return LLMServiceError("OpenAI API rate limit exceeded. Please try again later.", status_code=429)
+        if isinstance(e, APIConnectionError):
+            logger.error(f"OpenAI API Connection Error: {e}")
+            return LLMServiceError("Could not connect to OpenAI API. Please check network or configuration.", status_code=503)
+        if isinstance(e, APIError): # Catch broader OpenAI API errors
+            logger.error(f"OpenAI API Error: Status={getattr(e, 'status_code', 'N/A')}, Message={getattr(e, 'message', str(e))}")
+            # Use getattr for safety, default to 503 if status_code isn't present
+            status_code = getattr(e, 'status_code', 503) or 503
+            message = getattr(e, 'message', str(e))
+            return LLMServiceError(f"OpenAI API returned an error: {message}", status_code=status_code)
+        logger.exception("An unexpected error occurred during OpenAI API call.")
+        # Use 503 as a general fallback for unexpected issues during the call
+        return LLMServiceError(f"Unexpected error communicating with OpenAI: {str(e)}", status_code=503)
+
+    @staticmethod
+    def _retry_after_seconds(e: APIError) -> Optional[float]:
+        """Reads `retry-after-ms` / `retry-after` (seconds) from an OpenAI error response, if present."""
+        response = getattr(e, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000.0
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except ValueError:
+            pass  # HTTP-date form is not used by OpenAI; fall back to exponential backoff
+        return None
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Exponential backoff with jitter, never shorter than the server's retry-after."""
+        backoff = min(settings.LLM_RETRY_MAX_DELAY_SECONDS, settings.LLM_RETRY_BASE_DELAY_SECONDS * (2 ** attempt))
+        backoff *= 0.5 + random.random() / 2  # "Equal jitter": between 50% and 100% of the backoff
+        return max(backoff, retry_after or 0.0)
+
+    async def _call_backend(self, backend: LLMBackend, messages: List[Dict[str, str]], **params):
+        """Sends one request to a specific backend, recording its latency on success."""
+        backend.requests += 1
+        start = time.monotonic()
+        try:
+            response = await backend.client.chat.completions.create(messages=messages, **params)
+        except asyncio.CancelledError:
+            raise  # Lost a hedged race; not an error
+        except Exception:
+            backend.errors += 1
+            raise
+        if not params.get("stream"):
+            backend.latency.record(time.monotonic() - start)
+        return response
+
+    async def _dispatch(self, messages: List[Dict[str, str]], **params):
+        """
+        Sends a request to a weighted-random primary backend. For non-streaming calls with
+        hedging enabled, a duplicate goes to a secondary backend if the primary has not
+        answered within its rolling latency percentile; the first good answer wins.
+        """
+        primary, secondary = pick_backends(self._backends)
+        if not self._hedging_enabled or secondary is None or params.get("stream"):
+            return await self._call_backend(primary, messages, **params)
+
+        delay = primary.hedge_delay(
+            percentile=settings.LLM_HEDGE_PERCENTILE,
+            min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+            initial_s=settings.LLM_HEDGE_INITIAL_DELAY_MS / 1000.0,
+            min_s=settings.LLM_HEDGE_MIN_DELAY_MS / 1000.0,
+            max_s=settings.LLM_HEDGE_MAX_DELAY_MS / 1000.0,
+        )
+        response, winner, hedged = await hedged_call(
+            lambda: self._call_backend(primary, messages, **params),
+            lambda: self._call_backend(secondary, messages, **params),
+            delay,
+        )
+        if hedged:
+            self._hedges_sent += 1
+            if winner == 1:
+                self._hedge_wins += 1
+                secondary.wins += 1
+                logger.debug(f"Hedged request to '{secondary.name}' beat '{primary.name}' (hedge delay {delay * 1000:.0f}ms)")
+            else:
+                primary.wins += 1
+        return response
+
+    async def _create_completion(self, messages: List[Dict[str, str]], **params):
+        """
+        Calls `chat.completions.create` through the rate limiter, retrying rate-limit,
+        connection and 5xx errors with jittered exponential backoff that honours retry-after.
+        One limiter slot covers a whole (possibly hedged) attempt.
+        """
+        estimated_tokens = estimate_request_tokens(messages, params.get("max_tokens", 0))
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            await self._rate_limiter.acquire(estimated_tokens)
+            try:
+                return await self._dispatch(messages, **params)
+            except (RateLimitError, APIConnectionError, InternalServerError) as e:
+                if attempt >= settings.LLM_MAX_RETRIES:
+                    raise
+                retry_after = self._retry_after_seconds(e)
+                delay = self._retry_delay(attempt, retry_after)
+                if isinstance(e, RateLimitError):
+                    # Hold back the whole queue, not just this call
+                    self._rate_limiter.pause(delay)
+                self._retries += 1
+                logger.warning(f"OpenAI call failed ({type(e).__name__}); retry {attempt + 1}/{settings.LLM_MAX_RETRIES} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def _request_completion(self, messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int) -> tuple[str, str]:
+        """Sends a single Chat Completions request upstream and maps errors to LLMServiceError."""
         try:
             logger.debug(f"Calling OpenAI API. Model: {model}, Temp: {temperature}, Max Tokens: {max_tokens}")
-            response = await self._client.chat.completions.create(
+            response = await self._create_completion(
+                messages,
                 model=model,
-                messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
             )
             content = response.choices[0].message.content
             model_used = response.model # Get the exact model string used by OpenAI
-            logger.debug(f"OpenAI API response received from model {model_used}: {content[:100]}...")
             if not content:
                  raise LLMServiceError("Received empty response from OpenAI.", status_code=503)
+            logger.debug(f"OpenAI API response received from model {model_used}: {content[:100]}...")
             # Return both content and model name
             return content.strip(), model_used
-        except AuthenticationError as e:
-            logger.error(f"OpenAI Authentication Error: {e}")
-            raise LLMServiceError("OpenAI API key is invalid or expired.", status_code=500) from e
-        except RateLimitError as e:
-            logger.error(f"OpenAI Rate Limit Error: {e}")
-            raise LLMServiceError("OpenAI API rate limit exceeded. Please try again later.", status_code=429) from e
-        except APIConnectionError as e:
-            logger.error(f"OpenAI API Connection Error: {e}")
-            raise LLMServiceError("Could not connect to OpenAI API. Please check network or configuration.", status_code=503) from e
-        except APIError as e: # Catch broader OpenAI API errors
-            logger.error(f"OpenAI API Error: Status={getattr(e, 'status_code', 'N/A')}, Message={getattr(e, 'message', str(e))}")
-            # Use getattr for safety, default to 503 if status_code isn't present
-            status_code = getattr(e, 'status_code', 503) or 503
-            message = getattr(e, 'message', str(e))
-            raise LLMServiceError(f"OpenAI API returned an error: {message}", status_code=status_code) from e
         except Exception as e:
-            logger.exception("An unexpected error occurred during OpenAI API call.")
-            # Use 503 as a general fallback for unexpected issues during the call
-            raise LLMServiceError(f"Unexpected error communicating with OpenAI: {str(e)}", status_code=503) from e
-
-    async def analyze(self, request: AnalyzeRequest) -> AnalyzeResponse:
-        """Analyzes a prompt using the OpenAI API."""
-        # --- Updated System Message ---
-        system_message = """
-You are an expert AI assistant specializing in prompt engineering. Your task is to analyze user-provided prompts for clarity, effectiveness, and potential issues when used with another AI model.
-
-Respond ONLY with a valid JSON object containing three keys:
-1.  `clarity_score`: An integer score from 0 to 100, representing how clear, specific, and actionable the prompt is (0=very unclear, 100=crystal clear).
-2.  `issues`: A list of strings identifying potential problems. Be specific. Examples:
-    *   "Ambiguous request": The goal isn't clear.
-    *   "Lacks context": Important background information is missing.
-    *   "Missing constraints": Doesn't specify output format, length, or style.
-    *   "Target audience unclear": Doesn't specify who the output is for.
-    *   "Potentially too complex/broad": The request might be too large for a single prompt.
-    *   "Leading or biased language": The prompt might unduly influence the AI's response.
-    *   "Conflicting instructions": Contains contradictory requirements.
-3.  `suggestions`: A list of short, actionable strings suggesting concrete improvements. Examples:
-    *   "Specify the desired output format (e.g., JSON, bullet points)."
-    *   "Define the target audience (e.g., 'explain to a 5th grader', 'write for experts')."
-    *   "Add context about [specific topic]."
-    *   "Break down the request into smaller steps."
-    *   "Provide examples of the desired output."
-    *   "Clarify the meaning of '[ambiguous term]'."
-    *   "Set a desired length or level of detail."
-
-Analyze the user's prompt based on these criteria. If the prompt is excellent, the score should be high, and issues/suggestions lists can be empty.
-
-Example Response for a weak prompt "Tell me about dogs":
-{
-  "clarity_score": 40,
-  "issues": ["Ambiguous request", "Lacks context", "Missing constraints", "Potentially too broad"],
-  "suggestions": ["Specify what you want to know about dogs (e.g., breeds, care, history).", "Define the desired output format or length."]
-}
-
-Example Response for a good prompt "Write a short python function that takes a list of integers and returns the sum.":
-{
-  "clarity_score": 95,
-  "issues": [],
-  "suggestions": []
-}
-"""
-        # --- End of Updated System Message ---
-
-        messages = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": f"Analyze the following prompt:\n\n{request.prompt}"}
-        ]
-
-        # Use lower temperature for more deterministic analysis
-        raw_response, model_used = await self._call_openai_chat(messages, temperature=0.2, max_tokens=300) # Increased max_tokens slightly
+            raise self._map_openai_error(e) from e
+
+    async def _stream_openai_chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        max_tokens: int = 250,
+        cache_ttl: Optional[float] = None,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """
+        Streams a Chat Completions response (`stream=True`), yielding text deltas as they arrive.
+        A cached response for the same request is replayed as a single delta, and a completed
+        stream is stored in the cache so the non-streaming methods can reuse it.
+        """
+        request_key = make_chat_cache_key(messages, model, temperature, max_tokens)
+        caching = self._cache_enabled and use_cache and cache_ttl is not None and cache_ttl > 0
+        if caching:
+            cached = self._cache.get(request_key)
+            if cached is not None:
+                logger.debug(f"LLM response cache hit for stream (key={request_key[:12]}...)")
+                yield cached[0]
+                return
+
+        parts: List[str] = []
+        model_used = model
+        try:
+            logger.debug(f"Streaming from OpenAI API. Model: {model}, Temp: {temperature}, Max Tokens: {max_tokens}")
+            stream = await self._create_completion(
+                messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+            async for chunk in stream:
+                model_used = chunk.model or model_used
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            raise self._map_openai_error(e) from e
+
+        content = "".join(parts).strip()
+        if not content:
+            raise LLMServiceError("Received empty response from OpenAI.", status_code=503)
+        if caching:
+            self._cache.set(request_key, (content, model_used), ttl_seconds=cache_ttl)
+
+    def _build_prompt(self, template_name: str, text: str, **fields: str) -> BuiltPrompt:
+        """
+        Renders a registered prompt template, with max_tokens sized to the expected output
+        and the input truncated if it would not fit the model context.
+        """
+        try:
+            built = TEMPLATES[template_name].build(
+                self._token_counter, text,
+                context_window=settings.LLM_CONTEXT_WINDOW_TOKENS,
+                max_input_tokens=settings.LLM_MAX_INPUT_TOKENS,
+                **fields,
+            )
+        except PromptTooLargeError as e:
+            raise LLMServiceError(str(e), status_code=413)
+        if built.truncated:
+            self._truncated_inputs += 1
+        return built
+
+    def _exact_cache_has(self, template: str, built: BuiltPrompt) -> bool:
+        """Whether the response cache holds a fresh result for exactly this prompt."""
+        if not self._cache_enabled:
+            return False
+        key = make_chat_cache_key(built.messages, DEFAULT_MODEL, TEMPLATES[template].temperature, built.max_tokens)
+        return key in self._cache
+
+    async def analyze(self, request: AnalyzeRequest, use_cache: bool = True) -> AnalyzeResponse:
+        """
+        Analyzes a prompt using the OpenAI API. A near-duplicate of a previously analyzed
+        prompt (cosine similarity above LLM_SEMANTIC_CACHE_THRESHOLD) reuses that analysis.
+        """
+        built = self._build_prompt("analyze", request.prompt)
+
+        similarity = None
+        semantic = self._semantic_cache is not None and use_cache
+        # Exact repeats are left to the response cache; this tier only serves (and learns) near-duplicates
+        exact_hit = semantic and self._exact_cache_has("analyze", built)
+        if semantic and not exact_hit:
+            # The similarity scan is CPU-bound; keep it off the event loop
+            cached, similarity = await asyncio.to_thread(self._semantic_cache.lookup, request.prompt)
+            if cached is not None:
+                logger.debug(f"Semantic cache hit for analyze (similarity={similarity:.3f})")
+                return cached.model_copy(update={"metadata": AnalyzeMetadata(semantic_cache_hit=True, similarity=similarity)})
+
+        raw_response, model_used = await self._call_openai_chat(
+            built.messages, temperature=TEMPLATES["analyze"].temperature, max_tokens=built.max_tokens,
+            cache_ttl=settings.LLM_CACHE_TTL_ANALYZE_SECONDS, use_cache=use_cache
+        )
 
         try:
             # --- Start of indented block ---
@@ -149,6 +429,11 @@ Example Response for a good prompt "Write a short python function that takes a l
             # Further validation could be done here if needed (e.g., type checks)
             analysis_response = AnalyzeResponse(**response_data)
             analysis_response.model_used = model_used
+            if self._semantic_cache is not None:
+                if semantic and not exact_hit:
+                    # Came from upstream (or a coalesced upstream call); the cache dedupes the latter
+                    self._semantic_cache.add(request.prompt, analysis_response.model_copy())
+                analysis_response.metadata = AnalyzeMetadata(semantic_cache_hit=False, similarity=similarity)
             return analysis_response
             # --- End of indented block ---
         except (json.JSONDecodeError, ValueError, TypeError, ValidationError) as e:
@@ -156,23 +441,11 @@ Example Response for a good prompt "Write a short python function that takes a l
             raise LLMServiceError(f"Failed to process response from LLM: Invalid format. Details: {e}", status_code=500)
 
 
-    async def remix(self, request: RemixRequest) -> RemixResponse:
-        """Remixes a prompt using the OpenAI API."""
-        styles_description = ", ".join(request.styles) if request.styles else "various creative styles (e.g., shorter, more detailed, simpler language)"
-        system_message = f"""
-You are an AI assistant that remixes prompts.
-Generate exactly 3 variations of the user's prompt based on the following styles/guidelines: {styles_description}.
-Respond ONLY with a JSON object containing a single key 'remixes', which is a list of 3 strings (the remixed prompts).
-Example Response: {{"remixes": ["Variation 1...", "Variation 2...", "Variation 3..."]}}
-"""
-        messages = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": f"Remix the following prompt:\n\n{request.prompt}"}
-        ]
-
-        # Use higher temperature for more creative variations
-        raw_response, _ = await self._call_openai_chat(messages, temperature=0.8, max_tokens=500) # Allow more tokens for 3 variations
+    def _build_remix_prompt(self, request: RemixRequest) -> BuiltPrompt:
+        styles_description = ", ".join(request.styles) if request.styles else DEFAULT_REMIX_STYLES
+        return self._build_prompt("remix", request.prompt, styles=styles_description)
 
+    def _parse_remix_response(self, raw_response: str) -> RemixResponse:
         try:
             response_data = json.loads(raw_response)
             if "remixes" not in response_data or not isinstance(response_data["remixes"], list):
@@ -187,24 +460,40 @@ Example Response: {{"remixes": ["Variation 1...", "Variation 2...", "Variation 3
             logger.error(f"Failed to parse or validate LLM response for remix: {e}\nRaw response: {raw_response}")
             raise LLMServiceError(f"Failed to process response from LLM: Invalid format. Details: {e}", status_code=500)
 
+    async def remix(self, request: RemixRequest, use_cache: bool = True) -> RemixResponse:
+        """Remixes a prompt using the OpenAI API."""
+        built = self._build_remix_prompt(request)
+
+        raw_response, _ = await self._call_openai_chat(
+            built.messages, temperature=TEMPLATES["remix"].temperature, max_tokens=built.max_tokens,
+            cache_ttl=settings.LLM_CACHE_TTL_REMIX_SECONDS, use_cache=use_cache
+        )
+        return self._parse_remix_response(raw_response)
 
-    async def create(self, request: CreateRequest) -> CreateResponse:
-        """Creates a prompt using the OpenAI API."""
+    async def remix_stream(self, request: RemixRequest, use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of `remix`. Yields {"event": ..., "data": ...} dicts:
+        a "variation" event as soon as each remix string is complete, then a final
+        "result" event carrying the validated RemixResponse.
+        """
+        built = self._build_remix_prompt(request)
+        parser = IncrementalJSONParser()
+        async for delta in self._stream_openai_chat(
+            built.messages, temperature=TEMPLATES["remix"].temperature, max_tokens=built.max_tokens,
+            cache_ttl=settings.LLM_CACHE_TTL_REMIX_SECONDS, use_cache=use_cache
+        ):
+            for event in parser.feed(delta):
+                if event.kind == "string_end" and len(event.path) == 2 and event.path[0] == "remixes":
+                    yield {"event": "variation", "data": {"index": event.path[1], "text": event.value}}
+
+        result = self._parse_remix_response(parser.text.strip())
+        yield {"event": "result", "data": result.model_dump()}
+
+    def _build_create_prompt(self, request: CreateRequest) -> BuiltPrompt:
         context_str = f"\nAdditional Context: {json.dumps(request.context)}" if request.context else ""
-        system_message = """
-You are an AI assistant that generates high-quality prompts based on a user's goal and context.
-Create a clear, specific, and actionable prompt suitable for another AI model.
-Respond ONLY with a JSON object containing a single key 'prompt', which is the generated prompt string.
-Example Response: {"prompt": "Generated prompt text..."}
-"""
-        messages = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": f"Generate a prompt for the following goal:\nGoal: {request.goal}{context_str}"}
-        ]
-
-        # Moderate temperature for reliable generation
-        raw_response, _ = await self._call_openai_chat(messages, temperature=0.6, max_tokens=300)
+        return self._build_prompt("create", f"Goal: {request.goal}{context_str}")
 
+    def _parse_create_response(self, raw_response: str) -> CreateResponse:
         try:
             response_data = json.loads(raw_response)
             if "prompt" not in response_data or not isinstance(response_data["prompt"], str):
@@ -214,6 +503,34 @@ Example Response: {"prompt": "Generated prompt text..."}
             logger.error(f"Failed to parse or validate LLM response for create: {e}\nRaw response: {raw_response}")
             raise LLMServiceError(f"Failed to process response from LLM: Invalid format. Details: {e}", status_code=500)
 
+    async def create(self, request: CreateRequest, use_cache: bool = True) -> CreateResponse:
+        """Creates a prompt using the OpenAI API."""
+        built = self._build_create_prompt(request)
+
+        raw_response, _ = await self._call_openai_chat(
+            built.messages, temperature=TEMPLATES["create"].temperature, max_tokens=built.max_tokens,
+            cache_ttl=settings.LLM_CACHE_TTL_CREATE_SECONDS, use_cache=use_cache
+        )
+        return self._parse_create_response(raw_response)
+
+    async def create_stream(self, request: CreateRequest, use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of `create`. Yields a "delta" event for each new piece of the
+        generated prompt text, then a final "result" event carrying the validated CreateResponse.
+        """
+        built = self._build_create_prompt(request)
+        parser = IncrementalJSONParser()
+        async for delta in self._stream_openai_chat(
+            built.messages, temperature=TEMPLATES["create"].temperature, max_tokens=built.max_tokens,
+            cache_ttl=settings.LLM_CACHE_TTL_CREATE_SECONDS, use_cache=use_cache
+        ):
+            for event in parser.feed(delta):
+                if event.kind == "string_delta" and event.path == ("prompt",):
+                    yield {"event": "delta", "data": {"text": event.value}}
+
+        result = self._parse_create_response(parser.text.strip())
+        yield {"event": "result", "data": result.model_dump()}
+
 
 # --- Singleton Pattern for LLM Service ---
 # ... existing get_llm_service and close_llm_service functions ...
@@ -239,7 +556,8 @@ async def get_llm_service() -> LLMService:
         try:
             _llm_service_instance = LLMService(
                 api_key=settings.LLM_API_KEY,
-                base_url=settings.LLM_API_BASE_URL
+                base_url=settings.LLM_API_BASE_URL,
+                backends=settings.LLM_BACKENDS
             )
         except LLMServiceError as e:
             # Log the initialization error and re-raise to prevent app startup if critical
@@ -254,3 +572,4 @@ async def close_llm_service():
         logger.info("Closing LLMService client...")
         await _llm_service_instance.close()
         _llm_service_instance = None
+    await close_http_client() # Release pooled upstream connections
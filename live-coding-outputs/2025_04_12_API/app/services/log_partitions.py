@@ -0,0 +1,324 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Column, Index, MetaData, Table, inspect, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.schema import CreateIndex, CreateTable, DropTable
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.session import add_missing_columns
+from app.models.log import ApiLog
+from app.services.log_rollups import prune_rollups, update_rollups
+from app.services.payload_store import load_payloads, prune_unreferenced_blobs, store_payloads
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "api_log_"
+_FORMATS = {"day": "%Y%m%d", "hour": "%Y%m%d%H"}
+_PARTITION_RE = re.compile(rf"^{PARTITION_PREFIX}(\d{{8}}|\d{{10}})$")
+# Same indexes as ApiLog, but named per partition (SQLite index names are database-wide)
+_INDEXED_COLUMNS = ("timestamp", "endpoint", "status_code")
+
+
+def _granularity() -> str:
+    granularity = settings.LOG_PARTITION_GRANULARITY
+    if granularity not in _FORMATS:
+        raise ValueError(f"LOG_PARTITION_GRANULARITY must be one of {', '.join(_FORMATS)}, got '{granularity}'.")
+    return granularity
+
+
+def _period(granularity: str) -> timedelta:
+    return timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+
+
+def partition_start(ts: datetime, granularity: str) -> datetime:
+    """Start of the partition period containing `ts` (UTC, naive like ApiLog.timestamp)."""
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def partition_name(ts: datetime, granularity: str) -> str:
+    """e.g. api_log_20250412 (daily) or api_log_2025041213 (hourly)."""
+    return PARTITION_PREFIX + ts.strftime(_FORMATS[granularity])
+
+
+def parse_partition_name(name: str) -> Optional[datetime]:
+    """Returns the start of the period a partition table covers, or None if `name` is not a partition."""
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    digits = match.group(1)
+    return datetime.strptime(digits, _FORMATS["hour"] if len(digits) == 10 else _FORMATS["day"])
+
+
+def partitions_for_range(since: datetime, until: datetime, granularity: str) -> List[str]:
+    """Names of the partitions whose periods overlap [since, until], newest first."""
+    names = []
+    current = partition_start(until, granularity)
+    while current >= partition_start(since, granularity):
+        names.append(partition_name(current, granularity))
+        current -= _period(granularity)
+    return names
+
+
+class LogPartitions:
+    """
+    Manages per-period copies of the ApiLog table (`api_log_YYYYMMDD` or `api_log_YYYYMMDDHH`).
+
+    Rows are inserted into the partition for their timestamp, which is created on first use
+    (rollover is implicit). Each partition carries its own small indexes, so insert cost
+    no longer grows with total log volume, and expiring old logs is a DROP TABLE.
+    """
+
+    def __init__(self):
+        self._metadata = MetaData()
+        self._known: set = set() # Partitions known to exist in the database
+        self._lock = asyncio.Lock()
+
+    def forget(self) -> None:
+        """Clears the record of which partitions exist, so the next write re-creates them if needed."""
+        self._known.clear()
+
+    def table(self, name: str) -> Table:
+        if name in self._metadata.tables:
+            return self._metadata.tables[name]
+        columns = [Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in ApiLog.__table__.columns]
+        table = Table(name, self._metadata, *columns)
+        for column in _INDEXED_COLUMNS:
+            Index(f"ix_{name}_{column}", table.c[column])
+        return table
+
+    async def ensure(self, conn: AsyncConnection, name: str) -> Table:
+        """Creates the partition table and its indexes if they do not exist yet."""
+        table = self.table(name)
+        if name in self._known:
+            return table
+        async with self._lock:
+            if name not in self._known:
+                await conn.execute(CreateTable(table, if_not_exists=True))
+                # Partitions created before a column was added to ApiLog get it here
+                await conn.run_sync(add_missing_columns, table)
+                for index in table.indexes:
+                    await conn.execute(CreateIndex(index, if_not_exists=True))
+                self._known.add(name)
+                logger.info(f"Log partition '{name}' ready.")
+        return table
+
+    async def write(self, session: AsyncSession, entries: Sequence[ApiLog]) -> None:
+        """Inserts rows into their partitions with one multi-row INSERT per partition (caller commits)."""
+        granularity = _granularity()
+        by_partition: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            by_partition.setdefault(partition_name(entry.timestamp, granularity), []).append(entry.model_dump(exclude={"id"}))
+        conn = await session.connection()
+        for name, rows in by_partition.items():
+            table = await self.ensure(conn, name)
+            await conn.execute(insert(table), rows)
+
+    async def list(self, conn: AsyncConnection) -> List[str]:
+        """Existing partition tables, oldest first."""
+        names = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+        partitions = sorted((n for n in names if parse_partition_name(n) is not None), key=parse_partition_name)
+        self._known.update(partitions)
+        return partitions
+
+    async def fetch(
+        self,
+        session: AsyncSession,
+        since: datetime,
+        until: datetime,
+        endpoint: Optional[str] = None,
+        status_code: Optional[int] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Most recent rows in [since, until], newest first. Only partitions overlapping the
+        window are read, newest first, stopping as soon as `limit` rows are found.
+        """
+        conn = await session.connection()
+        existing = set(await self.list(conn))
+        rows: List[Dict[str, Any]] = []
+        for name in partitions_for_range(since, until, _granularity()):
+            if name not in existing:
+                continue
+            table = self.table(name)
+            query = select(table).where(table.c.timestamp >= since, table.c.timestamp <= until)
+            if endpoint is not None:
+                query = query.where(table.c.endpoint == endpoint)
+            if status_code is not None:
+                query = query.where(table.c.status_code == status_code)
+            query = query.order_by(table.c.timestamp.desc()).limit(limit - len(rows))
+            rows.extend(dict(row._mapping) for row in await conn.execute(query))
+            if len(rows) >= limit:
+                break
+        return rows
+
+    async def archive(self, conn: AsyncConnection, name: str, archive_dir: str, batch_size: int = 1000) -> int:
+        """
+        Copies a partition to `<archive_dir>/<name>.jsonl.gz`. Deduplicated payloads are written
+        back inline, so archives are self-contained. Meant for a connection outside any write
+        transaction: rows are read in short keyset batches (each SELECT completes before the next
+        batch is compressed), so SQLite writers are not held up for the whole pass.
+        Returns the number of rows archived.
+        """
+        table = self.table(name)
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"{name}.jsonl.gz")
+        tmp_path = path + ".tmp"
+        count = 0
+        last_id = 0
+        # gzip compression is CPU-bound; write each chunk of rows from a worker thread
+        archive = await asyncio.to_thread(gzip.open, tmp_path, "wt", encoding="utf-8")
+        try:
+            while True:
+                query = select(table).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+                rows = [dict(row._mapping) for row in await conn.execute(query)]
+                if not rows:
+                    break
+                await resolve_payloads(conn, rows)
+                lines = "".join(json.dumps(row, default=str) + "\n" for row in rows)
+                await asyncio.to_thread(archive.write, lines)
+                count += len(rows)
+                last_id = rows[-1]["id"]
+        finally:
+            await asyncio.to_thread(archive.close)
+        os.replace(tmp_path, path)
+        logger.info(f"Archived {count} row(s) from log partition '{name}' to {path}.")
+        return count
+
+    async def drop(self, conn: AsyncConnection, name: str) -> None:
+        """Drops a partition table (run in its own short transaction, after `archive`)."""
+        table = self.table(name)
+        await conn.execute(DropTable(table, if_exists=True))
+        self._known.discard(name)
+        self._metadata.remove(table)
+        logger.info(f"Dropped log partition '{name}'.")
+
+
+log_partitions = LogPartitions()
+
+
+async def resolve_payloads(conn, rows: List[Dict[str, Any]]) -> None:
+    """Fills request/response payloads of log rows (as dicts) from their payload hashes, in place."""
+    hashes = [row.get(f"{field}_hash") for row in rows for field in ("request_payload", "response_payload")]
+    contents = await load_payloads(conn, hashes)
+    for row in rows:
+        for field in ("request_payload", "response_payload"):
+            digest = row.get(f"{field}_hash")
+            if row.get(field) is None and digest:
+                row[field] = contents.get(digest)
+
+
+async def write_log_rows(session: AsyncSession, entries: Sequence[ApiLog]) -> List[str]:
+    """
+    Inserts ApiLog rows (into partitions when LOG_PARTITIONING_ENABLED) and folds them into
+    the per-minute rollups, in the same transaction. With LOG_PAYLOAD_DEDUP_ENABLED, payloads
+    are moved to payload_blob and the rows keep only their hashes. The caller commits, then
+    passes the returned payload hashes to `payload_store.remember_hashes`.
+    """
+    payload_hashes: List[str] = []
+    if settings.LOG_PAYLOAD_DEDUP_ENABLED:
+        payload_hashes = await store_payloads(session, entries)
+    if settings.LOG_ROLLUPS_ENABLED:
+        await update_rollups(session, entries)
+    if settings.LOG_PARTITIONING_ENABLED:
+        try:
+            await log_partitions.write(session, entries)
+        except Exception:
+            # The transaction (and any CREATE TABLE in it) is rolled back; re-check partitions next time
+            log_partitions.forget()
+            raise
+    else:
+        # Core multi-row INSERT: no identity-map bookkeeping or per-row refresh
+        await session.exec(insert(ApiLog), params=[entry.model_dump(exclude={"id"}) for entry in entries])
+    return payload_hashes
+
+
+async def run_partition_maintenance(engine: AsyncEngine, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Pre-creates the next period's partition and archives/drops partitions that ended
+    more than LOG_RETENTION_HOURS ago. The current partition is never dropped.
+
+    Each write is its own short transaction (the DDL, every DROP, the blob prune), and the
+    archives are read outside any write transaction, so request logging and other writers
+    are never locked out for the length of an archive pass.
+    """
+    granularity = _granularity()
+    now = now or datetime.utcnow()
+    try:
+        async with engine.begin() as conn:
+            await log_partitions.ensure(conn, partition_name(now + _period(granularity), granularity))
+    except Exception:
+        # ensure() marks the partition as known before the commit; re-check it next time
+        log_partitions.forget()
+        raise
+
+    cutoff = now - timedelta(hours=settings.LOG_RETENTION_HOURS)
+    current = partition_name(now, granularity)
+    archived: Dict[str, int] = {}
+    async with engine.connect() as conn:
+        partitions = await log_partitions.list(conn)
+    for name in partitions:
+        start = parse_partition_name(name)
+        period = timedelta(hours=1) if len(name) == len(PARTITION_PREFIX) + 10 else timedelta(days=1)
+        if name == current or start + period > cutoff:
+            continue
+        async with engine.connect() as conn:
+            archived[name] = await log_partitions.archive(conn, name, settings.LOG_ARCHIVE_DIR)
+        async with engine.begin() as conn:
+            await log_partitions.drop(conn, name)
+
+    pruned_blobs = 0
+    if archived:
+        # Blobs may be shared across partitions (and with the unpartitioned table), so check them all
+        async with engine.begin() as conn:
+            remaining = [log_partitions.table(name) for name in await log_partitions.list(conn)]
+            pruned_blobs = await prune_unreferenced_blobs(conn, remaining + [ApiLog.__table__])
+    return {"archived": archived, "pruned_blobs": pruned_blobs, "cutoff": cutoff.isoformat()}
+
+
+# --- Periodic maintenance, started and stopped from the app lifespan ---
+
+_maintenance_task: Optional[asyncio.Task] = None
+
+async def _maintenance_loop(engine) -> None:
+    while True:
+        try:
+            if settings.LOG_PARTITIONING_ENABLED:
+                result = await run_partition_maintenance(engine)
+                if result["archived"]:
+                    logger.info(f"Log partition maintenance archived {len(result['archived'])} partition(s).")
+            if settings.LOG_ROLLUPS_ENABLED:
+                async with engine.begin() as conn:
+                    pruned = await prune_rollups(conn, datetime.utcnow() - timedelta(days=settings.LOG_ROLLUP_RETENTION_DAYS))
+                if pruned:
+                    logger.info(f"Pruned {pruned} expired log rollup bucket(s).")
+        except Exception as e:
+            logger.error(f"Log partition maintenance failed: {e}", exc_info=True)
+        await asyncio.sleep(settings.LOG_PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+def start_partition_maintenance(engine) -> None:
+    global _maintenance_task
+    if (settings.LOG_PARTITIONING_ENABLED or settings.LOG_ROLLUPS_ENABLED) and _maintenance_task is None:
+        _granularity() # Fail fast on a bad setting
+        _maintenance_task = asyncio.create_task(_maintenance_loop(engine), name="log-partition-maintenance")
+    if settings.LOG_PARTITIONING_ENABLED:
+        logger.info(f"Log partitioning enabled (per {settings.LOG_PARTITION_GRANULARITY}, retention {settings.LOG_RETENTION_HOURS}h, archives in {settings.LOG_ARCHIVE_DIR}).")
+
+async def stop_partition_maintenance() -> None:
+    global _maintenance_task
+    if _maintenance_task is not None:
+        _maintenance_task.cancel()
+        try:
+            await _maintenance_task
+        except asyncio.CancelledError:
+            pass
+        _maintenance_task = None
@@ -0,0 +1,156 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, delete, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.log import ApiLog, ApiLogRollup
+from app.services.sketch import DDSketch
+
+logger = logging.getLogger(__name__)
+
+_rollups = ApiLogRollup.__table__
+
+
+def minute_bucket(ts: datetime) -> datetime:
+    return ts.replace(second=0, microsecond=0)
+
+
+async def update_rollups(session: AsyncSession, entries: Sequence[ApiLog]) -> None:
+    """
+    Folds a batch of log rows into their per-minute rollup buckets (caller commits, so the
+    rollups and the rows land in the same transaction).
+
+    Several writers can fold into the same bucket at once (other workers, or the background
+    writer and the synchronous fallback in LoggingService.write), so the counters are added
+    with one atomic upsert rather than read-modify-write. The upsert also takes the bucket's
+    write lock (a row lock on PostgreSQL, the database lock on SQLite) until commit, so the
+    latency sketch, which is JSON and cannot be merged in SQL, is read and merged only after
+    it: no other writer can change it in between.
+    """
+    counters: Dict[Tuple[datetime, str], Dict[str, Any]] = {}
+    sketches: Dict[Tuple[datetime, str], DDSketch] = {}
+    for entry in entries:
+        key = (minute_bucket(entry.timestamp), entry.endpoint)
+        row = counters.get(key)
+        if row is None:
+            row = counters[key] = {
+                "bucket_start": key[0], "endpoint": key[1], "request_count": 0,
+                "client_error_count": 0, "server_error_count": 0, "total_time_ms": 0.0,
+                "latency_sketch": "", # Filled in below, once the bucket is locked
+            }
+            sketches[key] = DDSketch(alpha=settings.LOG_ROLLUP_SKETCH_ALPHA)
+
+        row["request_count"] += 1
+        if 400 <= entry.status_code < 500:
+            row["client_error_count"] += 1
+        elif entry.status_code >= 500:
+            row["server_error_count"] += 1
+        if entry.processing_time_ms is not None:
+            row["total_time_ms"] += entry.processing_time_ms
+            sketches[key].add(entry.processing_time_ms)
+    if not counters:
+        return
+
+    # Sorted, so two writers lock the same buckets in the same order and cannot deadlock
+    keys = sorted(counters)
+    await _add_counters(session, [counters[key] for key in keys])
+
+    stored = await session.exec(
+        select(_rollups.c.bucket_start, _rollups.c.endpoint, _rollups.c.latency_sketch).where(
+            _rollups.c.bucket_start.in_({key[0] for key in keys}),
+            _rollups.c.endpoint.in_({key[1] for key in keys}),
+        )
+    )
+    existing = {(bucket, endpoint): sketch for bucket, endpoint, sketch in stored if (bucket, endpoint) in sketches}
+    merged = []
+    for key in keys:
+        sketch = sketches[key]
+        if existing.get(key): # Empty for a bucket this batch just created
+            sketch = DDSketch.from_json(existing[key])
+            sketch.merge(sketches[key])
+        merged.append({"b_bucket": key[0], "b_endpoint": key[1], "b_sketch": sketch.to_json()})
+    await session.execute(
+        update(_rollups)
+        .where(_rollups.c.bucket_start == bindparam("b_bucket"), _rollups.c.endpoint == bindparam("b_endpoint"))
+        .values(latency_sketch=bindparam("b_sketch")),
+        merged,
+    )
+
+
+async def _add_counters(session: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Adds each row's counters to its bucket, creating the bucket if needed."""
+    summed = ("request_count", "client_error_count", "server_error_count", "total_time_ms")
+    dialect = session.bind.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(_rollups)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_rollups.c.bucket_start, _rollups.c.endpoint],
+            set_={name: _rollups.c[name] + stmt.excluded[name] for name in summed},
+        )
+        await session.execute(stmt, rows)
+        return
+    # No portable upsert: add to existing buckets, insert the rest
+    for row in rows:
+        result = await session.execute(
+            update(_rollups)
+            .where(_rollups.c.bucket_start == row["bucket_start"], _rollups.c.endpoint == row["endpoint"])
+            .values({name: _rollups.c[name] + row[name] for name in summed})
+        )
+        if result.rowcount == 0:
+            await session.execute(insert(_rollups).values(row))
+
+
+def _summary(count: int, client_errors: int, server_errors: int, sketch: DDSketch) -> Dict[str, Any]:
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value, 3) if value is not None else None
+
+    return {
+        "requests": count,
+        "client_errors": client_errors,
+        "server_errors": server_errors,
+        "error_rate": (server_errors / count) if count else 0.0,
+        "avg_ms": ms(sketch.sum / sketch.count) if sketch.count else None,
+        "p50_ms": ms(sketch.quantile(0.50)),
+        "p95_ms": ms(sketch.quantile(0.95)),
+        "p99_ms": ms(sketch.quantile(0.99)),
+    }
+
+
+async def query_stats(session: AsyncSession, since: datetime, until: datetime, endpoint: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Request counts, error rates and latency percentiles per endpoint (and overall) for the
+    minute buckets in [since, until). Cost depends on the window length, not on log volume.
+    """
+    query = select(ApiLogRollup).where(ApiLogRollup.bucket_start >= minute_bucket(since), ApiLogRollup.bucket_start < until)
+    if endpoint is not None:
+        query = query.where(ApiLogRollup.endpoint == endpoint)
+    rollups = (await session.exec(query)).all()
+
+    per_endpoint: Dict[str, Dict[str, Any]] = {}
+    total = {"count": 0, "client": 0, "server": 0, "sketch": DDSketch(alpha=settings.LOG_ROLLUP_SKETCH_ALPHA)}
+    for rollup in rollups:
+        acc = per_endpoint.setdefault(rollup.endpoint, {"count": 0, "client": 0, "server": 0, "sketch": DDSketch(alpha=settings.LOG_ROLLUP_SKETCH_ALPHA)})
+        sketch = DDSketch.from_json(rollup.latency_sketch)
+        for target in (acc, total):
+            target["count"] += rollup.request_count
+            target["client"] += rollup.client_error_count
+            target["server"] += rollup.server_error_count
+            target["sketch"].merge(sketch)
+
+    return {
+        "endpoints": {name: _summary(a["count"], a["client"], a["server"], a["sketch"]) for name, a in sorted(per_endpoint.items())},
+        "total": _summary(total["count"], total["client"], total["server"], total["sketch"]),
+        "buckets_read": len(rollups),
+    }
+
+
+async def prune_rollups(conn: AsyncConnection, before: datetime) -> int:
+    """Deletes rollup buckets older than `before`. Returns the number of buckets removed."""
+    result = await conn.execute(delete(ApiLogRollup.__table__).where(ApiLogRollup.__table__.c.bucket_start < before))
+    return result.rowcount or 0
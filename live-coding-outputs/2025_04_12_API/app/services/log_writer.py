@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncContextManager, Callable, Deque, Dict, List, Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.session import get_standalone_session
+from app.models.log import ApiLog
+from app.services.log_partitions import write_log_rows
+from app.services.payload_store import remember_hashes
+
+logger = logging.getLogger(__name__)
+
+
+class ApiLogWriter:
+    """
+    Writes ApiLog rows off the request path.
+
+    `enqueue` appends to a bounded in-memory queue and never blocks or touches the
+    database. A background task drains the queue in batches, as soon as `batch_size`
+    rows are waiting or every `flush_interval_ms`, with one multi-row INSERT and one
+    commit per batch. When the queue is full the oldest row is dropped, so a slow or
+    unavailable database costs log rows rather than request latency or memory.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval_ms: float = 500.0,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = get_standalone_session,
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._session_factory = session_factory
+        self._queue: Deque[ApiLog] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        # Metrics
+        self.queued = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0 # Rows lost because their batch could not be written
+        self.batches = 0
+        self.last_flush_ms: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def enqueue(self, entry: ApiLog) -> None:
+        """Queues a row for writing, dropping the oldest queued row if the queue is full."""
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"ApiLog queue full ({self.max_queue}); dropped {self.dropped} row(s) so far.")
+        self._queue.append(entry)
+        self.queued += 1
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="api-log-writer")
+            logger.info(f"ApiLog writer started (batch_size={self.batch_size}, flush_interval={self.flush_interval * 1000:.0f}ms, max_queue={self.max_queue}).")
+
+    async def stop(self) -> None:
+        """Stops the background task and writes out everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue:
+            await self.flush()
+        logger.info(f"ApiLog writer stopped ({self.flushed} row(s) written, {self.dropped} dropped, {self.failed} failed).")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._queue:
+                await self.flush()
+                if len(self._queue) < self.batch_size:
+                    break # Leave a partial batch for the next interval
+
+    async def flush(self) -> int:
+        """Writes up to one batch of queued rows. Returns the number of rows written."""
+        async with self._flush_lock:
+            batch: List[ApiLog] = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            if not batch:
+                return 0
+            start = time.perf_counter()
+            try:
+                async with self._session_factory() as session:
+                    payload_hashes = await write_log_rows(session, batch)
+                    await session.commit()
+                remember_hashes(payload_hashes)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"Failed to write batch of {len(batch)} ApiLog row(s): {e}", exc_info=True)
+                return 0
+            self.flushed += len(batch)
+            self.batches += 1
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            logger.debug(f"Wrote {len(batch)} ApiLog row(s) in {self.last_flush_ms:.1f}ms")
+            return len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queue_depth": len(self._queue),
+            "max_queue": self.max_queue,
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+# --- Singleton, started and stopped from the app lifespan ---
+
+_log_writer_instance: Optional[ApiLogWriter] = None
+
+def get_log_writer() -> Optional[ApiLogWriter]:
+    """Returns the running ApiLog writer, or None if it is disabled or not started."""
+    return _log_writer_instance
+
+async def start_log_writer() -> Optional[ApiLogWriter]:
+    global _log_writer_instance
+    if not settings.LOG_WRITER_ENABLED:
+        logger.info("ApiLog writer disabled; requests will be logged synchronously.")
+        return None
+    if _log_writer_instance is None:
+        _log_writer_instance = ApiLogWriter(
+            max_queue=settings.LOG_WRITER_MAX_QUEUE,
+            batch_size=settings.LOG_WRITER_BATCH_SIZE,
+            flush_interval_ms=settings.LOG_WRITER_FLUSH_INTERVAL_MS,
+        )
+        _log_writer_instance.start()
+    return _log_writer_instance
+
+async def stop_log_writer():
+    """Flushes queued rows and stops the writer during application shutdown."""
+    global _log_writer_instance
+    if _log_writer_instance:
+        await _log_writer_instance.stop()
+        _log_writer_instance = None
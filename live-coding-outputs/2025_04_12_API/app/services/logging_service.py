@@ -3,10 +3,13 @@ import json
 from datetime import datetime
 from typing import Optional, Any, Dict, Union
 from pydantic import BaseModel
-from fastapi import Request, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.db.session import get_standalone_session
 from app.models.log import ApiLog
+from app.services.log_writer import get_log_writer
+from app.services.log_partitions import write_log_rows
+from app.services.payload_store import apply_payload_sampling, remember_hashes
 
 logger = logging.getLogger(__name__)
 
@@ -31,90 +34,36 @@ def _serialize_payload(payload: Optional[Any]) -> Optional[str]:
 class LoggingService:
     """Service for logging API requests and responses."""
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: Optional[AsyncSession] = None):
+        # Only used when the background ApiLog writer is not running
         self.session = session
 
-    async def log_request(
-        self,
-        request: Request,
-        response: Optional[Response] = None,
-        status_code: Optional[int] = None,
-        processing_time_ms: Optional[float] = None,
-        error_detail: Optional[str] = None,
-    ) -> ApiLog:
+    async def write(self, log_entry: ApiLog) -> Optional[ApiLog]:
         """
-        Logs details of an API request and its response to the database.
-        
-        Args:
-            request: The FastAPI request object.
-            response: The FastAPI response object (optional).
-            status_code: Override response status code (useful for errors).
-            processing_time_ms: Processing time in milliseconds.
-            error_detail: Optional error message for failed requests.
-            
-        Returns:
-            The created ApiLog entry.
+        Persists a complete ApiLog record: hands it to the background batch writer when
+        it is running, otherwise writes it directly (with this service's session, or a
+        standalone one if it has none). Never raises.
         """
         try:
-            # Extract endpoint from request
-            endpoint = f"{request.method} {request.url.path}"
-            
-            # Extract and serialize request body if available
-            request_body = None
-            if hasattr(request, "body"):
-                try:
-                    # Try to decode request body
-                    if await request.body():
-                        # Handle both JSON and form data
-                        if request.headers.get("content-type", "").startswith("application/json"):
-                            try:
-                                body_json = await request.json()
-                                request_body = json.dumps(body_json)
-                            except json.JSONDecodeError:
-                                body_text = (await request.body()).decode("utf-8")
-                                request_body = f"Non-JSON body: {body_text[:500]}..." if len(body_text) > 500 else body_text
-                        else:
-                            # For non-JSON requests, just store as string with content type
-                            body_text = (await request.body()).decode("utf-8")
-                            content_type = request.headers.get("content-type", "unknown")
-                            request_body = f"Content-Type: {content_type}, Body: {body_text[:500]}..." if len(body_text) > 500 else body_text
-                except Exception as e:
-                    logger.warning(f"Failed to extract request body: {e}")
-                    request_body = f"Error extracting request body: {str(e)}"
-            
-            # Extract response data or use error detail
-            response_data = None
-            if response:
-                # For responses, get status code from response or override
-                status_code = status_code or response.status_code
-                
-                # Attempt to get response body - this is complex with FastAPI
-                # In reality, we would need middleware to capture the response body before sending
-                # For now, just use error_detail or a placeholder
-                response_data = error_detail or "Response body not captured in prototype"
+            apply_payload_sampling(log_entry)
+            writer = get_log_writer()
+            if writer is not None and writer.running:
+                writer.enqueue(log_entry)
+                logger.debug(f"API request queued for logging: {log_entry.endpoint} - Status: {log_entry.status_code}")
+                return log_entry
+
+            # Fallback: save to database directly
+            if self.session is not None:
+                payload_hashes = await write_log_rows(self.session, [log_entry])
+                await self.session.commit()
             else:
-                # If no response object (e.g., during error handling), use the status code and error detail
-                status_code = status_code or 500  # Default to 500 if no status provided
-                response_data = error_detail or "No response data available"
-            
-            # Create ApiLog entry
-            log_entry = ApiLog(
-                endpoint=endpoint,
-                request_payload=request_body,
-                response_payload=response_data,
-                status_code=status_code,
-                processing_time_ms=processing_time_ms
-            )
-            
-            # Save to database
-            self.session.add(log_entry)
-            await self.session.commit()
-            await self.session.refresh(log_entry)
-            
-            logger.debug(f"API request logged: {endpoint} - Status: {status_code}")
+                async with get_standalone_session() as session:
+                    payload_hashes = await write_log_rows(session, [log_entry])
+            remember_hashes(payload_hashes)
+
+            logger.debug(f"API request logged: {log_entry.endpoint} - Status: {log_entry.status_code}")
             return log_entry
-            
+
         except Exception as e:
             logger.error(f"Failed to log API request: {e}", exc_info=True)
-            # Don't re-raise; logging shouldn't break the API
             return None
@@ -0,0 +1,76 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Sequence
+
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+_CURSOR_VERSION = 1
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class SortKey(NamedTuple):
+    """One column of a keyset ordering; the last key must be unique (e.g. the primary key)."""
+    expression: ColumnElement
+    descending: bool = True
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Opaque cursor for the position after a row with these sort-key values. Clients must
+    treat it as a token: it is only meaningful for the same ordering (and filters).
+    """
+    payload = json.dumps([_CURSOR_VERSION, [_encode_value(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, key_count: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        version, values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+    if version != _CURSOR_VERSION or not isinstance(values, list) or len(values) != key_count:
+        raise InvalidCursorError("Cursor does not match this listing")
+    try:
+        return [_decode_value(v) for v in values]
+    except ValueError as e:
+        raise InvalidCursorError("Malformed cursor") from e
+
+
+def keyset_filter(keys: Sequence[SortKey], values: Sequence[Any]) -> ColumnElement:
+    """
+    WHERE clause selecting the rows that come after `values` in the ORDER BY given by `keys`.
+    Uniform directions compile to a row-value comparison, which both SQLite and PostgreSQL
+    can answer from a composite index; mixed directions expand to the equivalent OR chain.
+    """
+    if all(key.descending == keys[0].descending for key in keys):
+        row = tuple_(*(key.expression for key in keys))
+        bound = tuple_(*values)
+        return row < bound if keys[0].descending else row > bound
+    clauses = []
+    for i, key in enumerate(keys):
+        after = key.expression < values[i] if key.descending else key.expression > values[i]
+        clauses.append(and_(*(keys[j].expression == values[j] for j in range(i)), after))
+    return or_(*clauses)
+
+
+def order_by(keys: Sequence[SortKey]) -> List[ColumnElement]:
+    return [key.expression.desc() if key.descending else key.expression.asc() for key in keys]
@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import random
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import delete, insert, select, union
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.log import ApiLog, PayloadBlob
+from app.services.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Hashes known to be in payload_blob already, to skip the existence check for hot payloads
+_known_hashes = ResponseCache(max_entries=10000, default_ttl_seconds=3600.0)
+
+# Metrics
+sampling_stats = {"kept": 0, "kept_errors": 0, "kept_slow": 0, "dropped": 0}
+dedup_stats = {"payloads": 0, "new_blobs": 0, "new_blob_bytes": 0, "deduplicated_bytes": 0}
+
+
+def payload_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def apply_payload_sampling(entry: ApiLog) -> None:
+    """
+    Decides whether to keep this row's payloads. Errors (status >= 400) and slow requests
+    (>= LOG_PAYLOAD_SLOW_MS) always keep theirs; other rows keep them with probability
+    LOG_PAYLOAD_SAMPLE_RATE. The row itself (endpoint, status, timing) is always kept.
+    """
+    if entry.status_code >= 400:
+        sampling_stats["kept_errors"] += 1
+        return
+    if entry.processing_time_ms is not None and entry.processing_time_ms >= settings.LOG_PAYLOAD_SLOW_MS:
+        sampling_stats["kept_slow"] += 1
+        return
+    if random.random() < settings.LOG_PAYLOAD_SAMPLE_RATE:
+        sampling_stats["kept"] += 1
+        return
+    sampling_stats["dropped"] += 1
+    entry.request_payload = None
+    entry.response_payload = None
+
+
+def _insert_blobs(session: AsyncSession):
+    """INSERT that skips blobs another writer stored since the existence check (same content, same hash)."""
+    dialect = session.bind.dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(PayloadBlob).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql.insert(PayloadBlob).on_conflict_do_nothing()
+    return insert(PayloadBlob)
+
+
+async def store_payloads(session: AsyncSession, entries: Sequence[ApiLog]) -> List[str]:
+    """
+    Moves each row's payloads into payload_blob (once per distinct content) and replaces
+    them on the row with their hashes. Runs in the caller's transaction; the caller commits.
+    Returns the hashes it looked up or stored: pass them to `remember_hashes` only once the
+    transaction has committed, so a rolled-back batch never leaves hashes of unwritten blobs cached.
+    """
+    new_blobs: Dict[str, str] = {}
+    for entry in entries:
+        for field in ("request_payload", "response_payload"):
+            content = getattr(entry, field)
+            if content is None:
+                continue
+            digest = payload_hash(content)
+            setattr(entry, f"{field}_hash", digest)
+            setattr(entry, field, None)
+            dedup_stats["payloads"] += 1
+            if _known_hashes.get(digest) is None:
+                new_blobs[digest] = content
+            else:
+                dedup_stats["deduplicated_bytes"] += len(content.encode("utf-8"))
+
+    if not new_blobs:
+        return []
+    existing = set((await session.exec(select(PayloadBlob.hash).where(PayloadBlob.hash.in_(list(new_blobs))))).all())
+    rows = []
+    for digest, content in new_blobs.items():
+        size = len(content.encode("utf-8"))
+        if digest in existing:
+            dedup_stats["deduplicated_bytes"] += size
+        else:
+            rows.append({"hash": digest, "content": content, "size": size})
+            dedup_stats["new_blobs"] += 1
+            dedup_stats["new_blob_bytes"] += size
+    if rows:
+        await session.exec(_insert_blobs(session), params=rows)
+    return list(new_blobs)
+
+
+def remember_hashes(hashes: Iterable[str]) -> None:
+    """Marks blobs as stored (call after the transaction that wrote them commits)."""
+    for digest in hashes:
+        _known_hashes.set(digest, True)
+
+
+async def load_payloads(conn, hashes: Iterable[Optional[str]]) -> Dict[str, str]:
+    """Returns {hash: content} for the given hashes (missing or None hashes are skipped)."""
+    wanted: List[str] = sorted({h for h in hashes if h})
+    if not wanted:
+        return {}
+    blobs = PayloadBlob.__table__
+    result = await conn.execute(select(blobs.c.hash, blobs.c.content).where(blobs.c.hash.in_(wanted)))
+    return {row.hash: row.content for row in result}
+
+
+async def prune_unreferenced_blobs(conn: AsyncConnection, log_tables: Sequence) -> int:
+    """
+    Deletes blobs no longer referenced by any of `log_tables` (run after partitions are
+    archived and dropped). Returns the number of blobs removed.
+    """
+    blobs = PayloadBlob.__table__
+    # NOT IN with a NULL in the subquery matches nothing, so NULL hashes are filtered out
+    references = [
+        select(t.c[column]).where(t.c[column].is_not(None))
+        for t in log_tables for column in ("request_payload_hash", "response_payload_hash")
+    ]
+    query = delete(blobs)
+    if references:
+        query = query.where(blobs.c.hash.not_in(union(*references)))
+    result = await conn.execute(query)
+    _known_hashes.clear()
+    return result.rowcount or 0
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    return {"sampling": dict(sampling_stats), "dedup": dict(dedup_stats)}
@@ -0,0 +1,25 @@
+import json
+from datetime import datetime
+from typing import Any
+
+try:
+    import orjson # Optional: several times faster encoding of list and search pages
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encodes plain dicts/lists (as built by the projected prompt pages) straight to JSON bytes,
+    skipping Pydantic models. The output matches `model_dump_json()` of the equivalent response
+    model: compact separators, non-ASCII kept as is, naive datetimes in ISO 8601.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
@@ -1,18 +1,95 @@
 import logging
-from typing import List, Optional, Tuple, Sequence
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Tuple, Sequence
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 # from sqlalchemy.future import select # select is now part of sqlalchemy directly
 from sqlmodel import select # Use select from sqlmodel
-from sqlalchemy import or_, and_, func, delete
-from sqlalchemy.orm import selectinload, joinedload, aliased # Use selectinload for relationships, import aliased
-
-from app.models.prompt_mgmt import Prompt, Tag, PromptTag
-from app.schemas.prompt_mgmt import PromptCreate, PromptUpdate, PromptResponse, TagResponse
-from app.db.session import get_async_session # Correct import for session dependency
+from sqlalchemy import or_, and_, func, delete, insert, literal_column, null, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import selectinload, joinedload, aliased, make_transient_to_detached # Use selectinload for relationships, import aliased
+
+from app.core.config import settings
+from app.models.prompt_mgmt import Prompt, Tag, PromptTag, TagStat
+from app.schemas.prompt_mgmt import (
+    BulkImportError, BulkImportResponse, PromptCreate, PromptExportItem, PromptUpdate, PromptResponse, TagResponse
+)
+from app.db.session import get_async_session, get_standalone_session # Correct import for session dependency
+from app.services import pagination, prompt_response_cache, tag_cache
+from app.services.pagination import InvalidCursorError, SortKey
+from app.services.prompt_search import build_text_search, search_backend
+from app.services.response_cache import ResponseCache
+from app.services.tag_stats import apply_tag_deltas, tag_deltas
 from fastapi import Depends, HTTPException, status
 
 logger = logging.getLogger(__name__)
 
+# How totals are reported: counted on every page, counted at most once per TTL (per filter), or not at all
+COUNT_EXACT = "exact"
+COUNT_ESTIMATE = "estimate"
+COUNT_NONE = "none"
+
+# Newest first; id breaks ties between prompts created in the same instant
+_CHRONOLOGICAL = (SortKey(Prompt.created_at), SortKey(Prompt.id))
+
+# PromptResponse fields (minus tags) in schema order, selected as plain columns by projected pages
+_RESPONSE_COLUMNS = (
+    Prompt.title, Prompt.description, Prompt.full_prompt, Prompt.id, Prompt.created_at, Prompt.updated_at, Prompt.version,
+)
+_RESPONSE_FIELDS = tuple(column.key for column in _RESPONSE_COLUMNS)
+
+# Recent totals per filter, so following pages (and repeated searches) skip the count(*).
+# Cleared on every prompt write in this process; other workers see changes after the TTL.
+_count_cache = ResponseCache(max_entries=256, default_ttl_seconds=settings.PROMPT_COUNT_CACHE_TTL_SECONDS)
+
+class PromptPage(NamedTuple):
+    items: Sequence[Any] # Prompt instances, or PromptResponse-shaped dicts with projection=True
+    total: Optional[int] # None when not counted
+    total_is_estimate: bool
+    next_cursor: Optional[str] # None on the last page
+    snippets: Dict[int, str] = {} # prompt id -> highlighted fragment (full-text search only)
+    facets: Optional[List[Tuple[str, int]]] = None # (tag name, matching prompts), most used first
+
+async def _ndjson_lines(body: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Splits a streamed body into (line number, line) pairs without buffering more than one line.
+    Blank lines are skipped; a line longer than `max_line_bytes` is reported as None and discarded.
+    """
+    buffer = bytearray()
+    line_no = 1
+    oversized = False
+    async for chunk in body:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            piece = chunk[start:] if end == -1 else chunk[start:end]
+            if not oversized:
+                buffer += piece
+                oversized = len(buffer) > max_line_bytes
+            if end == -1:
+                break
+            if oversized:
+                yield line_no, None
+            elif buffer.strip():
+                yield line_no, bytes(buffer)
+            buffer.clear()
+            oversized = False
+            line_no += 1
+            start = end + 1
+    if oversized:
+        yield line_no, None
+    elif buffer.strip():
+        yield line_no, bytes(buffer)
+
+def _insert_ignoring_duplicates(session: AsyncSession, table):
+    """INSERT that skips rows hitting a unique constraint (so concurrent requests can create the same tag)."""
+    dialect = session.bind.dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    return insert(table)
+
 class PromptManagementServiceError(Exception):
     """Custom exception for service layer errors."""
     def __init__(self, detail: str, status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR):
@@ -23,30 +100,54 @@ class PromptManagementServiceError(Exception):
 class PromptManagementService:
     def __init__(self, session: AsyncSession):
         self.session = session
+        # Tags resolved from the database in the current transaction; cached only once it commits
+        self._uncommitted_tags: Dict[str, int] = {}
+
+    @property
+    def cache_scope(self) -> str:
+        """Identifies the database in process-wide caches (tests run several databases in one process)."""
+        return str(self.session.bind.url)
+
+    async def _resolve_tag_ids(self, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Maps tag names to ids, creating missing tags. Cached names cost no query; the rest take one
+        `INSERT ... ON CONFLICT DO NOTHING RETURNING`, plus one SELECT for names that already existed
+        (or were just created by a concurrent request) and so were not returned by the insert.
+        """
+        tag_ids, missing = tag_cache.lookup(self.cache_scope, names)
+        if not missing:
+            return tag_ids
+        stmt = _insert_ignoring_duplicates(self.session, Tag).values([{"name": name} for name in missing])
+        resolved = dict((await self.session.execute(stmt.returning(Tag.name, Tag.id))).tuples().all())
+        existing = [name for name in missing if name not in resolved]
+        if existing:
+            rows = await self.session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(existing)))
+            resolved.update(rows.tuples().all())
+        self._uncommitted_tags.update(resolved)
+        tag_ids.update(resolved)
+        return tag_ids
+
+    def _publish_tags(self) -> None:
+        """Call after a commit: tags resolved in the transaction are now safe to cache."""
+        tag_cache.remember(self.cache_scope, self._uncommitted_tags)
+        self._uncommitted_tags.clear()
+
+    def _discard_tags(self) -> None:
+        """Call after a rollback: tags created in the transaction no longer exist."""
+        self._uncommitted_tags.clear()
 
     async def _get_or_create_tags(self, tag_names: List[str]) -> List[Tag]:
         """Gets existing tags or creates new ones."""
         if not tag_names:
             return []
 
-        # Find existing tags
-        # Correct usage of in_ with model field
-        stmt = select(Tag).where(Tag.name.in_(tag_names)) 
-        result = await self.session.execute(stmt)
-        existing_tags = result.scalars().all()
-        existing_tag_names = {tag.name for tag in existing_tags}
-
-        # Identify tags to create
-        new_tag_names = [name for name in tag_names if name not in existing_tag_names]
-        new_tags = []
-        if new_tag_names:
-            new_tags = [Tag(name=name) for name in new_tag_names]
-            self.session.add_all(new_tags)
-            # We need to flush to get IDs if we were returning them immediately,
-            # but SQLAlchemy handles the association later.
-            # await self.session.flush() # Not strictly needed here for association
-
-        return list(existing_tags) + new_tags
+        tags = []
+        for name, tag_id in (await self._resolve_tag_ids(tag_names)).items():
+            # Attach the known row without loading it (merge returns the instance already in the session, if any)
+            tag = Tag(id=tag_id, name=name)
+            make_transient_to_detached(tag)
+            tags.append(await self.session.merge(tag, load=False))
+        return tags
 
     async def create_prompt(self, prompt_data: PromptCreate) -> Prompt:
         """Creates a new prompt with optional tags."""
@@ -60,12 +161,19 @@ class PromptManagementService:
                 tags=tags # Associate tags directly
             )
             self.session.add(db_prompt)
+            await apply_tag_deltas(self.session, tag_deltas(added=[tag.id for tag in tags]))
+            await prompt_response_cache.bump_generation(self.session)
             await self.session.commit()
+            self._publish_tags()
+            _count_cache.clear()
+            # The id may be a deleted prompt's, reused by SQLite: drop whatever was cached under it
+            prompt_response_cache.prompts_changed(self.cache_scope, prompt_ids=[db_prompt.id])
             await self.session.refresh(db_prompt, attribute_names=['tags']) # Refresh to load relationships
             logger.info(f"Prompt created with ID: {db_prompt.id}")
             return db_prompt
         except Exception as e:
             await self.session.rollback()
+            self._discard_tags()
             logger.exception(f"Error creating prompt: {e}")
             raise PromptManagementServiceError(f"Database error creating prompt: {str(e)}")
 
@@ -85,21 +193,121 @@ class PromptManagementService:
             logger.exception(f"Error retrieving prompt {prompt_id}: {e}")
             raise PromptManagementServiceError(f"Database error retrieving prompt: {str(e)}")
 
-    async def list_prompts(self, skip: int = 0, limit: int = 20) -> Tuple[Sequence[Prompt], int]:
-        """Lists prompts with pagination, including tags."""
+    async def get_prompt_revision(self, prompt_id: int) -> Optional[Tuple[datetime, int]]:
+        """
+        The prompt's (created_at, version), or None if it does not exist: a primary-key lookup, to
+        validate ETags and cached bodies. created_at tells apart prompts that reused a deleted id.
+        """
         try:
-            # Count total prompts
-            count_stmt = select(func.count()).select_from(Prompt)
-            total_result = await self.session.execute(count_stmt)
-            total = total_result.scalar_one()
-
-            # Fetch paginated prompts with tags
-            # Correct usage of desc with model field
-            stmt = select(Prompt).options(selectinload(Prompt.tags)).offset(skip).limit(limit).order_by(Prompt.created_at.desc()) 
-            result = await self.session.execute(stmt)
-            prompts = result.scalars().all()
-            logger.debug(f"Listed {len(prompts)} prompts (skip={skip}, limit={limit}, total={total})")
-            return prompts, total
+            row = (await self.session.execute(select(Prompt.created_at, Prompt.version).where(Prompt.id == prompt_id))).one_or_none()
+            return tuple(row) if row is not None else None
+        except Exception as e:
+            logger.exception(f"Error reading version of prompt {prompt_id}: {e}")
+            raise PromptManagementServiceError(f"Database error retrieving prompt: {str(e)}")
+
+    async def library_generation(self) -> int:
+        """The library generation, incremented by every prompt or tag write; versions list responses."""
+        try:
+            return await prompt_response_cache.current_generation(self.session)
+        except Exception as e:
+            logger.exception(f"Error reading library generation: {e}")
+            raise PromptManagementServiceError(f"Database error listing prompts: {str(e)}")
+
+    async def _count(self, stmt, count: str, cache_key: Any) -> Tuple[Optional[int], bool]:
+        """Total rows matched by `stmt` per the `count` mode. Returns (total, is_estimate)."""
+        if count == COUNT_NONE:
+            return None, False
+        cache_key = (str(self.session.bind.url), cache_key)
+        if count == COUNT_ESTIMATE:
+            cached = _count_cache.get(cache_key)
+            if cached is not None:
+                return cached, True
+        count_stmt = select(func.count()).select_from(stmt.subquery()) # Count from the filtered statement
+        total = (await self.session.execute(count_stmt)).scalar_one()
+        _count_cache.set(cache_key, total)
+        return total, False
+
+    async def _page(
+        self,
+        stmt,
+        keys: Sequence[SortKey],
+        skip: int,
+        limit: int,
+        cursor: Optional[str],
+        extra_columns: Sequence[Any] = (),
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Fetches one page of `stmt` in `keys` order. With a cursor the page starts right after the
+        row it encodes (a keyset seek, so every page costs the same); otherwise after `skip` rows.
+        Returns the rows (each `(*selected, *extra_columns)`) and the cursor for the next page.
+        """
+        if cursor:
+            try:
+                values = pagination.decode_cursor(cursor, len(keys))
+            except InvalidCursorError as e:
+                raise PromptManagementServiceError(f"Invalid cursor: {e}", status_code=status.HTTP_400_BAD_REQUEST)
+            stmt = stmt.where(pagination.keyset_filter(keys, values))
+        elif skip:
+            stmt = stmt.offset(skip)
+
+        # Sort-key values are selected so the cursor can be built from the last row;
+        # one extra row tells whether there is a next page without counting
+        width = len(stmt.column_descriptions) + len(extra_columns)
+        stmt = stmt.add_columns(*extra_columns, *(key.expression for key in keys))
+        rows = (await self.session.execute(stmt.order_by(*pagination.order_by(keys)).limit(limit + 1))).unique().all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = pagination.encode_cursor(list(rows[-1][width:]))
+        return [row[:width] for row in rows], next_cursor
+
+    @staticmethod
+    def _select_page(projection: bool):
+        """Full Prompt objects with their tags, or (with `projection`) just the response columns."""
+        if projection:
+            return select(*_RESPONSE_COLUMNS)
+        return select(Prompt).options(selectinload(Prompt.tags))
+
+    async def _project(self, rows: Sequence[Any]) -> List[Dict[str, Any]]:
+        """
+        Turns projected rows into PromptResponse-shaped dicts (ready for prompt_json.dumps), with
+        the tags of the whole page fetched in one query, instead of building ORM objects.
+        """
+        items = [dict(zip(_RESPONSE_FIELDS, row), tags=[]) for row in rows]
+        if items:
+            by_id = {item["id"]: item for item in items}
+            tag_rows = await self.session.execute(
+                select(PromptTag.prompt_id, Tag.name, Tag.id)
+                .join(Tag, Tag.id == PromptTag.tag_id)
+                .where(PromptTag.prompt_id.in_(list(by_id)))
+            )
+            for prompt_id, name, tag_id in tag_rows.tuples():
+                by_id[prompt_id]["tags"].append({"name": name, "id": tag_id})
+        return items
+
+    async def list_prompts(
+        self,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        count: str = COUNT_ESTIMATE,
+        projection: bool = False,
+    ) -> PromptPage:
+        """
+        Lists prompts newest first, including tags. Pass the previous page's `next_cursor` to
+        continue; `skip` (offset paging) is still accepted but gets slower the deeper it goes.
+        With `projection`, items are plain dicts shaped like PromptResponse (see `_project`).
+        """
+        try:
+            stmt = self._select_page(projection)
+            total, is_estimate = await self._count(select(Prompt.id), count, ("list",))
+            rows, next_cursor = await self._page(stmt, _CHRONOLOGICAL, skip, limit, cursor)
+            prompts = await self._project(rows) if projection else [row[0] for row in rows]
+            logger.debug(f"Listed {len(prompts)} prompts (skip={skip}, limit={limit}, cursor={bool(cursor)}, total={total})")
+            return PromptPage(prompts, total, is_estimate, next_cursor)
+        except PromptManagementServiceError:
+            raise
         except Exception as e:
             logger.exception(f"Error listing prompts: {e}")
             raise PromptManagementServiceError(f"Database error listing prompts: {str(e)}")
@@ -117,40 +325,55 @@ class PromptManagementService:
             # Handle tag updates separately
             if "tags" in update_data:
                 tag_names = update_data.pop("tags") # Remove tags from main update data
+                old_tag_ids = {tag.id for tag in db_prompt.tags}
                 if tag_names is None: # Explicitly setting tags to null/empty
                      db_prompt.tags = []
                 else:
                     db_prompt.tags = await self._get_or_create_tags(tag_names)
+                new_tag_ids = {tag.id for tag in db_prompt.tags}
+                await apply_tag_deltas(self.session, tag_deltas(added=new_tag_ids - old_tag_ids, removed=old_tag_ids - new_tag_ids))
 
             # Update other fields
             for key, value in update_data.items():
                  setattr(db_prompt, key, value)
 
+            # Incremented in SQL so concurrent updates never end up with the same version (and ETag)
+            db_prompt.version = Prompt.version + 1
+            db_prompt.updated_at = datetime.utcnow()
             self.session.add(db_prompt)
+            await prompt_response_cache.bump_generation(self.session)
             await self.session.commit()
-            await self.session.refresh(db_prompt, attribute_names=['tags']) # Refresh to load updated relationships
+            self._publish_tags()
+            _count_cache.clear()
+            prompt_response_cache.prompts_changed(self.cache_scope, prompt_ids=[prompt_id])
+            await self.session.refresh(db_prompt, attribute_names=['tags', 'version']) # Refresh to load updated relationships and version
             logger.info(f"Prompt updated with ID: {prompt_id}")
             return db_prompt
         except Exception as e:
             await self.session.rollback()
+            self._discard_tags()
             logger.exception(f"Error updating prompt {prompt_id}: {e}")
             raise PromptManagementServiceError(f"Database error updating prompt: {str(e)}")
 
     async def delete_prompt(self, prompt_id: int) -> bool:
         """Deletes a prompt by its ID."""
         try:
-            # Need to manually delete associations first if cascade isn't set up perfectly
-            # For simplicity here, we assume cascade delete works or handle potential FK violations
-            # A more robust way might involve deleting from PromptTag first.
-
+            # Delete the tag links first (SQLite does not enforce the foreign key) and count them off the tags
+            tag_ids = (await self.session.execute(select(PromptTag.tag_id).where(PromptTag.prompt_id == prompt_id))).scalars().all()
+            await self.session.execute(delete(PromptTag).where(PromptTag.prompt_id == prompt_id))
             stmt = delete(Prompt).where(Prompt.id == prompt_id)
             result = await self.session.execute(stmt)
+            await apply_tag_deltas(self.session, tag_deltas(removed=tag_ids))
+            if result.rowcount:
+                await prompt_response_cache.bump_generation(self.session)
             await self.session.commit()
+            _count_cache.clear()
 
             if result.rowcount == 0:
                  logger.warning(f"Attempted to delete non-existent prompt ID: {prompt_id}")
                  return False
             else:
+                 prompt_response_cache.prompts_changed(self.cache_scope, prompt_ids=[prompt_id])
                  logger.info(f"Prompt deleted with ID: {prompt_id}")
                  return True
         except Exception as e:
@@ -160,25 +383,176 @@ class PromptManagementService:
             raise PromptManagementServiceError(f"Database error deleting prompt: {str(e)}")
 
 
+    async def _import_chunk(self, chunk: List[Tuple[int, PromptCreate]], report: BulkImportResponse) -> None:
+        """Inserts one chunk of prompts and their tag links in a single transaction."""
+        try:
+            tag_ids = await self._resolve_tag_ids(name for _, item in chunk for name in item.tags or [])
+            now = datetime.utcnow()
+            prompt_rows = [
+                {"title": item.title, "description": item.description, "full_prompt": item.full_prompt, "created_at": now}
+                for _, item in chunk
+            ]
+            # executemany with RETURNING, ids in parameter order, to link tags without reloading
+            result = await self.session.execute(insert(Prompt).returning(Prompt.id, sort_by_parameter_order=True), prompt_rows)
+            prompt_ids = result.scalars().all()
+            links = [
+                {"prompt_id": prompt_id, "tag_id": tag_ids[name]}
+                for prompt_id, (_, item) in zip(prompt_ids, chunk)
+                for name in dict.fromkeys(item.tags or []) # A repeated tag would violate the link's primary key
+            ]
+            if links:
+                await self.session.execute(insert(PromptTag), links)
+                await apply_tag_deltas(self.session, tag_deltas(added=[link["tag_id"] for link in links]))
+            await prompt_response_cache.bump_generation(self.session)
+            await self.session.commit()
+            self._publish_tags()
+            report.created += len(chunk)
+        except Exception as e:
+            await self.session.rollback()
+            self._discard_tags()
+            logger.exception(f"Error importing prompts (lines {chunk[0][0]}-{chunk[-1][0]}): {e}")
+            for line_no, _ in chunk:
+                self._report_error(report, line_no, f"Database error: {str(e)}")
+
+    @staticmethod
+    def _report_error(report: BulkImportResponse, line_no: int, detail: str) -> None:
+        report.failed += 1
+        if len(report.errors) < settings.PROMPT_BULK_MAX_REPORTED_ERRORS:
+            report.errors.append(BulkImportError(line=line_no, detail=detail))
+
+    async def bulk_import(self, body: AsyncIterable[bytes]) -> BulkImportResponse:
+        """
+        Imports prompts from an NDJSON stream, one `PromptCreate` object per line. Lines are
+        validated as they arrive and written in chunks of PROMPT_BULK_CHUNK_SIZE, each chunk in one
+        transaction with batched inserts. Invalid lines (and chunks the database rejects) are
+        reported per line; everything else is imported.
+        """
+        report = BulkImportResponse()
+        chunk: List[Tuple[int, PromptCreate]] = []
+        async for line_no, line in _ndjson_lines(body, settings.PROMPT_BULK_MAX_LINE_BYTES):
+            if line is None:
+                self._report_error(report, line_no, f"Line longer than {settings.PROMPT_BULK_MAX_LINE_BYTES} bytes")
+                continue
+            try:
+                chunk.append((line_no, PromptCreate.model_validate_json(line)))
+            except ValidationError as e:
+                error = e.errors()[0]
+                location = ".".join(str(part) for part in error["loc"])
+                self._report_error(report, line_no, f"{location}: {error['msg']}" if location else error["msg"])
+                continue
+            if len(chunk) >= settings.PROMPT_BULK_CHUNK_SIZE:
+                await self._import_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            await self._import_chunk(chunk, report)
+        if report.created:
+            _count_cache.clear()
+            prompt_response_cache.prompts_changed(self.cache_scope, prompt_ids=())
+        logger.info(f"Bulk import finished: {report.created} prompts created, {report.failed} lines failed.")
+        return report
+
+    async def delete_tag(self, name: str) -> bool:
+        """Deletes a tag and unlinks it from every prompt."""
+        try:
+            tag_id = (await self.session.execute(select(Tag.id).where(Tag.name == name))).scalar_one_or_none()
+            if tag_id is None:
+                logger.warning(f"Attempted to delete non-existent tag: {name}")
+                return False
+            # The tag disappears from these prompts' representations, so they get new versions too
+            await self.session.execute(
+                update(Prompt)
+                .where(Prompt.id.in_(select(PromptTag.prompt_id).where(PromptTag.tag_id == tag_id)))
+                .values(version=Prompt.version + 1, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await self.session.execute(delete(PromptTag).where(PromptTag.tag_id == tag_id))
+            await self.session.execute(delete(TagStat).where(TagStat.tag_id == tag_id))
+            await self.session.execute(delete(Tag).where(Tag.id == tag_id))
+            await prompt_response_cache.bump_generation(self.session)
+            await self.session.commit()
+            tag_cache.forget(self.cache_scope, name)
+            _count_cache.clear()
+            prompt_response_cache.prompts_changed(self.cache_scope)
+            logger.info(f"Tag deleted: {name} (ID {tag_id})")
+            return True
+        except Exception as e:
+            await self.session.rollback()
+            logger.exception(f"Error deleting tag {name}: {e}")
+            raise PromptManagementServiceError(f"Database error deleting tag: {str(e)}")
+
+    async def list_tags(self, with_counts: bool = False) -> Sequence[Tuple[int, str, Optional[int]]]:
+        """All tags as (id, name, prompt count) rows, by name. Counts come from TagStat, not a GROUP BY."""
+        try:
+            if with_counts:
+                stmt = (
+                    select(Tag.id, Tag.name, func.coalesce(TagStat.prompt_count, 0))
+                    .outerjoin(TagStat, TagStat.tag_id == Tag.id)
+                )
+            else:
+                stmt = select(Tag.id, Tag.name, null())
+            return (await self.session.execute(stmt.order_by(Tag.name))).tuples().all()
+        except Exception as e:
+            logger.exception(f"Error listing tags: {e}")
+            raise PromptManagementServiceError(f"Database error listing tags: {str(e)}")
+
+    async def _tag_facets(self, matching_ids=None) -> List[Tuple[str, int]]:
+        """
+        The PROMPT_FACET_LIMIT most used tags among the prompts selected by `matching_ids` (a
+        `select(Prompt.id)`), counted with one grouped query over that id set. Without a filter
+        the maintained TagStat counts are read directly.
+        """
+        if matching_ids is None:
+            stmt = (
+                select(Tag.name, TagStat.prompt_count.label("prompt_count"))
+                .join(TagStat, TagStat.tag_id == Tag.id)
+                .where(TagStat.prompt_count > 0)
+            )
+        else:
+            stmt = (
+                select(Tag.name, func.count(PromptTag.prompt_id).label("prompt_count"))
+                .join(PromptTag, PromptTag.tag_id == Tag.id)
+                .where(PromptTag.prompt_id.in_(matching_ids))
+                .group_by(Tag.id, Tag.name)
+            )
+        stmt = stmt.order_by(literal_column("prompt_count").desc(), Tag.name).limit(settings.PROMPT_FACET_LIMIT)
+        return (await self.session.execute(stmt)).tuples().all()
+
     async def search_prompts(
         self,
         query: Optional[str] = None,
         tags: Optional[List[str]] = None,
         skip: int = 0,
-        limit: int = 20
-    ) -> Tuple[Sequence[Prompt], int]:
-        """Searches for prompts by query text and/or tags."""
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        count: str = COUNT_ESTIMATE,
+        with_facets: bool = False,
+        projection: bool = False,
+    ) -> PromptPage:
+        """
+        Searches for prompts by query text and/or tags.
+        With `with_facets`, also returns how many matching prompts carry each tag.
+
+        Text queries use the full-text index when the database has one (see app.services.prompt_search):
+        every word must match as a prefix, results are ordered by relevance and come with a
+        highlighted snippet. Paging works as in `list_prompts`; cursors encode the relevance score
+        too, so they are only valid for the same query and tags.
+        With `projection`, items are PromptResponse-shaped dicts as in `list_prompts`.
+        """
         try:
-            stmt = select(Prompt).options(selectinload(Prompt.tags))
+            stmt = self._select_page(projection)
+            matching_ids = select(Prompt.id) # Same filters, ids only (for facets)
             filters = []
+            keys: Sequence[SortKey] = _CHRONOLOGICAL
+            text_search = None
             if query:
-                # Correct usage of ilike with model fields
-                query_filter = or_(
-                    Prompt.title.ilike(f"%{query}%"), 
-                    Prompt.description.ilike(f"%{query}%"), 
-                    Prompt.full_prompt.ilike(f"%{query}%") 
-                )
-                filters.append(query_filter)
+                text_search = build_text_search(search_backend(self.session.bind), query)
+                if text_search.join is not None:
+                    stmt = stmt.join(*text_search.join)
+                    matching_ids = matching_ids.join(*text_search.join)
+                filters.append(text_search.where)
+                if text_search.rank is not None:
+                    # Best match first, then newest
+                    keys = (SortKey(text_search.rank, text_search.rank_descending), *_CHRONOLOGICAL)
 
             if tags:
                 # Ensure prompt has ALL specified tags
@@ -189,7 +563,7 @@ class PromptManagementService:
                 if len(tag_ids) != len(tags):
                      # One of the requested tags doesn't exist, so no prompt can match all tags
                      logger.debug(f"Search query included non-existent tags: {tags}. Returning empty.")
-                     return [], 0
+                     return PromptPage([], 0 if count != COUNT_NONE else None, False, None, facets=[] if with_facets else None)
 
                 # Subquery to find prompts linked to ALL required tags
                 prompt_alias = aliased(PromptTag)
@@ -205,26 +579,60 @@ class PromptManagementService:
 
             if filters:
                 stmt = stmt.where(and_(*filters))
+                matching_ids = matching_ids.where(and_(*filters))
 
-            # Get total count matching filters
-            count_stmt = select(func.count()).select_from(stmt.subquery()) # Count from the filtered statement
-            total_result = await self.session.execute(count_stmt)
-            total = total_result.scalar_one()
-
-            # Apply ordering, pagination and execute final query
-            # Correct usage of desc with model field
-            final_stmt = stmt.order_by(Prompt.created_at.desc()).offset(skip).limit(limit) 
-            result = await self.session.execute(final_stmt)
-            prompts = result.scalars().unique().all() # Use unique() because of joins/loads
-
-            logger.debug(f"Searched prompts (query='{query}', tags={tags}, skip={skip}, limit={limit}). Found {len(prompts)} of {total} total.")
-            return prompts, total
+            # Total matching filters (counted or taken from the recent-count cache, per `count`)
+            count_key = ("search", query, tuple(sorted(tags or ())))
+            total, is_estimate = await self._count(stmt, count, count_key)
 
+            snippet_columns = [text_search.snippet] if text_search is not None and text_search.snippet is not None else []
+            rows, next_cursor = await self._page(stmt, keys, skip, limit, cursor, snippet_columns)
+            if projection:
+                prompts = await self._project([row[:len(_RESPONSE_COLUMNS)] for row in rows])
+                snippets = {item["id"]: row[-1] for item, row in zip(prompts, rows) if snippet_columns and row[-1]}
+            else:
+                prompts = [row[0] for row in rows]
+                snippets = {row[0].id: row[1] for row in rows if snippet_columns and row[1]}
+            facets = None
+            if with_facets:
+                facets = await self._tag_facets(matching_ids if filters else None)
+
+            backend = text_search.backend if text_search is not None else None
+            logger.debug(f"Searched prompts (query='{query}', tags={tags}, skip={skip}, limit={limit}, cursor={bool(cursor)}, backend={backend}). Found {len(prompts)} of {total} total.")
+            return PromptPage(prompts, total, is_estimate, next_cursor, snippets, facets)
+
+        except PromptManagementServiceError:
+            raise
         except Exception as e:
             logger.exception(f"Error searching prompts: {e}")
             raise PromptManagementServiceError(f"Database error searching prompts: {str(e)}")
 
 
+async def stream_prompt_export(batch_size: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    Yields every prompt (with its tag names) as NDJSON lines, oldest first. Rows are read through
+    a server-side cursor `batch_size` at a time, with one tag query per batch, so memory stays flat
+    however large the library is. Uses its own session: the request's session is closed before a
+    streaming response body runs.
+    """
+    batch_size = batch_size or settings.PROMPT_EXPORT_BATCH_SIZE
+    columns = (Prompt.id, Prompt.title, Prompt.description, Prompt.full_prompt, Prompt.created_at)
+    async with get_standalone_session() as session:
+        result = await session.stream(select(*columns).order_by(Prompt.id).execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            ids = [row.id for row in rows]
+            tags: Dict[int, List[str]] = {prompt_id: [] for prompt_id in ids}
+            tag_rows = await session.execute(
+                select(PromptTag.prompt_id, Tag.name).join(Tag, Tag.id == PromptTag.tag_id).where(PromptTag.prompt_id.in_(ids))
+            )
+            for prompt_id, name in tag_rows.tuples():
+                tags[prompt_id].append(name)
+            yield "".join(
+                PromptExportItem(**row._mapping, tags=tags[row.id]).model_dump_json() + "\n"
+                for row in rows
+            )
+
+
 # Dependency function
 async def get_prompt_mgmt_service(
     session: AsyncSession = Depends(get_async_session)
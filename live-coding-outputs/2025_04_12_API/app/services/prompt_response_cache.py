@@ -0,0 +1,123 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.prompt_mgmt import LibraryState
+from app.services.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+_LIBRARY_STATE_ID = 1
+_EPOCH = datetime(1970, 1, 1)
+
+# Serialized JSON bodies of GET /prompts/{id} (keyed by database and prompt id, stored with the
+# created_at and version they were rendered at) and of list pages (keyed by database, library generation and
+# query). A hit is only served after the version/generation has been read from the database, so
+# a write by another worker is never hidden; writes in this process also evict entries directly.
+_prompt_bodies = ResponseCache(
+    max_entries=settings.PROMPT_RESPONSE_CACHE_MAX_ENTRIES, default_ttl_seconds=settings.PROMPT_RESPONSE_CACHE_TTL_SECONDS
+)
+_list_bodies = ResponseCache(
+    max_entries=settings.PROMPT_LIST_CACHE_MAX_ENTRIES, default_ttl_seconds=settings.PROMPT_RESPONSE_CACHE_TTL_SECONDS
+)
+
+
+def prompt_etag(prompt_id: int, created_at: datetime, version: int) -> str:
+    """
+    Strong ETag of one prompt's representation: it changes whenever the prompt's version does.
+    The creation time tells apart prompts that got the same id (SQLite reuses the highest id
+    once it is deleted), so a deleted prompt's ETag never matches its successor.
+    """
+    created = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return f'"p{prompt_id}-{created:x}-v{version}"'
+
+
+def list_etag(generation: int, query_key: str) -> str:
+    """Strong ETag of a list page: the library generation plus a digest of the query that produced it."""
+    digest = hashlib.sha256(query_key.encode("utf-8")).hexdigest()[:16]
+    return f'"l{generation}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches `etag`. Uses the weak comparison RFC 9110 prescribes
+    for If-None-Match (a `W/` prefix is ignored); `*` matches any existing representation.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def get_prompt_body(scope: str, prompt_id: int, created_at: datetime, version: int) -> Optional[bytes]:
+    cached = _prompt_bodies.get((scope, prompt_id))
+    if cached is None or cached[:2] != (created_at, version):
+        return None
+    return cached[2]
+
+
+def set_prompt_body(scope: str, prompt_id: int, created_at: datetime, version: int, body: bytes) -> None:
+    _prompt_bodies.set((scope, prompt_id), (created_at, version, body))
+
+
+def get_list_body(scope: str, generation: int, query_key: str) -> Optional[bytes]:
+    return _list_bodies.get((scope, generation, query_key))
+
+
+def set_list_body(scope: str, generation: int, query_key: str, body: bytes) -> None:
+    _list_bodies.set((scope, generation, query_key), body)
+
+
+def prompts_changed(scope: str, prompt_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Call after a committed write. Drops every cached list page (they belong to an older generation)
+    and the cached bodies of `prompt_ids`, or of all prompts when None.
+    """
+    _list_bodies.clear()
+    if prompt_ids is None:
+        _prompt_bodies.clear()
+        return
+    for prompt_id in prompt_ids:
+        _prompt_bodies.pop((scope, prompt_id))
+
+
+async def bump_generation(session: AsyncSession) -> None:
+    """
+    Increments the library generation in the session's transaction, so it commits (or rolls back)
+    with the write it announces. Creates the LibraryState row on first use.
+    """
+    dialect = session.bind.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(LibraryState)
+        stmt = stmt.values(id=_LIBRARY_STATE_ID, generation=1).on_conflict_do_update(
+            index_elements=[LibraryState.id],
+            set_={"generation": LibraryState.generation + 1},
+        )
+        await session.execute(stmt)
+        return
+    result = await session.execute(
+        update(LibraryState).where(LibraryState.id == _LIBRARY_STATE_ID).values(generation=LibraryState.generation + 1)
+    )
+    if result.rowcount == 0:
+        await session.execute(insert(LibraryState).values(id=_LIBRARY_STATE_ID, generation=1))
+
+
+async def current_generation(session: AsyncSession) -> int:
+    """The committed library generation (0 before the first write)."""
+    generation = (
+        await session.execute(select(LibraryState.generation).where(LibraryState.id == _LIBRARY_STATE_ID))
+    ).scalar_one_or_none()
+    return generation or 0
+
+
+def stats() -> Dict[str, Any]:
+    return {"prompts": _prompt_bodies.stats(), "lists": _list_bodies.stats()}
@@ -0,0 +1,186 @@
+import logging
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, or_, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.models.prompt_mgmt import Prompt
+
+logger = logging.getLogger(__name__)
+
+# Which search implementation each database uses, keyed by engine URL (set by ensure_search_index)
+BACKEND_FTS5 = "fts5"
+BACKEND_TSVECTOR = "tsvector"
+BACKEND_LIKE = "like"
+_backends: Dict[str, str] = {}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_MAX_TERMS = 16
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+
+# --- SQLite: FTS5 external-content table over prompt(title, description, full_prompt) ---
+# The index stores only tokens; the text stays in `prompt`. Triggers keep it in sync with every
+# write path (ORM, bulk inserts, raw SQL), so no service has to remember to update it.
+FTS_TABLE = "prompt_fts"
+# BM25 column weights: a hit in the title counts more than one buried in the prompt body
+_BM25_WEIGHTS = (10.0, 5.0, 1.0)
+_SQLITE_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, full_prompt,
+        content='prompt', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON prompt BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, full_prompt)
+        VALUES (new.id, new.title, new.description, new.full_prompt);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON prompt BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, full_prompt)
+        VALUES ('delete', old.id, old.title, old.description, old.full_prompt);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description, full_prompt ON prompt BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, full_prompt)
+        VALUES ('delete', old.id, old.title, old.description, old.full_prompt);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, full_prompt)
+        VALUES (new.id, new.title, new.description, new.full_prompt);
+    END""",
+)
+_fts = table(FTS_TABLE, column("rowid"))
+
+# --- PostgreSQL: expression GIN index over a weighted tsvector ---
+# Queries must use the exact same expression for the planner to pick the index.
+_PG_CONFIG = "english"
+_PG_DOCUMENT = (
+    f"setweight(to_tsvector('{_PG_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{_PG_CONFIG}', coalesce(description, '')), 'B') || "
+    f"setweight(to_tsvector('{_PG_CONFIG}', coalesce(full_prompt, '')), 'C')"
+)
+_PG_TEXT = "coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || coalesce(full_prompt, '')"
+_PG_INDEX = "ix_prompt_search_tsv"
+
+
+class TextSearch(NamedTuple):
+    """SQL pieces for a text query: the WHERE clause, a relevance score and a highlighted snippet."""
+    backend: str
+    where: ColumnElement
+    rank: Optional[ColumnElement] = None
+    rank_descending: bool = False # Which end of `rank` is the best match
+    snippet: Optional[ColumnElement] = None
+    join: Optional[Tuple[Any, ColumnElement]] = None
+
+
+def _terms(query: str) -> List[str]:
+    return _TOKEN_RE.findall(query)[:_MAX_TERMS]
+
+
+def fts5_match_query(query: str) -> Optional[str]:
+    """
+    Turns free text into an FTS5 query: every word must match, as a prefix ("pyth" finds
+    "python"). Words are quoted so user input can never be parsed as FTS5 syntax.
+    """
+    terms = _terms(query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def tsquery(query: str) -> Optional[str]:
+    """The PostgreSQL equivalent of fts5_match_query: `word:* & word:*`."""
+    terms = _terms(query)
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def _like_search(query: str) -> TextSearch:
+    pattern = f"%{query}%"
+    return TextSearch(
+        backend=BACKEND_LIKE,
+        where=or_(Prompt.title.ilike(pattern), Prompt.description.ilike(pattern), Prompt.full_prompt.ilike(pattern)),
+    )
+
+
+def build_text_search(backend: str, query: str) -> TextSearch:
+    """Search clauses for `query` on the given backend; ILIKE when the index is unavailable or the query has no words."""
+    if backend == BACKEND_FTS5:
+        match = fts5_match_query(query)
+        if match is not None:
+            return TextSearch(
+                backend=backend,
+                where=literal_column(FTS_TABLE).op("MATCH")(match),
+                # bm25() is lower-is-better
+                rank=func.bm25(literal_column(FTS_TABLE), *_BM25_WEIGHTS),
+                # Column -1: FTS5 picks the column with the best matching fragment
+                snippet=func.snippet(literal_column(FTS_TABLE), -1, SNIPPET_START, SNIPPET_END, "…", 12),
+                join=(_fts, _fts.c.rowid == Prompt.id),
+            )
+    elif backend == BACKEND_TSVECTOR:
+        terms = tsquery(query)
+        if terms is not None:
+            document = literal_column(_PG_DOCUMENT)
+            ts_query = func.to_tsquery(literal_column(f"'{_PG_CONFIG}'"), terms)
+            return TextSearch(
+                backend=backend,
+                where=document.op("@@")(ts_query),
+                rank=func.ts_rank(document, ts_query),
+                rank_descending=True,
+                snippet=func.ts_headline(
+                    literal_column(f"'{_PG_CONFIG}'"), literal_column(_PG_TEXT), ts_query,
+                    f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords=24, MinWords=8",
+                ),
+            )
+    return _like_search(query)
+
+
+def search_backend(bind: Any) -> str:
+    """The search backend set up for the database behind `bind` (an engine or connection)."""
+    url = getattr(bind, "url", None) or getattr(getattr(bind, "engine", None), "url", None)
+    return _backends.get(str(url), BACKEND_LIKE)
+
+
+def _sqlite_has_fts5(sync_conn: Connection) -> bool:
+    options = sync_conn.exec_driver_sql("PRAGMA compile_options").scalars().all()
+    return "ENABLE_FTS5" in options
+
+
+def _ensure_sync(sync_conn: Connection) -> str:
+    dialect = sync_conn.dialect.name
+    if dialect == "sqlite":
+        if not _sqlite_has_fts5(sync_conn):
+            logger.warning("SQLite was built without FTS5; prompt search will use ILIKE scans.")
+            return BACKEND_LIKE
+        exists = sync_conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).first() is not None
+        for statement in _SQLITE_DDL:
+            sync_conn.exec_driver_sql(statement)
+        if not exists:
+            # Index prompts written before the table (and its triggers) existed
+            sync_conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            logger.info(f"Created full-text index {FTS_TABLE} and indexed existing prompts.")
+        return BACKEND_FTS5
+    if dialect == "postgresql":
+        sync_conn.execute(text(f"CREATE INDEX IF NOT EXISTS {_PG_INDEX} ON prompt USING GIN (({_PG_DOCUMENT}))"))
+        return BACKEND_TSVECTOR
+    logger.warning(f"No full-text index for dialect {dialect}; prompt search will use ILIKE scans.")
+    return BACKEND_LIKE
+
+
+async def ensure_search_index(engine: AsyncEngine) -> str:
+    """
+    Creates the full-text index for prompt search if missing (run at startup, after the
+    tables exist) and records which backend searches on `engine` should use.
+    """
+    backend = BACKEND_LIKE
+    if settings.PROMPT_SEARCH_FTS_ENABLED:
+        async with engine.begin() as conn:
+            backend = await conn.run_sync(_ensure_sync)
+    _backends[str(engine.url)] = backend
+    logger.info(f"Prompt search backend: {backend}")
+    return backend
+
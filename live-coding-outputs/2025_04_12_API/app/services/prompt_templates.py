@@ -0,0 +1,235 @@
+import logging
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+try:
+    import tiktoken # Optional: exact token counts for OpenAI models
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Chat format overhead: each message is wrapped in a few special tokens, and the reply is primed with 3
+TOKENS_PER_MESSAGE = 4
+REPLY_PRIMING_TOKENS = 3
+# Heuristic fallback when tiktoken is unavailable. English averages ~4 chars per token;
+# 3 is deliberately pessimistic so truncation still leaves headroom for other scripts.
+HEURISTIC_CHARS_PER_TOKEN = 3
+TRUNCATION_MARKER = "\n[... input truncated ...]"
+
+
+class PromptTooLargeError(Exception):
+    """Raised when a request cannot be made to fit the model context, even after truncation."""
+    pass
+
+
+class TokenCounter:
+    """
+    Counts and truncates text in tokens for a given model, using tiktoken when it is
+    installed (and its encoding can be loaded) and a conservative character heuristic otherwise.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # e.g. the BPE file cannot be downloaded in an offline deployment
+                logger.warning(f"Could not load tiktoken encoding for '{model}', using heuristic token counts: {e}")
+
+    @property
+    def kind(self) -> str:
+        return "tiktoken" if self._encoding is not None else "heuristic"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / HEURISTIC_CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Returns the longest prefix of `text` that fits in `max_tokens` tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            # Decoding a token prefix can end mid-character; drop any partial trailing character
+            return self._encoding.decode(tokens[:max_tokens]).rstrip("�")
+        return text[:max_tokens * HEURISTIC_CHARS_PER_TOKEN]
+
+
+@dataclass
+class BuiltPrompt:
+    """Messages ready to send upstream, with the completion budget chosen for them."""
+    messages: List[Dict[str, str]]
+    max_tokens: int
+    input_tokens: int # Tokens in the whole request (all messages), after any truncation
+    truncated: bool
+
+
+class PromptTemplate:
+    """
+    A static system message plus a user-message template with a single truncatable `{text}`
+    field (placed last). The system message is built once, when the registry is created;
+    its token count is computed on first use and reused for every request.
+
+    The completion budget grows with the size of `text`:
+    `max_tokens = clamp(base_output_tokens + output_tokens_per_input_token * text_tokens, min, max)`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        system: str,
+        user_template: str,
+        temperature: float,
+        base_output_tokens: int,
+        output_tokens_per_input_token: float,
+        min_output_tokens: int,
+        max_output_tokens: int,
+    ):
+        self.name = name
+        self.system = system
+        self.user_template = user_template
+        self.temperature = temperature
+        self.base_output_tokens = base_output_tokens
+        self.output_tokens_per_input_token = output_tokens_per_input_token
+        self.min_output_tokens = min_output_tokens
+        self.max_output_tokens = max_output_tokens
+        self._system_tokens: Optional[int] = None
+
+    def system_tokens(self, counter: TokenCounter) -> int:
+        if self._system_tokens is None:
+            self._system_tokens = counter.count(self.system)
+        return self._system_tokens
+
+    def output_budget(self, text_tokens: int) -> int:
+        budget = self.base_output_tokens + self.output_tokens_per_input_token * text_tokens
+        return int(min(self.max_output_tokens, max(self.min_output_tokens, budget)))
+
+    def build(self, counter: TokenCounter, text: str, context_window: int, max_input_tokens: int, **fields: str) -> BuiltPrompt:
+        """
+        Renders the messages for `text` (and any other template `fields`), sets max_tokens from
+        the expected output size, and truncates `text` if the request would otherwise exceed
+        `max_input_tokens` or leave too little of `context_window` for the completion.
+        """
+        text_tokens = counter.count(text)
+        max_tokens = self.output_budget(text_tokens)
+        fixed_tokens = (
+            self.system_tokens(counter)
+            + counter.count(self.user_template.format(text="", **fields))
+            + 2 * TOKENS_PER_MESSAGE + REPLY_PRIMING_TOKENS
+        )
+
+        allowed = min(max_input_tokens, context_window - max_tokens) - fixed_tokens
+        truncated = text_tokens > allowed
+        if truncated:
+            if allowed <= counter.count(TRUNCATION_MARKER):
+                raise PromptTooLargeError(f"The fixed part of the {self.name} request leaves no room for the input.")
+            logger.warning(f"Truncating {self.name} input from {text_tokens} to ~{allowed} tokens to fit the model context.")
+            text = counter.truncate(text, allowed - counter.count(TRUNCATION_MARKER)) + TRUNCATION_MARKER
+            text_tokens = counter.count(text)
+
+        messages = [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.user_template.format(text=text, **fields)},
+        ]
+        return BuiltPrompt(messages=messages, max_tokens=max_tokens, input_tokens=fixed_tokens + text_tokens, truncated=truncated)
+
+
+# --- Template registry (static system messages are built once, at import) ---
+
+ANALYZE_SYSTEM_MESSAGE = """
+You are an expert AI assistant specializing in prompt engineering. Your task is to analyze user-provided prompts for clarity, effectiveness, and potential issues when used with another AI model.
+
+Respond ONLY with a valid JSON object containing three keys:
+1.  `clarity_score`: An integer score from 0 to 100, representing how clear, specific, and actionable the prompt is (0=very unclear, 100=crystal clear).
+2.  `issues`: A list of strings identifying potential problems. Be specific. Examples:
+    *   "Ambiguous request": The goal isn't clear.
+    *   "Lacks context": Important background information is missing.
+    *   "Missing constraints": Doesn't specify output format, length, or style.
+    *   "Target audience unclear": Doesn't specify who the output is for.
+    *   "Potentially too complex/broad": The request might be too large for a single prompt.
+    *   "Leading or biased language": The prompt might unduly influence the AI's response.
+    *   "Conflicting instructions": Contains contradictory requirements.
+3.  `suggestions`: A list of short, actionable strings suggesting concrete improvements. Examples:
+    *   "Specify the desired output format (e.g., JSON, bullet points)."
+    *   "Define the target audience (e.g., 'explain to a 5th grader', 'write for experts')."
+    *   "Add context about [specific topic]."
+    *   "Break down the request into smaller steps."
+    *   "Provide examples of the desired output."
+    *   "Clarify the meaning of '[ambiguous term]'."
+    *   "Set a desired length or level of detail."
+
+Analyze the user's prompt based on these criteria. If the prompt is excellent, the score should be high, and issues/suggestions lists can be empty.
+
+Example Response for a weak prompt "Tell me about dogs":
+{
+  "clarity_score": 40,
+  "issues": ["Ambiguous request", "Lacks context", "Missing constraints", "Potentially too broad"],
+  "suggestions": ["Specify what you want to know about dogs (e.g., breeds, care, history).", "Define the desired output format or length."]
+}
+
+Example Response for a good prompt "Write a short python function that takes a list of integers and returns the sum.":
+{
+  "clarity_score": 95,
+  "issues": [],
+  "suggestions": []
+}
+"""
+
+# The requested styles vary per call, so they go in the user message; that keeps the
+# system message identical across requests (and eligible for upstream prefix caching).
+REMIX_SYSTEM_MESSAGE = """
+You are an AI assistant that remixes prompts.
+Generate exactly 3 variations of the user's prompt based on the styles/guidelines given with it.
+Respond ONLY with a JSON object containing a single key 'remixes', which is a list of 3 strings (the remixed prompts).
+Example Response: {"remixes": ["Variation 1...", "Variation 2...", "Variation 3..."]}
+"""
+DEFAULT_REMIX_STYLES = "various creative styles (e.g., shorter, more detailed, simpler language)"
+
+CREATE_SYSTEM_MESSAGE = """
+You are an AI assistant that generates high-quality prompts based on a user's goal and context.
+Create a clear, specific, and actionable prompt suitable for another AI model.
+Respond ONLY with a JSON object containing a single key 'prompt', which is the generated prompt string.
+Example Response: {"prompt": "Generated prompt text..."}
+"""
+
+TEMPLATES: Dict[str, PromptTemplate] = {
+    # The analysis JSON is short and mostly independent of the prompt's length
+    "analyze": PromptTemplate(
+        name="analyze",
+        system=ANALYZE_SYSTEM_MESSAGE,
+        user_template="Analyze the following prompt:\n\n{text}",
+        temperature=0.2, # Lower temperature for more deterministic analysis
+        base_output_tokens=200, output_tokens_per_input_token=0.25,
+        min_output_tokens=200, max_output_tokens=400,
+    ),
+    # Three variations, each up to roughly twice the original prompt ("more detailed")
+    "remix": PromptTemplate(
+        name="remix",
+        system=REMIX_SYSTEM_MESSAGE,
+        user_template="Styles/guidelines: {styles}\n\nRemix the following prompt:\n\n{text}",
+        temperature=0.8, # Higher temperature for more creative variations
+        base_output_tokens=60, output_tokens_per_input_token=6.0,
+        min_output_tokens=150, max_output_tokens=1500,
+    ),
+    # One generated prompt, usually a paragraph that grows a little with the goal/context
+    "create": PromptTemplate(
+        name="create",
+        system=CREATE_SYSTEM_MESSAGE,
+        user_template="Generate a prompt for the following goal:\n{text}",
+        temperature=0.6, # Moderate temperature for reliable generation
+        base_output_tokens=150, output_tokens_per_input_token=1.5,
+        min_output_tokens=150, max_output_tokens=600,
+    ),
+}
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_request_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """
+    Rough token estimate for a chat request, as counted against a tokens-per-minute quota.
+    OpenAI counts the prompt plus the requested `max_tokens`; the prompt is approximated
+    at ~4 characters per token with a small per-message overhead.
+    """
+    prompt_tokens = sum(len(m.get("content") or "") // 4 + 4 for m in messages)
+    return prompt_tokens + max_tokens
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds at most `capacity` tokens and refills continuously
+    at `refill_per_second`. Not thread-safe; callers serialize access.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    def time_until_available(self, amount: float) -> float:
+        """Seconds until `amount` tokens can be taken (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)  # A single oversized request must not wait forever
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+class UpstreamRateLimiter:
+    """
+    Client-side limiter for an upstream requests-per-minute and tokens-per-minute quota.
+
+    Callers queue in `acquire` (FIFO, via an asyncio.Lock) until both buckets can cover
+    the request, instead of being sent upstream only to receive a 429. `pause` lets the
+    caller honour a server-provided retry-after for everyone in the queue.
+    A limit of 0 disables the corresponding bucket.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self._request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0) if requests_per_minute > 0 else None
+        self._token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute > 0 else None
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+
+        # Metrics
+        self.queue_depth = 0
+        self.acquired = 0
+        self.waited = 0  # Acquisitions that had to wait at all
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Holds back every queued call for at least `seconds` (e.g. from a retry-after header)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _time_until_ready(self, tokens: int) -> float:
+        wait = self._paused_until - time.monotonic()
+        if self._request_bucket is not None:
+            wait = max(wait, self._request_bucket.time_until_available(1))
+        if self._token_bucket is not None:
+            wait = max(wait, self._token_bucket.time_until_available(tokens))
+        return wait
+
+    async def acquire(self, tokens: int) -> float:
+        """Waits until the request fits within both quotas, then reserves it. Returns the wait in seconds."""
+        start = time.monotonic()
+        self.queue_depth += 1
+        try:
+            async with self._lock:
+                while True:
+                    wait = self._time_until_ready(tokens)
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+                if self._request_bucket is not None:
+                    self._request_bucket.consume(1)
+                if self._token_bucket is not None:
+                    self._token_bucket.consume(tokens)
+        finally:
+            self.queue_depth -= 1
+
+        waited = time.monotonic() - start
+        self.acquired += 1
+        if waited > 0.001:
+            self.waited += 1
+            logger.debug(f"Rate limiter delayed upstream call by {waited:.3f}s ({tokens} tokens)")
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns queue depth, wait-time metrics and remaining bucket capacity."""
+        return {
+            "queue_depth": self.queue_depth,
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "total_wait_seconds": round(self.total_wait_seconds, 6),
+            "avg_wait_seconds": (self.total_wait_seconds / self.acquired) if self.acquired else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 6),
+            "paused_for_seconds": max(0.0, self._paused_until - time.monotonic()),
+            "requests_available": self._request_bucket.available if self._request_bucket else None,
+            "tokens_available": self._token_bucket.available if self._token_bucket else None,
+        }
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def make_chat_cache_key(messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int) -> str:
+    """
+    Builds a stable cache key for a chat completion request.
+    The key is a SHA-256 hash of the final message list plus the sampling parameters,
+    so two requests only share an entry if the upstream call would be identical.
+    """
+    payload = json.dumps(
+        {"messages": messages, "model": model, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Bounded in-memory LRU cache with a per-entry TTL.
+
+    Entries are kept in an OrderedDict ordered from least to most recently used.
+    Expired entries are dropped lazily on lookup, and the least recently used entry
+    is evicted once `max_entries` is reached. The cache is meant to be used from a
+    single event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_entries: int = 1024, default_ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.default_ttl_seconds = default_ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for `key`, or None on a miss or expired entry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            # Expired: drop it and count as a miss
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether `key` holds an unexpired entry. Does not touch recency or hit/miss counters."""
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Stores `value` under `key`, evicting the least recently used entry if full."""
+        ttl = self.default_ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0 or self.max_entries <= 0:
+            return  # Caching disabled for this entry
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Removes `key` from the cache and returns its value if present."""
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self) -> int:
+        """Removes every entry. Returns the number of entries that were flushed."""
+        flushed = len(self._entries)
+        self._entries.clear()
+        logger.info(f"Response cache flushed ({flushed} entries removed).")
+        return flushed
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and current occupancy."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,211 @@
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def semantic_cache_available() -> bool:
+    """The semantic cache needs NumPy; without it the tier is skipped."""
+    return np is not None
+
+
+def prompt_features(text: str) -> List[str]:
+    """
+    Word unigrams and bigrams of the case- and whitespace-normalised prompt. Bigrams keep
+    prompts that share vocabulary but differ in a key phrase ("about cats" / "about dogs")
+    further apart than plain bag-of-words would.
+    """
+    words = _WORD_RE.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class HashingTfidfVectorizer:
+    """
+    Hashing-trick TF-IDF: features are hashed (crc32, stable across processes) into a
+    fixed number of dimensions, so no vocabulary has to be stored. Term frequencies are
+    sublinear (1 + log tf); IDF weights come from the document frequencies of the
+    vectors currently held by the cache and are applied at query time.
+    """
+
+    def __init__(self, dimensions: int = 4096):
+        self.dimensions = dimensions
+
+    def term_frequencies(self, text: str) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Sparse term frequencies: (dimension indices, weights) of the non-zero entries only."""
+        counts: Dict[int, int] = {}
+        for feature in prompt_features(text):
+            index = zlib.crc32(feature.encode("utf-8")) % self.dimensions
+            counts[index] = counts.get(index, 0) + 1
+        indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+        values = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        return indices, values.astype(np.float32)
+
+
+def _dedupe_key(text: str) -> str:
+    # Texts with the same words (case and whitespace aside) have the same vector
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+class SemanticCache:
+    """
+    Near-duplicate cache: stores (prompt vector, value) pairs and returns the value of the most
+    similar unexpired prompt when its cosine similarity is at least `threshold`. When full, the
+    least recently used entry is replaced; adding a prompt already cached (same words) refreshes
+    its entry instead of taking another slot.
+
+    Vectors are kept sparse (a prompt touches a few hundred of the hashed dimensions), so memory
+    follows the cached text rather than max_entries x dimensions. A lookup is a sparse
+    matrix-vector product over all entries; callers on an event loop should run it in a thread
+    (asyncio.to_thread), which is why every method takes the instance lock.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 2048, dimensions: int = 4096, ttl_seconds: float = 3600.0):
+        if np is None:
+            raise RuntimeError("SemanticCache requires numpy (pip install numpy).")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._vectorizer = HashingTfidfVectorizer(dimensions)
+        self._vectors: List[Optional[Tuple["np.ndarray", "np.ndarray"]]] = [None] * max_entries
+        self._doc_freq = np.zeros(dimensions, dtype=np.float32)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64) # 0 marks an empty slot
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._values: List[Any] = [None] * max_entries
+        self._slot_keys: List[Optional[str]] = [None] * max_entries
+        self._slots: Dict[str, int] = {} # dedupe key -> slot
+        # All live entries as flat (slot, index, value) arrays; rebuilt by the next lookup after a change
+        self._flat: Optional[Tuple["np.ndarray", "np.ndarray", "np.ndarray"]] = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self._hit_similarity_total = 0.0
+
+    def _idf_squared(self) -> "np.ndarray":
+        live = int(np.count_nonzero(self._expires_at))
+        idf = np.log((1.0 + live) / (1.0 + self._doc_freq)) + 1.0
+        return (idf * idf).astype(np.float32)
+
+    def _flat_entries(self) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        if self._flat is None:
+            slots = [slot for slot, vector in enumerate(self._vectors) if vector is not None]
+            if slots:
+                self._flat = (
+                    np.concatenate([np.full(self._vectors[slot][0].size, slot, dtype=np.int32) for slot in slots]),
+                    np.concatenate([self._vectors[slot][0] for slot in slots]),
+                    np.concatenate([self._vectors[slot][1] for slot in slots]),
+                )
+            else:
+                self._flat = (np.zeros(0, np.int32), np.zeros(0, np.int32), np.zeros(0, np.float32))
+        return self._flat
+
+    def lookup(self, text: str) -> Tuple[Optional[Any], Optional[float]]:
+        """
+        Returns (value, similarity) for the closest cached prompt. `value` is None when
+        nothing reaches the threshold; `similarity` is None when the cache is empty.
+        """
+        query_indices, query_values = self._vectorizer.term_frequencies(text)
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            live = self._expires_at > 0
+            if not live.any() or query_indices.size == 0:
+                self.misses += 1
+                return None, None
+
+            # cosine(A*idf, q*idf) = (A . q*idf^2) / (sqrt(A^2 . idf^2) * sqrt(q^2 . idf^2))
+            weights = self._idf_squared()
+            query = np.zeros(self._vectorizer.dimensions, dtype=np.float32)
+            query[query_indices] = query_values
+            rows, indices, values = self._flat_entries()
+            dots = np.bincount(rows, weights=values * (query * weights)[indices], minlength=self.max_entries)
+            row_norms = np.sqrt(np.bincount(rows, weights=values * values * weights[indices], minlength=self.max_entries))
+            query_norm = math.sqrt(float((query_values * query_values) @ weights[query_indices]))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                similarities = np.where(live, dots / (row_norms * query_norm), -1.0)
+
+            best = int(np.argmax(similarities))
+            similarity = float(min(1.0, similarities[best]))
+            if similarity >= self.threshold:
+                self.hits += 1
+                self._hit_similarity_total += similarity
+                self._last_used[best] = now
+                return self._values[best], similarity
+            self.misses += 1
+            return None, similarity
+
+    def add(self, text: str, value: Any) -> None:
+        """Stores `value` for `text`, replacing the entry for the same words or else the least recently used one."""
+        vector = self._vectorizer.term_frequencies(text)
+        if vector[0].size == 0:
+            return
+        key = _dedupe_key(text)
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            slot = self._slots.get(key)
+            if slot is None:
+                empty = np.flatnonzero(self._expires_at == 0)
+                slot = int(empty[0]) if empty.size else int(np.argmin(self._last_used))
+            self._release(slot)
+
+            self._vectors[slot] = vector
+            self._doc_freq[vector[0]] += 1.0
+            self._expires_at[slot] = now + self.ttl_seconds
+            self._last_used[slot] = now
+            self._values[slot] = value
+            self._slot_keys[slot] = key
+            self._slots[key] = slot
+            self._flat = None
+
+    def _release(self, slot: int) -> None:
+        if self._expires_at[slot] == 0:
+            return
+        self._doc_freq[self._vectors[slot][0]] -= 1.0
+        self._vectors[slot] = None
+        self._expires_at[slot] = 0.0
+        self._last_used[slot] = 0.0
+        self._values[slot] = None
+        self._slots.pop(self._slot_keys[slot], None)
+        self._slot_keys[slot] = None
+        self._flat = None
+
+    def _expire(self, now: float) -> None:
+        for slot in np.flatnonzero((self._expires_at > 0) & (self._expires_at <= now)):
+            self._release(int(slot))
+
+    def clear(self) -> int:
+        """Removes all entries. Returns the number of entries removed."""
+        with self._lock:
+            removed = len(self)
+            for slot in np.flatnonzero(self._expires_at > 0):
+                self._release(int(slot))
+            return removed
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._expires_at))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "avg_hit_similarity": (self._hit_similarity_total / self.hits) if self.hits else None,
+        }
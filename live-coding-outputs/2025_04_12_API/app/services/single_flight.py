@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls into a single in-flight task.
+
+    The first caller for a key starts the work as an asyncio Task; callers that arrive
+    while it is still running await the same task instead of starting their own.
+    Each waiter awaits the task through `asyncio.shield`, so cancelling one waiter
+    never cancels the shared call for the others. Exceptions raised by the task are
+    re-raised to every waiter.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.executions = 0  # Calls that actually ran the work
+        self.coalesced = 0   # Calls that joined an existing in-flight task
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Runs `fn()` once per key at a time and returns its result to every concurrent caller."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._on_done(k, t))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            logger.debug(f"Joined in-flight call for key {str(key)[:12]}...")
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved so that a call whose waiters were all
+        # cancelled does not log "Task exception was never retrieved".
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns counters for executed vs. coalesced calls."""
+        return {
+            "in_flight": len(self._inflight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,81 @@
+import json
+import math
+from typing import Dict, Optional
+
+
+class DDSketch:
+    """
+    DDSketch quantile sketch (Masson et al., 2019) for positive values such as latencies.
+
+    Values are counted in logarithmic buckets of width `gamma = (1 + alpha) / (1 - alpha)`,
+    so any quantile is returned within a relative error of `alpha`. Sketches with the same
+    `alpha` merge exactly by adding bucket counts, which is what makes per-minute sketches
+    combinable into arbitrary windows. When more than `max_buckets` buckets are in use, the
+    lowest ones are collapsed together (sacrificing accuracy only for the smallest values).
+    """
+
+    def __init__(self, alpha: float = 0.01, max_buckets: int = 2048):
+        self.alpha = alpha
+        self.max_buckets = max_buckets
+        self._gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0 # Values <= 0 (e.g. sub-resolution timings)
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, value: float, count: int = 1) -> None:
+        self.count += count
+        self.sum += value * count
+        if value <= 0:
+            self.zero_count += count
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self._collapse()
+
+    def merge(self, other: "DDSketch") -> None:
+        if not math.isclose(other.alpha, self.alpha):
+            raise ValueError(f"Cannot merge sketches with different accuracy ({self.alpha} vs {other.alpha}).")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self._collapse()
+
+    def _collapse(self) -> None:
+        if len(self.buckets) <= self.max_buckets:
+            return
+        ordered = sorted(self.buckets)
+        excess = ordered[: len(ordered) - self.max_buckets + 1]
+        target = excess[-1]
+        self.buckets[target] = sum(self.buckets.pop(index) for index in excess)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile `q` (0-1), or None if the sketch is empty."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Midpoint (in relative terms) of the bucket (gamma^(i-1), gamma^i]
+                return 2 * self._gamma ** index / (self._gamma + 1)
+        return 2 * self._gamma ** max(self.buckets) / (self._gamma + 1)
+
+    def to_json(self) -> str:
+        return json.dumps({"alpha": self.alpha, "zero": self.zero_count, "count": self.count, "sum": self.sum, "buckets": self.buckets})
+
+    @classmethod
+    def from_json(cls, data: str) -> "DDSketch":
+        raw = json.loads(data)
+        sketch = cls(alpha=raw["alpha"])
+        sketch.buckets = {int(index): count for index, count in raw["buckets"].items()}
+        sketch.zero_count = raw["zero"]
+        sketch.count = raw["count"]
+        sketch.sum = raw["sum"]
+        return sketch
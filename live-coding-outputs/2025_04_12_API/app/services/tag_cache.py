@@ -0,0 +1,54 @@
+import logging
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.models.prompt_mgmt import Tag
+from app.services.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Process-local (database, tag name) -> id map, keyed by engine URL like the other process-wide
+# caches (see PromptManagementService.cache_scope), so one database's ids are never served for
+# another. Tags are few and almost never deleted, so after warm-up resolving the tags of a prompt
+# usually costs no query at all. Only committed tags are added (see PromptManagementService), and
+# PromptManagementService.delete_tag evicts its entry; the TTL bounds how long a tag deleted by
+# another worker can linger here.
+_tag_ids = ResponseCache(max_entries=settings.TAG_CACHE_MAX_ENTRIES, default_ttl_seconds=settings.TAG_CACHE_TTL_SECONDS)
+
+
+def lookup(scope: str, names: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+    """Splits `names` (deduplicated, order kept) into cached ids and names that need the database."""
+    found: Dict[str, int] = {}
+    missing: List[str] = []
+    for name in dict.fromkeys(names):
+        tag_id = _tag_ids.get((scope, name))
+        if tag_id is None:
+            missing.append(name)
+        else:
+            found[name] = tag_id
+    return found, missing
+
+
+def remember(scope: str, tag_ids: Dict[str, int]) -> None:
+    for name, tag_id in tag_ids.items():
+        _tag_ids.set((scope, name), tag_id)
+
+
+def forget(scope: str, name: str) -> None:
+    _tag_ids.pop((scope, name))
+
+
+def stats() -> Dict[str, Any]:
+    return _tag_ids.stats()
+
+
+async def warm_tag_cache(engine: AsyncEngine) -> int:
+    """Loads existing tags into the cache at startup (up to TAG_CACHE_MAX_ENTRIES). Returns how many."""
+    async with engine.connect() as conn:
+        rows = (await conn.execute(select(Tag.name, Tag.id).limit(settings.TAG_CACHE_MAX_ENTRIES))).all()
+    remember(str(engine.url), dict(rows))
+    logger.info(f"Tag cache warmed with {len(rows)} tags.")
+    return len(rows)
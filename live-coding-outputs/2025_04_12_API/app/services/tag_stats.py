@@ -0,0 +1,67 @@
+import logging
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.prompt_mgmt import PromptTag, TagStat
+
+logger = logging.getLogger(__name__)
+
+
+def tag_deltas(added: Iterable[int] = (), removed: Iterable[int] = ()) -> Counter:
+    """Per-tag change in prompt count for links added and removed (a tag id may repeat across prompts)."""
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    return deltas
+
+
+async def apply_tag_deltas(session: AsyncSession, deltas: Counter) -> None:
+    """
+    Adds `deltas` to the TagStat counts in the session's transaction, as one batched upsert
+    (`prompt_count = prompt_count + excluded.prompt_count`), so counts commit or roll back
+    together with the links they describe.
+    """
+    rows = [{"tag_id": tag_id, "prompt_count": delta} for tag_id, delta in deltas.items() if delta]
+    if not rows:
+        return
+    dialect = session.bind.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(TagStat)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TagStat.tag_id],
+            set_={"prompt_count": TagStat.prompt_count + stmt.excluded.prompt_count},
+        )
+        await session.execute(stmt, rows)
+        return
+    # No portable upsert: update existing rows, insert the rest
+    existing = set((await session.execute(select(TagStat.tag_id).where(TagStat.tag_id.in_(deltas)))).scalars().all())
+    for row in rows:
+        if row["tag_id"] in existing:
+            await session.execute(
+                update(TagStat).where(TagStat.tag_id == row["tag_id"]).values(prompt_count=TagStat.prompt_count + row["prompt_count"])
+            )
+        else:
+            await session.execute(insert(TagStat).values(**row))
+
+
+async def ensure_tag_stats(engine: AsyncEngine) -> None:
+    """
+    Fills TagStat from PromptTag when it is empty but links exist, i.e. the first start after
+    the table was added to an existing database. Run at startup, after the tables exist.
+    """
+    async with engine.begin() as conn:
+        if await conn.scalar(select(TagStat.tag_id).limit(1)) is not None:
+            return
+        if await conn.scalar(select(PromptTag.tag_id).limit(1)) is None:
+            return
+        await conn.execute(
+            insert(TagStat).from_select(
+                ["tag_id", "prompt_count"],
+                select(PromptTag.tag_id, func.count()).group_by(PromptTag.tag_id),
+            )
+        )
+    logger.info("Tag counts rebuilt from existing prompt/tag links.")
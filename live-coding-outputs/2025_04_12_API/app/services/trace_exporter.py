@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+import random
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.tracing import Trace
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "promptsculptor-api"
+_SPAN_KIND_INTERNAL = 1
+_SPAN_KIND_SERVER = 2
+_STATUS_ERROR = 2
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def to_otlp(traces: List[Trace]) -> Dict[str, Any]:
+    """Encodes finished traces as an OTLP/JSON ExportTraceServiceRequest (hex ids, nanosecond strings)."""
+    spans = []
+    for trace in traces:
+        for span in trace.spans:
+            encoded = {
+                "traceId": trace.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": _SPAN_KIND_SERVER if span is trace.root else _SPAN_KIND_INTERNAL,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                "attributes": [_attribute(key, value) for key, value in span.attributes.items()],
+            }
+            if span.parent_id:
+                encoded["parentSpanId"] = span.parent_id
+            if span.error:
+                encoded["status"] = {"code": _STATUS_ERROR, "message": span.error}
+            spans.append(encoded)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class TraceExporter:
+    """
+    Exports finished request traces off the request path, to an OTLP/JSON lines file
+    and/or an OTLP/HTTP collector (`POST .../v1/traces` with a JSON body).
+
+    Like the ApiLog writer, `export` only appends to a bounded queue (dropping the oldest
+    trace when full) and a background task sends batches every `flush_interval_ms`.
+    """
+
+    def __init__(
+        self,
+        file_path: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        sample_rate: float = 1.0,
+        max_queue: int = 1000,
+        batch_size: int = 100,
+        flush_interval_ms: float = 1000.0,
+    ):
+        self.file_path = file_path
+        self.endpoint = endpoint
+        self.sample_rate = sample_rate
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue: Deque[Trace] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Metrics
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def export(self, trace: Trace) -> None:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(trace)
+
+    def start(self) -> None:
+        if not self.running:
+            if self.endpoint:
+                self._client = httpx.AsyncClient(timeout=5.0)
+            self._task = asyncio.create_task(self._run(), name="trace-exporter")
+            targets = ", ".join(t for t in (self.file_path, self.endpoint) if t)
+            logger.info(f"Trace exporter started (to {targets}, sample_rate={self.sample_rate}).")
+
+    async def stop(self) -> None:
+        """Stops the background task and exports everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue:
+            await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            while self._queue:
+                await self.flush()
+
+    def _append_to_file(self, line: str) -> None:
+        with open(self.file_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    async def flush(self) -> int:
+        """Exports up to one batch of queued traces. Returns the number of traces exported."""
+        batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        if not batch:
+            return 0
+        payload = to_otlp(batch)
+        try:
+            if self.file_path:
+                await asyncio.to_thread(self._append_to_file, json.dumps(payload, separators=(",", ":")) + "\n")
+            if self._client is not None:
+                response = await self._client.post(self.endpoint, json=payload)
+                response.raise_for_status()
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to export {len(batch)} trace(s): {e}")
+            return 0
+        self.exported += len(batch)
+        return len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"running": self.running, "queue_depth": len(self._queue), "exported": self.exported, "dropped": self.dropped, "failed": self.failed}
+
+
+# --- Singleton, started and stopped from the app lifespan ---
+
+_trace_exporter_instance: Optional[TraceExporter] = None
+
+def get_trace_exporter() -> Optional[TraceExporter]:
+    """Returns the running trace exporter, or None if no export target is configured."""
+    return _trace_exporter_instance
+
+async def start_trace_exporter() -> Optional[TraceExporter]:
+    global _trace_exporter_instance
+    if not settings.TRACING_ENABLED or not (settings.TRACE_EXPORT_FILE or settings.TRACE_EXPORT_OTLP_ENDPOINT):
+        return None
+    if _trace_exporter_instance is None:
+        _trace_exporter_instance = TraceExporter(
+            file_path=settings.TRACE_EXPORT_FILE,
+            endpoint=settings.TRACE_EXPORT_OTLP_ENDPOINT,
+            sample_rate=settings.TRACE_EXPORT_SAMPLE_RATE,
+            max_queue=settings.TRACE_EXPORT_MAX_QUEUE,
+        )
+        _trace_exporter_instance.start()
+    return _trace_exporter_instance
+
+async def stop_trace_exporter():
+    global _trace_exporter_instance
+    if _trace_exporter_instance:
+        await _trace_exporter_instance.stop()
+        _trace_exporter_instance = None
@@ -0,0 +1,155 @@
+"""
+Microbenchmark for GET /prompts/ page building: the ORM path (full Prompt objects with
+selectinload(Prompt.tags), PromptResponse.from_orm per item, PaginatedPromptResponse JSON)
+against the projected path (response columns only, one tag query per page, JSON bytes built
+directly by app.services.prompt_json).
+
+Seeds a throwaway SQLite database, then pages through it by cursor with both paths, each page
+in a fresh session, and reports the cost per item:
+
+    python -m perf.bench_prompt_pages --prompts 5000 --page-size 100 --rounds 5
+
+Use --json for machine-readable output when comparing runs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.prompt_mgmt import Prompt, PromptTag, Tag
+from app.schemas.prompt_mgmt import PaginatedPromptResponse, PromptResponse
+from app.services import prompt_json
+from app.services.prompt_mgmt_service import COUNT_NONE, PromptManagementService
+
+TAGS_PER_PROMPT = 3
+_EPOCH = datetime(2025, 1, 1)
+
+
+async def seed(engine: AsyncEngine, prompts: int, tags: int) -> None:
+    rng = random.Random(42)
+    words = "write explain summarize translate review python poem email story outline critique".split()
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(insert(Tag), [{"name": f"tag-{i}"} for i in range(tags)])
+        await conn.execute(insert(Prompt), [
+            {
+                "title": " ".join(rng.choices(words, k=4)).capitalize(),
+                "description": " ".join(rng.choices(words, k=12)),
+                "full_prompt": " ".join(rng.choices(words, k=80)),
+                "created_at": _EPOCH + timedelta(seconds=i),
+                "version": 1,
+            }
+            for i in range(prompts)
+        ])
+        await conn.execute(insert(PromptTag), [
+            {"prompt_id": prompt_id, "tag_id": tag_id}
+            for prompt_id in range(1, prompts + 1)
+            for tag_id in rng.sample(range(1, tags + 1), TAGS_PER_PROMPT)
+        ])
+
+
+async def orm_page(service: PromptManagementService, limit: int, cursor: Optional[str]) -> tuple:
+    page = await service.list_prompts(limit=limit, cursor=cursor, count=COUNT_NONE)
+    items = [PromptResponse.from_orm(p) for p in page.items]
+    body = PaginatedPromptResponse(items=items, total=None, size=limit, next_cursor=page.next_cursor).model_dump_json().encode("utf-8")
+    return body, page.next_cursor, len(items)
+
+
+async def projected_page(service: PromptManagementService, limit: int, cursor: Optional[str]) -> tuple:
+    page = await service.list_prompts(limit=limit, cursor=cursor, count=COUNT_NONE, projection=True)
+    body = prompt_json.dumps({
+        "items": page.items, "total": None, "total_is_estimate": False, "page": None, "size": limit, "next_cursor": page.next_cursor,
+    })
+    return body, page.next_cursor, len(page.items)
+
+
+async def walk(factory: sessionmaker, build: Callable[..., Awaitable[tuple]], limit: int) -> Dict[str, float]:
+    """Pages through the whole library by cursor; returns the time spent building pages and the item count."""
+    elapsed = 0.0
+    items = 0
+    cursor = None
+    while True:
+        async with factory() as session:
+            start = time.perf_counter()
+            _, cursor, count = await build(PromptManagementService(session), limit, cursor)
+            elapsed += time.perf_counter() - start
+        items += count
+        if cursor is None:
+            return {"seconds": elapsed, "items": items}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    warnings.simplefilter("ignore", DeprecationWarning) # from_orm is deprecated in Pydantic 2
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        try:
+            await seed(engine, args.prompts, args.tags)
+            factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+            # Both paths must produce the same JSON for the comparison to mean anything
+            async with factory() as session:
+                service = PromptManagementService(session)
+                orm_body = json.loads((await orm_page(service, args.page_size, None))[0])
+                projected_body = json.loads((await projected_page(service, args.page_size, None))[0])
+            for body in (orm_body, projected_body):
+                for item in body["items"]:
+                    item["tags"].sort(key=lambda tag: tag["id"])
+            if orm_body != projected_body:
+                raise SystemExit("ORM and projected pages differ; refusing to benchmark")
+
+            results: Dict[str, List[float]] = {"orm": [], "projected": []}
+            for _ in range(args.rounds):
+                for name, build in (("orm", orm_page), ("projected", projected_page)):
+                    walked = await walk(factory, build, args.page_size)
+                    results[name].append(walked["seconds"] / walked["items"] * 1e6)
+        finally:
+            await engine.dispose()
+
+    summary = {
+        name: {"us_per_item_median": statistics.median(samples), "us_per_item_min": min(samples)}
+        for name, samples in results.items()
+    }
+    summary["speedup"] = summary["orm"]["us_per_item_median"] / summary["projected"]["us_per_item_median"]
+    summary["config"] = {
+        "prompts": args.prompts, "page_size": args.page_size, "rounds": args.rounds,
+        "encoder": "orjson" if prompt_json.orjson is not None else "json",
+    }
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=5000)
+    parser.add_argument("--tags", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    config = summary["config"]
+    print(f"{config['prompts']} prompts, pages of {config['page_size']}, {config['rounds']} rounds, encoder={config['encoder']}")
+    for name in ("orm", "projected"):
+        print(f"  {name:<10} {summary[name]['us_per_item_median']:8.1f} us/item (min {summary[name]['us_per_item_min']:.1f})")
+    print(f"  speedup    {summary['speedup']:8.2f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
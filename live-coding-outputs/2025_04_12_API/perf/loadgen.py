@@ -0,0 +1,179 @@
+"""
+Load generator for the PromptSculptor API.
+
+Drives /analyze, /remix and /create at a fixed concurrency and reports throughput and
+latency percentiles per endpoint. Run against a live server:
+
+    python -m perf.loadgen --base-url http://localhost:8000 --concurrency 32 --duration 30
+
+or in-process (no uvicorn; the app's lifespan is run here), typically with
+LLM_API_BASE_URL pointing at perf.mock_llm_server:
+
+    LLM_API_BASE_URL=http://localhost:9000/v1 LLM_API_KEY=mock python -m perf.loadgen --in-process
+
+Use --unique-prompts to control how often requests repeat (and so the cache hit ratio),
+and --json to get machine-readable output for comparing runs.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+ENDPOINTS = {
+    "analyze": ("/api/v1/prompts/analyze", lambda text: {"prompt": text}),
+    "remix": ("/api/v1/prompts/remix", lambda text: {"prompt": text, "styles": ["shorter"]}),
+    "create": ("/api/v1/prompts/create", lambda text: {"goal": text}),
+}
+
+SUBJECTS = ["dogs", "python decorators", "the French revolution", "photosynthesis", "index funds",
+            "sourdough bread", "Kubernetes", "haiku", "black holes", "negotiation"]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(pct / 100.0 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class EndpointResult:
+    latencies_ms: List[float] = field(default_factory=list)
+    status_counts: Dict[int, int] = field(default_factory=dict)
+    transport_errors: int = 0
+
+    def record(self, latency_ms: float, status_code: Optional[int]) -> None:
+        self.latencies_ms.append(latency_ms)
+        if status_code is None:
+            self.transport_errors += 1
+        else:
+            self.status_counts[status_code] = self.status_counts.get(status_code, 0) + 1
+
+    def summary(self, elapsed_s: float) -> Dict[str, Any]:
+        values = sorted(self.latencies_ms)
+        errors = self.transport_errors + sum(n for code, n in self.status_counts.items() if code >= 400)
+        return {
+            "requests": len(values),
+            "errors": errors,
+            "rps": len(values) / elapsed_s if elapsed_s > 0 else 0.0,
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1] if values else 0.0,
+            "status_counts": {str(k): v for k, v in sorted(self.status_counts.items())},
+        }
+
+
+def build_prompt_pool(size: int) -> List[str]:
+    return [f"Tell me about {SUBJECTS[i % len(SUBJECTS)]} (variant {i})" for i in range(size)]
+
+
+@asynccontextmanager
+async def make_client(args) -> AsyncIterator[httpx.AsyncClient]:
+    if not args.in_process:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+            yield client
+        return
+
+    # In-process: serve the ASGI app directly, running its lifespan ourselves
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadgen", timeout=args.timeout) as client:
+            yield client
+
+
+async def run_load(args) -> Tuple[Dict[str, EndpointResult], float]:
+    weights = {name: w for name, w in (item.split("=") if "=" in item else (item, "1") for item in args.endpoints.split(","))}
+    names = list(weights)
+    endpoint_weights = [float(weights[n]) for n in names]
+    prompts = build_prompt_pool(args.unique_prompts)
+    headers = {"X-Cache-Bypass": "true"} if args.bypass_cache else {}
+
+    results: Dict[str, EndpointResult] = {name: EndpointResult() for name in names}
+    remaining = args.requests
+    deadline = time.monotonic() + args.duration if args.duration else None
+
+    def take_slot() -> bool:
+        nonlocal remaining
+        if deadline is not None:
+            return time.monotonic() < deadline
+        if remaining <= 0:
+            return False
+        remaining -= 1
+        return True
+
+    async def worker(client: httpx.AsyncClient):
+        while take_slot():
+            name = random.choices(names, weights=endpoint_weights)[0]
+            path, make_body = ENDPOINTS[name]
+            body = make_body(random.choice(prompts))
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body, headers=headers)
+                status_code = response.status_code
+            except httpx.HTTPError:
+                status_code = None
+            results[name].record((time.perf_counter() - start) * 1000, status_code)
+
+    async with make_client(args) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def print_report(results: Dict[str, EndpointResult], elapsed: float) -> None:
+    print(f"\nElapsed: {elapsed:.2f}s")
+    header = f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+    total = 0
+    for name, result in results.items():
+        s = result.summary(elapsed)
+        total += s["requests"]
+        print(f"{name:<10}{s['requests']:>10}{s['errors']:>8}{s['rps']:>9.1f}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}")
+    print(f"{'total':<10}{total:>10}{'':>8}{total / elapsed if elapsed else 0:>9.1f}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load-test the PromptSculptor API.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="Drive app.main:app in-process via ASGI instead of over HTTP")
+    parser.add_argument("--endpoints", default="analyze=3,remix=1,create=1", help="Comma-separated endpoints with optional weights")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="Total requests (ignored if --duration is set)")
+    parser.add_argument("--duration", type=float, default=None, help="Run for this many seconds")
+    parser.add_argument("--unique-prompts", type=int, default=1000, help="Size of the prompt pool; smaller means more repeats")
+    parser.add_argument("--bypass-cache", action="store_true", help="Send X-Cache-Bypass on every request")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = [e.split("=")[0] for e in args.endpoints.split(",") if e.split("=")[0] not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Unknown endpoint(s): {', '.join(unknown)}. Choose from {', '.join(ENDPOINTS)}.")
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    results, elapsed = asyncio.run(run_load(args))
+    if args.json:
+        json.dump({"elapsed_s": elapsed, "endpoints": {n: r.summary(elapsed) for n, r in results.items()}}, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(results, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+OpenAI-compatible stand-in server for local benchmarking of PromptSculptor.
+
+Serves `POST /v1/chat/completions` (plain and `stream=True`) with valid JSON payloads
+for the analyze, remix and create prompts, after a configurable latency and with
+configurable error rates. Point the API at it with:
+
+    python -m perf.mock_llm_server --port 9000 --latency lognormal:400,0.5 --error-rate 0.01
+    LLM_API_BASE_URL=http://localhost:9000/v1 LLM_API_KEY=mock uvicorn app.main:app
+
+Latency specs: "fixed:MS", "uniform:MIN_MS,MAX_MS", "normal:MEAN_MS,STD_MS",
+"lognormal:MEDIAN_MS,SIGMA". Settings can also be given as MOCK_LLM_* environment variables.
+
+It also stands in for an OTLP/HTTP trace collector: `POST /v1/traces` accepts the API's
+OTLP/JSON exports (TRACE_EXPORT_OTLP_ENDPOINT=http://localhost:9000/v1/traces), appends
+them to `--trace-file` if given, and `GET /traces/summary` aggregates span durations by name.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyModel:
+    """Samples response latencies (in milliseconds) from a configured distribution."""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params.split(",") if p.strip()] if params else []
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Invalid latency spec '{spec}'. Use fixed:MS, uniform:MIN,MAX, normal:MEAN,STD or lognormal:MEDIAN,SIGMA.")
+
+    def sample_ms(self) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return random.uniform(self.params[0], self.params[1])
+        if self.kind == "normal":
+            return max(0.0, random.gauss(self.params[0], self.params[1]))
+        # lognormal: parameterised by the median and the sigma of the underlying normal
+        return random.lognormvariate(math.log(self.params[0]), self.params[1])
+
+
+@dataclass
+class MockConfig:
+    latency: LatencyModel = field(default_factory=lambda: LatencyModel(os.getenv("MOCK_LLM_LATENCY", "lognormal:300,0.4")))
+    error_rate: float = float(os.getenv("MOCK_LLM_ERROR_RATE", "0"))
+    rate_limit_rate: float = float(os.getenv("MOCK_LLM_RATE_LIMIT_RATE", "0"))
+    stream_chunk_chars: int = int(os.getenv("MOCK_LLM_STREAM_CHUNK_CHARS", "12"))
+    stream_chunk_delay_ms: float = float(os.getenv("MOCK_LLM_STREAM_CHUNK_DELAY_MS", "15"))
+    trace_file: str | None = os.getenv("MOCK_LLM_TRACE_FILE") or None
+
+
+config = MockConfig()
+stats: Dict[str, int] = {"requests": 0, "errors": 0, "rate_limited": 0, "streams": 0}
+# Collector stand-in: span name -> [count, total duration in ms]
+span_totals: Dict[str, List[float]] = {}
+
+app = FastAPI(title="Mock LLM (OpenAI-compatible)")
+
+
+def _stable_int(text: str, modulo: int) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16) % modulo
+
+
+def build_content(messages: List[Dict[str, Any]]) -> str:
+    """Returns a JSON payload matching what the PromptSculptor system message asks for."""
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    subject = user.split("\n")[-1][:80]
+
+    if "'remixes'" in system:
+        return json.dumps({"remixes": [
+            f"Rewrite concisely: {subject}",
+            f"Provide a detailed, step-by-step answer to: {subject}",
+            f"In plain language suitable for beginners: {subject}",
+        ]})
+    if "'prompt'" in system:
+        return json.dumps({"prompt": f"You are an expert assistant. {subject} Respond in clear, numbered steps and keep the answer under 300 words."})
+
+    score = 40 + _stable_int(user, 60)
+    issues = [] if score >= 80 else ["Lacks context", "Missing constraints"][: 1 + (score < 60)]
+    suggestions = [] if score >= 80 else ["Specify the desired output format (e.g., JSON, bullet points)."]
+    return json.dumps({"clarity_score": score, "issues": issues, "suggestions": suggestions})
+
+
+def _error_response(status_code: int, message: str, error_type: str, headers: Dict[str, str] = None) -> JSONResponse:
+    return JSONResponse(status_code=status_code, headers=headers or {},
+                        content={"error": {"message": message, "type": error_type, "param": None, "code": None}})
+
+
+async def _stream_chunks(completion_id: str, model: str, content: str) -> AsyncIterator[str]:
+    created = int(time.time())
+    def chunk(delta: Dict[str, Any], finish_reason=None) -> str:
+        body = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        return f"data: {json.dumps(body)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    size = max(1, config.stream_chunk_chars)
+    for i in range(0, len(content), size):
+        if config.stream_chunk_delay_ms > 0:
+            await asyncio.sleep(config.stream_chunk_delay_ms / 1000.0)
+        yield chunk({"content": content[i:i + size]})
+    yield chunk({}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    """OpenAI Chat Completions stand-in."""
+    body = await request.json()
+    stats["requests"] += 1
+    model = body.get("model", "gpt-3.5-turbo")
+
+    await asyncio.sleep(config.latency.sample_ms() / 1000.0)
+
+    roll = random.random()
+    if roll < config.rate_limit_rate:
+        stats["rate_limited"] += 1
+        return _error_response(429, "Rate limit reached (mock).", "requests", headers={"retry-after-ms": "200"})
+    if roll < config.rate_limit_rate + config.error_rate:
+        stats["errors"] += 1
+        return _error_response(500, "The server had an error while processing your request (mock).", "server_error")
+
+    content = build_content(body.get("messages", []))
+    completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+
+    if body.get("stream"):
+        stats["streams"] += 1
+        return StreamingResponse(_stream_chunks(completion_id, model, content), media_type="text/event-stream")
+
+    prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+@app.post("/v1/traces")
+async def collect_traces(request: Request):
+    """OTLP/HTTP (JSON encoding) trace collector stand-in."""
+    body = await request.json()
+    spans = 0
+    for resource_spans in body.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for span in scope_spans.get("spans", []):
+                duration_ms = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+                totals = span_totals.setdefault(span["name"], [0, 0.0])
+                totals[0] += 1
+                totals[1] += duration_ms
+                spans += 1
+    if config.trace_file:
+        with open(config.trace_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(body, separators=(",", ":")) + "\n")
+    stats["spans"] = stats.get("spans", 0) + spans
+    return {"partialSuccess": {}}
+
+
+@app.get("/traces/summary")
+async def get_trace_summary():
+    """Span count, total and mean duration per span name, slowest total first."""
+    rows = sorted(span_totals.items(), key=lambda item: item[1][1], reverse=True)
+    return [{"name": name, "count": int(count), "total_ms": round(total, 3), "mean_ms": round(total / count, 3)} for name, (count, total) in rows]
+
+
+@app.get("/stats")
+async def get_stats():
+    """Counters for requests served by the mock."""
+    return {**stats, "latency": config.latency.spec, "error_rate": config.error_rate, "rate_limit_rate": config.rate_limit_rate}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the OpenAI-compatible mock LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", default=config.latency.spec, help="Latency distribution, e.g. lognormal:300,0.4")
+    parser.add_argument("--error-rate", type=float, default=config.error_rate, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=config.rate_limit_rate, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--stream-chunk-delay-ms", type=float, default=config.stream_chunk_delay_ms)
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    parser.add_argument("--trace-file", default=config.trace_file, help="Append received OTLP/JSON trace exports to this file")
+    args = parser.parse_args()
+
+    config.latency = LatencyModel(args.latency)
+    config.error_rate = args.error_rate
+    config.rate_limit_rate = args.rate_limit_rate
+    config.stream_chunk_delay_ms = args.stream_chunk_delay_ms
+    config.trace_file = args.trace_file
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.endpoints import prompts as prompt_endpoints
+from app.core.config import settings
+from app.schemas.prompt import AnalyzeResponse
+from app.services.llm_service import LLMServiceError, get_llm_service
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+class FakeLLMService:
+    """Stands in for LLMService.analyze: scores each prompt by its length, fails on 'boom'."""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = []
+        self.cancelled = []
+        self.release = asyncio.Event() # Only awaited for prompts starting with "wait"
+
+    async def analyze(self, request, use_cache: bool = True):
+        self.started.append(request.prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if request.prompt.startswith("wait"):
+                await self.release.wait()
+            await asyncio.sleep(self.delay)
+            if request.prompt == "boom":
+                raise LLMServiceError("upstream timed out", status_code=504)
+            return AnalyzeResponse(clarity_score=len(request.prompt), issues=[], suggestions=[])
+        except asyncio.CancelledError:
+            self.cancelled.append(request.prompt)
+            raise
+        finally:
+            self.in_flight -= 1
+
+@pytest.fixture
+def llm():
+    return FakeLLMService()
+
+@pytest.fixture
+async def client(llm):
+    app = FastAPI()
+    app.include_router(prompt_endpoints.router, prefix="/prompts")
+    app.dependency_overrides[get_llm_service] = lambda: llm
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+async def _batch(client, prompts, **extra):
+    response = await client.post("/prompts/analyze/batch", json={"prompts": prompts, **extra})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return {item["index"]: item for item in map(json.loads, response.text.splitlines())}
+
+async def test_one_line_per_prompt_matched_by_index(client):
+    prompts = ["a" * n for n in range(1, 11)]
+    lines = await _batch(client, prompts, concurrency=4)
+    assert sorted(lines) == list(range(10))
+    assert all(lines[i]["result"]["clarity_score"] == len(prompts[i]) for i in lines)
+    assert not any("error" in line for line in lines.values())
+
+async def test_failed_items_are_reported_without_aborting_the_batch(client):
+    lines = await _batch(client, ["fine", "", "boom", "also fine"])
+    assert lines[0]["result"]["clarity_score"] == 4 and lines[3]["result"]["clarity_score"] == 9
+    # An empty prompt fails AnalyzeRequest validation for that item only
+    assert lines[1]["error"]["status_code"] == 422 and "result" not in lines[1]
+    assert lines[2]["error"] == {"status_code": 504, "detail": "LLM service error: upstream timed out"}
+
+async def test_concurrency_is_capped(client, llm, monkeypatch):
+    await _batch(client, ["x"] * 12, concurrency=2)
+    assert llm.max_in_flight == 2
+
+    # A client asking for more than the server allows gets the server limit
+    monkeypatch.setattr(settings, "BATCH_ANALYZE_MAX_CONCURRENCY", 3)
+    llm.max_in_flight = 0
+    await _batch(client, ["x"] * 12, concurrency=50)
+    assert llm.max_in_flight == 3
+
+async def test_oversized_batch_is_rejected(client, llm, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_ANALYZE_MAX_ITEMS", 2)
+    response = await client.post("/prompts/analyze/batch", json={"prompts": ["a", "b", "c"]})
+    assert response.status_code == 422
+    assert "maximum is 2" in response.json()["detail"]
+    assert llm.started == []
+
+async def test_workers_are_cancelled_when_the_client_disconnects(llm):
+    # The first prompt finishes; the other three block until released
+    stream = prompt_endpoints._stream_batch_analysis(["quick", "wait-1", "wait-2", "wait-3"], 3, llm, use_cache=True)
+    first = json.loads(await stream.__anext__())
+    assert first["index"] == 0
+
+    # Starlette cancels the task iterating the body when the client goes away
+    consumer = asyncio.create_task(stream.__anext__())
+    await asyncio.sleep(0.05)
+    consumer.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(consumer, timeout=1) # Times out instead if the workers are left running
+    assert sorted(llm.cancelled) == ["wait-1", "wait-2", "wait-3"]
+    assert llm.in_flight == 0
@@ -1,24 +1,31 @@
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient
-from sqlmodel import SQLModel, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
-from typing import AsyncGenerator, Generator
+from typing import AsyncGenerator, Callable, Generator
 import os
+import shutil
+import tempfile
 from fastapi.testclient import TestClient
 
+# Point the app at throwaway storage before it is imported. The app engine (app.db.session) is
+# built from DATABASE_URL at import time, and request capture, the log writer and partition
+# maintenance write through it rather than through the get_async_session override, so without
+# this every TestClient(app) test would write to the committed promptsculptor_proto.db.
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="promptsculptor-tests-")
+TEST_DATABASE_URL = f"sqlite+aiosqlite:///{os.path.join(TEST_DATA_DIR, 'test_promptsculptor.db')}"
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ["LOG_ARCHIVE_DIR"] = os.path.join(TEST_DATA_DIR, "log_archive")
+
 # Import your FastAPI app and settings
 from app.main import app
 from app.core.config import Settings, get_settings
 from app.db.session import get_async_session
-
-# Use an in-memory SQLite database for testing
-TEST_DATABASE_URL = "sqlite+aiosqlite:///./test_promptsculptor.db"
-
-# Ensure the test database file does not exist before tests run
-if os.path.exists("./test_promptsculptor.db"):
-    os.remove("./test_promptsculptor.db")
+from app.services.prompt_mgmt_service import PromptManagementService
+from app.services.prompt_search import ensure_search_index
 
 # Create a test engine instance
 test_engine = create_async_engine(
@@ -66,9 +73,8 @@ async def setup_test_database():
     # Teardown: Drop all tables after tests are done
     # async with test_engine.begin() as conn:
     #     await conn.run_sync(SQLModel.metadata.drop_all)
-    # Optional: Delete the test DB file if desired
-    if os.path.exists("./test_promptsculptor.db"):
-         os.remove("./test_promptsculptor.db")
+    await test_engine.dispose()
+    shutil.rmtree(TEST_DATA_DIR, ignore_errors=True)
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -97,3 +103,33 @@ def client(db_session: AsyncSession) -> Generator[TestClient, None, None]:
         yield c
     # Clean up dependency override after test
     app.dependency_overrides.pop(get_async_session, None)
+
+
+# Per-test databases for service tests: a fresh SQLite file under tmp_path, so tests that
+# exercise commits, concurrent sessions or DDL never share state with each other or with
+# the app-level test database above.
+
+@pytest_asyncio.fixture(scope="function")
+async def unindexed_engine(tmp_path) -> AsyncGenerator[AsyncEngine, None]:
+    """An engine on a new database with every table created, but no prompt search index yet."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+@pytest_asyncio.fixture(scope="function")
+async def engine(unindexed_engine: AsyncEngine) -> AsyncEngine:
+    """An engine on a new database set up as at app startup: tables plus the prompt search index."""
+    await ensure_search_index(unindexed_engine)
+    return unindexed_engine
+
+@pytest.fixture(scope="function")
+def session_factory(engine: AsyncEngine) -> sessionmaker:
+    """Session factory bound to `engine`."""
+    return sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+@pytest.fixture(scope="function")
+def new_service(session_factory: sessionmaker) -> Callable[[], PromptManagementService]:
+    """Builds a PromptManagementService on its own session per call, as separate requests would."""
+    return lambda: PromptManagementService(session_factory())
@@ -0,0 +1,59 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.metrics import MetricsRegistry
+from app.middleware import metrics as metrics_middleware
+from app.middleware.metrics import MetricsMiddleware
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.labels("/a").observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="/a"} 3.65' in lines
+    assert 'latency_seconds_count{route="/a"} 4' in lines
+
+def test_counters_gauges_collectors_and_label_escaping():
+    registry = MetricsRegistry()
+    counter = registry.counter("events_total", "Events.", ("kind",))
+    gauge = registry.gauge("queue_depth", "Depth.")
+    counter.labels('say "hi"').inc()
+    counter.labels('say "hi"').inc(2)
+    registry.add_collector(lambda: gauge.set(7))
+
+    text = registry.render()
+    assert 'events_total{kind="say \\"hi\\""} 3' in text
+    assert "queue_depth 7" in text
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
+    with pytest.raises(ValueError):
+        registry.counter("events_total", "Duplicate.")
+
+@pytest.mark.asyncio
+async def test_middleware_labels_requests_by_route_template(monkeypatch):
+    registry = MetricsRegistry()
+    histogram = registry.histogram("http_seconds", "Requests.", ("method", "route", "status"))
+    monkeypatch.setattr(metrics_middleware, "HTTP_REQUEST_DURATION", histogram)
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for item_id in (1, 2):
+            await client.get(f"/items/{item_id}")
+        await client.get("/missing/path")
+
+    text = registry.render()
+    assert 'http_seconds_count{method="GET",route="/items/{item_id}",status="200"} 2' in text
+    assert 'http_seconds_count{method="GET",route="unmatched",status="404"} 1' in text
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.tracing import TimedRoute, span
+from app.middleware import tracing as tracing_middleware
+from app.middleware.tracing import TracingMiddleware
+from app.services.trace_exporter import TraceExporter
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+def _make_app() -> FastAPI:
+    router = APIRouter(route_class=TimedRoute)
+
+    async def get_thing():
+        with span("db_session"):
+            return "thing"
+
+    @router.get("/traced/{item_id}")
+    async def traced(item_id: int, thing: str = Depends(get_thing)):
+        with span("llm", model="fake"):
+            pass
+        return {"id": item_id, "thing": thing}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(TracingMiddleware, path_prefixes=["/traced"])
+    return app
+
+async def test_server_timing_header_breaks_down_the_request(monkeypatch):
+    monkeypatch.setattr(tracing_middleware, "get_trace_exporter", lambda: None)
+    async with AsyncClient(transport=ASGITransport(app=_make_app()), base_url="http://test") as client:
+        response = await client.get("/traced/7")
+
+    assert response.json() == {"id": 7, "thing": "thing"} # Path params and dependencies still resolve
+    stages = [metric.split(";")[0] for metric in response.headers["server-timing"].split(", ")]
+    assert stages == ["deps", "db_session", "handler", "llm", "serialize", "total"]
+
+async def test_exported_trace_is_otlp_json_with_nested_spans(tmp_path, monkeypatch):
+    exporter = TraceExporter(file_path=str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(tracing_middleware, "get_trace_exporter", lambda: exporter)
+    async with AsyncClient(transport=ASGITransport(app=_make_app()), base_url="http://test") as client:
+        await client.get("/traced/1")
+    assert await exporter.flush() == 1
+
+    payload = json.loads((tmp_path / "traces.jsonl").read_text())
+    spans = {s["name"]: s for s in payload["resourceSpans"][0]["scopeSpans"][0]["spans"]}
+    root = spans["GET /traced/1"]
+    assert "parentSpanId" not in root
+    assert {s["traceId"] for s in spans.values()} == {root["traceId"]}
+    assert spans["deps"]["parentSpanId"] == root["spanId"]
+    assert spans["db_session"]["parentSpanId"] == spans["deps"]["spanId"]
+    assert spans["llm"]["parentSpanId"] == spans["handler"]["spanId"]
+    assert {"key": "model", "value": {"stringValue": "fake"}} in spans["llm"]["attributes"]
+    assert int(root["endTimeUnixNano"]) >= int(spans["serialize"]["endTimeUnixNano"])
+
+async def test_spans_are_noops_outside_a_trace():
+    with span("llm") as current:
+        assert current is None
@@ -0,0 +1,75 @@
+import gc
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import session as session_module
+from app.db.leak_detector import SessionLeakDetector
+from app.db.session import TrackedAsyncSession, get_async_session, get_standalone_session
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def tracker(engine, monkeypatch):
+    tracker = SessionLeakDetector(enabled=True)
+    monkeypatch.setattr(session_module, "session_tracker", tracker)
+    monkeypatch.setattr(session_module, "AsyncSessionFactory", sessionmaker(bind=engine, class_=TrackedAsyncSession, expire_on_commit=False))
+    return tracker
+
+async def test_dependencies_share_one_session_closed_after_the_request(tracker):
+    app = FastAPI()
+    seen = []
+
+    async def first(session: AsyncSession = Depends(get_async_session)):
+        return session
+
+    @app.get("/ok")
+    async def ok(a: AsyncSession = Depends(first), b: AsyncSession = Depends(get_async_session)):
+        seen.append((a, b))
+        assert tracker.stats()["sessions"]["open"] == 1
+        return {"same": a is b}
+
+    @app.get("/fail")
+    async def fail(session: AsyncSession = Depends(get_async_session)):
+        raise HTTPException(status_code=409, detail="conflict")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/ok")).json() == {"same": True}
+        assert (await client.get("/fail")).status_code == 409
+
+    stats = tracker.stats()
+    assert stats["sessions"] == {"opened": 2, "closed": 2, "open": 0, "leaked": 0}
+    assert stats["acquire_wait_ms"]["count"] == 2
+    assert tracker.open_sessions() == []
+
+async def test_standalone_sessions_are_counted_closed_once(tracker):
+    for _ in range(3):
+        async with get_standalone_session() as session:
+            await session.connection()
+    with pytest.raises(RuntimeError):
+        async with get_standalone_session():
+            raise RuntimeError("rolled back")
+
+    # Closing twice still reports one close
+    session = session_module.AsyncSessionFactory()
+    await session.close()
+    await session.close()
+
+    assert tracker.stats()["sessions"] == {"opened": 5, "closed": 5, "open": 0, "leaked": 0}
+
+async def test_leak_detector_reports_where_unclosed_sessions_were_acquired(tracker):
+    def acquire_and_forget():
+        return session_module.AsyncSessionFactory()
+
+    leaked = acquire_and_forget()
+    [report] = tracker.open_sessions()
+    assert "acquire_and_forget" in report["acquired_at"]
+
+    del leaked
+    gc.collect()
+    assert tracker.open_sessions() == []
+    assert tracker.stats()["sessions"]["leaked"] == 1
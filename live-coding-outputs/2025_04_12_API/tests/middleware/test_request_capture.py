@@ -0,0 +1,89 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.middleware.request_capture import RequestCaptureMiddleware
+from app.services.logging_service import LoggingService
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def captured(monkeypatch):
+    entries = []
+
+    async def fake_write(self, entry):
+        entries.append(entry)
+        return entry
+
+    monkeypatch.setattr(LoggingService, "write", fake_write)
+    return entries
+
+def _make_app(**options) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/logged/echo")
+    async def echo(request: Request):
+        return {"received": (await request.json())["text"]}
+
+    @app.get("/logged/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i}\n"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/logged/boom")
+    async def boom():
+        raise RuntimeError("kaboom")
+
+    @app.get("/other")
+    async def other():
+        return {"ok": True}
+
+    app.add_middleware(RequestCaptureMiddleware, path_prefixes=["/logged"], **options)
+    return app
+
+def _client(app: FastAPI) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app, raise_app_exceptions=False), base_url="http://test")
+
+async def test_captures_request_and_response_bodies(captured):
+    async with _client(_make_app()) as client:
+        response = await client.post("/logged/echo", json={"text": "hi"})
+    assert response.json() == {"received": "hi"}
+
+    [entry] = captured
+    assert entry.endpoint == "POST /logged/echo"
+    assert entry.status_code == 200
+    assert '"hi"' in entry.request_payload
+    assert entry.response_payload == '{"received":"hi"}'
+    assert entry.processing_time_ms >= 0
+
+async def test_streaming_response_is_forwarded_and_captured(captured):
+    """Test that a streamed body reaches the client intact and is captured as one record."""
+    async with _client(_make_app()) as client:
+        response = await client.get("/logged/stream")
+    assert response.text == "chunk-0\nchunk-1\nchunk-2\n"
+    assert len(captured) == 1
+    assert captured[0].response_payload == "chunk-0\nchunk-1\nchunk-2\n"
+
+async def test_capture_is_capped(captured):
+    async with _client(_make_app(max_body_bytes=10)) as client:
+        response = await client.post("/logged/echo", json={"text": "x" * 100})
+    assert len(response.json()["received"]) == 100 # The client still gets the full body
+    entry = captured[0]
+    assert entry.request_payload.startswith('{"text": "')
+    assert "[truncated," in entry.request_payload and "[truncated," in entry.response_payload
+
+async def test_unhandled_exception_logged_as_500(captured):
+    async with _client(_make_app()) as client:
+        response = await client.get("/logged/boom")
+    assert response.status_code == 500
+    assert captured[0].status_code == 500
+    assert "kaboom" in captured[0].response_payload
+
+async def test_paths_outside_prefixes_are_not_logged(captured):
+    async with _client(_make_app()) as client:
+        await client.get("/other")
+    assert captured == []
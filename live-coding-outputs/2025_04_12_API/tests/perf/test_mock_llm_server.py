@@ -0,0 +1,61 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from perf import mock_llm_server
+from perf.mock_llm_server import LatencyModel, app
+from perf.loadgen import percentile
+
+
+@pytest.fixture
+def mock_client(monkeypatch):
+    """TestClient for the mock LLM server with no artificial latency or errors."""
+    monkeypatch.setattr(mock_llm_server.config, "latency", LatencyModel("fixed:0"))
+    monkeypatch.setattr(mock_llm_server.config, "error_rate", 0.0)
+    monkeypatch.setattr(mock_llm_server.config, "rate_limit_rate", 0.0)
+    monkeypatch.setattr(mock_llm_server.config, "stream_chunk_delay_ms", 0.0)
+    return TestClient(app)
+
+def test_analyze_completion_is_valid_json(mock_client: TestClient):
+    """Test the mock returns an analyze payload in an OpenAI-shaped completion."""
+    response = mock_client.post("/v1/chat/completions", json={
+        "model": "gpt-3.5-turbo",
+        "messages": [{"role": "system", "content": "Analyze prompts"}, {"role": "user", "content": "Tell me about dogs"}],
+    })
+    assert response.status_code == 200
+    content = json.loads(response.json()["choices"][0]["message"]["content"])
+    assert set(content) == {"clarity_score", "issues", "suggestions"}
+
+def test_streamed_remix_reassembles(mock_client: TestClient):
+    """Test that streamed chunks concatenate to a valid remix payload."""
+    response = mock_client.post("/v1/chat/completions", json={
+        "model": "gpt-3.5-turbo",
+        "stream": True,
+        "messages": [{"role": "system", "content": "a single key 'remixes'"}, {"role": "user", "content": "Remix: hi"}],
+    })
+    lines = [line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: ")]
+    assert lines[-1] == "[DONE]"
+    text = "".join(json.loads(line)["choices"][0]["delta"].get("content", "") for line in lines[:-1])
+    assert len(json.loads(text)["remixes"]) == 3
+
+def test_latency_model_rejects_bad_spec():
+    """Test latency spec validation."""
+    assert LatencyModel("uniform:10,20").sample_ms() <= 20
+    with pytest.raises(ValueError):
+        LatencyModel("uniform:10")
+
+def test_percentile_nearest_rank():
+    """Test the percentile helper used in load-test reports."""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+def test_trace_collector_summarises_spans(mock_client: TestClient, monkeypatch):
+    """Test the OTLP collector stand-in aggregates span durations by name."""
+    monkeypatch.setattr(mock_llm_server, "span_totals", {})
+    span = {"traceId": "ab" * 16, "spanId": "cd" * 8, "name": "llm", "startTimeUnixNano": "1000000", "endTimeUnixNano": "5000000"}
+    body = {"resourceSpans": [{"scopeSpans": [{"spans": [span, {**span, "endTimeUnixNano": "3000000"}]}]}]}
+    assert mock_client.post("/v1/traces", json=body).status_code == 200
+    assert mock_client.get("/traces/summary").json() == [{"name": "llm", "count": 2, "total_ms": 6.0, "mean_ms": 3.0}]
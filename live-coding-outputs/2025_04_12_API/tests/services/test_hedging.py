@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+import respx
+from httpx import Response
+
+from app.core.config import LLMBackendConfig, settings
+from app.services.hedging import LatencyTracker, hedged_call
+from app.services.llm_service import LLMService
+from app.schemas.prompt import AnalyzeRequest
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+def _completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-3.5-turbo",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    }
+
+async def test_fast_primary_is_not_hedged():
+    """Test that no duplicate is sent when the primary answers within the delay."""
+    secondary_calls = 0
+
+    async def primary():
+        return "primary"
+
+    async def secondary():
+        nonlocal secondary_calls
+        secondary_calls += 1
+        return "secondary"
+
+    assert await hedged_call(primary, secondary, delay=0.5) == ("primary", 0, False)
+    assert secondary_calls == 0
+
+async def test_slow_primary_loses_to_hedge_and_is_cancelled():
+    """Test that a hedged secondary wins over a slow primary, which is then cancelled."""
+    primary_cancelled = asyncio.Event()
+
+    async def primary():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            primary_cancelled.set()
+            raise
+        return "primary"
+
+    async def secondary():
+        return "secondary"
+
+    assert await hedged_call(primary, secondary, delay=0.01) == ("secondary", 1, True)
+    await asyncio.wait_for(primary_cancelled.wait(), timeout=1)
+
+async def test_primary_failure_fails_over_immediately():
+    """Test that a fast primary error starts the secondary without waiting for the delay."""
+    async def primary():
+        raise RuntimeError("primary down")
+
+    async def secondary():
+        return "secondary"
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    assert await hedged_call(primary, secondary, delay=5) == ("secondary", 1, True)
+    assert loop.time() - start < 1
+
+async def test_latency_tracker_percentile():
+    """Test the rolling percentile used as the hedge threshold."""
+    tracker = LatencyTracker(window_size=100)
+    assert tracker.percentile(95) is None
+    for ms in range(1, 201):
+        tracker.record(ms / 1000)
+    assert len(tracker) == 100  # Only the most recent window is kept
+    assert tracker.percentile(95) == pytest.approx(0.195)
+
+@respx.mock
+async def test_llm_service_hedges_slow_backend(monkeypatch):
+    """Test that LLMService sends a hedged duplicate to a second backend and uses its answer."""
+    monkeypatch.setattr(settings, "LLM_HEDGE_INITIAL_DELAY_MS", 20.0)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY_MS", 1.0)
+    payload = _completion('{"clarity_score": 75, "issues": [], "suggestions": []}')
+
+    async def slow(request):
+        await asyncio.sleep(2)
+        return Response(200, json=payload)
+
+    respx.post("https://slow.test/v1/chat/completions").mock(side_effect=slow)
+    respx.post("https://fast.test/v1/chat/completions").mock(return_value=Response(200, json=payload))
+
+    service = LLMService(api_key="test-key", backends=[
+        # Weight 0 on the fast backend keeps the slow one as primary
+        LLMBackendConfig(name="slow", base_url="https://slow.test/v1", weight=1),
+        LLMBackendConfig(name="fast", base_url="https://fast.test/v1", weight=0),
+    ])
+    response = await asyncio.wait_for(service.analyze(AnalyzeRequest(prompt="Explain recursion"), use_cache=False), timeout=1)
+
+    assert response.clarity_score == 75
+    stats = service.stats()
+    assert stats["hedging"] == {"enabled": True, "hedges_sent": 1, "hedge_wins": 1}
+    await service.close()
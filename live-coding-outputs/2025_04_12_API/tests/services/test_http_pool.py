@@ -0,0 +1,75 @@
+import pytest
+
+from app import main
+from app.core.config import LLMBackendConfig, settings
+from app.services import http_pool, llm_service
+from app.services.http_pool import build_http_client, close_http_client, get_http_client, pool_stats
+from app.services.llm_service import LLMService, get_llm_service
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+async def fresh_pool():
+    # Each test starts without a shared client and closes the one it made
+    await close_http_client()
+    yield
+    await close_http_client()
+
+async def test_llm_services_share_one_client():
+    first = LLMService(api_key="test-key")
+    second = LLMService(api_key="test-key", backends=[
+        LLMBackendConfig(name="a", base_url="https://a.test/v1"),
+        LLMBackendConfig(name="b", base_url="https://b.test/v1"),
+    ])
+    assert first._http_client is second._http_client is get_http_client()
+    assert all(backend.client._client is first._http_client for backend in first._backends + second._backends)
+
+    # Closing one service leaves the pool open for the others
+    await first.close()
+    assert not second._http_client.is_closed
+
+async def test_pool_settings_come_from_config(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HTTP_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr(settings, "LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 3)
+    monkeypatch.setattr(settings, "LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS", 4.5)
+    monkeypatch.setattr(settings, "LLM_HTTP_TIMEOUT_SECONDS", 12.0)
+    monkeypatch.setattr(settings, "LLM_HTTP_CONNECT_TIMEOUT_SECONDS", 2.0)
+    client = build_http_client()
+    try:
+        pool = client._transport._pool
+        assert (pool._max_connections, pool._max_keepalive_connections, pool._keepalive_expiry) == (7, 3, 4.5)
+        assert (client.timeout.read, client.timeout.connect) == (12.0, 2.0)
+        stats = pool_stats(client)
+        assert stats["max_connections"] == 7 and stats["connections"] == 0 and stats["closed"] is False
+    finally:
+        await client.aclose()
+
+async def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HTTP2_ENABLED", True)
+    monkeypatch.setattr(http_pool.importlib.util, "find_spec", lambda name: None)
+    client = build_http_client()
+    try:
+        assert client._transport._pool._http2 is False
+    finally:
+        await client.aclose()
+
+async def test_lifespan_shutdown_closes_the_pool(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_API_KEY", "test-key")
+    monkeypatch.setattr(llm_service, "_llm_service_instance", None)
+
+    async def noop(*args, **kwargs):
+        return None
+
+    # Only the LLM service is under test: skip database setup and the background tasks
+    for name in ("create_db_and_tables", "ensure_search_index", "warm_tag_cache", "ensure_tag_stats",
+                 "start_log_writer", "stop_log_writer", "stop_partition_maintenance",
+                 "start_trace_exporter", "stop_trace_exporter", "close_db_connection"):
+        monkeypatch.setattr(main, name, noop)
+    monkeypatch.setattr(main, "start_partition_maintenance", lambda engine: None)
+
+    async with main.lifespan(main.app):
+        client = (await get_llm_service())._http_client
+        assert not client.is_closed
+    assert client.is_closed
+    assert llm_service._llm_service_instance is None
@@ -0,0 +1,35 @@
+import json
+
+from app.services.json_stream import IncrementalJSONParser
+
+
+def _feed_in_chunks(parser: IncrementalJSONParser, text: str, size: int):
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+def test_array_elements_are_reported_when_complete():
+    """Test that each string in a list is reported with its index as soon as it closes."""
+    document = {"remixes": ["First, \"quoted\" idea", "Second\nline", "Café \U0001F600"]}
+    text = json.dumps(document)  # ensure_ascii escapes non-ASCII as \\uXXXX (incl. surrogate pairs)
+    parser = IncrementalJSONParser()
+    events = _feed_in_chunks(parser, text, 3)
+
+    ends = [(e.path, e.value) for e in events if e.kind == "string_end"]
+    assert ends == [(("remixes", 0), document["remixes"][0]),
+                    (("remixes", 1), document["remixes"][1]),
+                    (("remixes", 2), document["remixes"][2])]
+    assert parser.result() == document
+
+def test_string_deltas_reassemble_value():
+    """Test that deltas for an open string concatenate to the final value."""
+    text = 'Here you go: {"prompt": "Write a haiku about \\"autumn\\" leaves", "n": 1, "ok": true}'
+    parser = IncrementalJSONParser()
+    events = _feed_in_chunks(parser, text, 5)
+
+    deltas = [e.value for e in events if e.kind == "string_delta" and e.path == ("prompt",)]
+    assert len(deltas) > 1
+    assert "".join(deltas) == 'Write a haiku about "autumn" leaves'
+    # Keys are never reported as values
+    assert all(e.path == ("prompt",) for e in events)
@@ -0,0 +1,94 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.log import ApiLog
+from app.services.log_partitions import LogPartitions, partition_name, partitions_for_range, run_partition_maintenance
+from app.services import log_partitions as log_partitions_module
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+NOW = datetime(2025, 4, 12, 15, 30)
+
+@pytest.fixture(autouse=True)
+def daily_partitions(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PARTITION_GRANULARITY", "day")
+    monkeypatch.setattr(settings, "LOG_RETENTION_HOURS", 48)
+    monkeypatch.setattr(settings, "LOG_ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(log_partitions_module, "log_partitions", LogPartitions())
+
+async def _table_names(engine):
+    async with engine.connect() as conn:
+        return await conn.run_sync(lambda c: inspect(c).get_table_names())
+
+def test_partition_names_and_ranges():
+    assert partition_name(NOW, "day") == "api_log_20250412"
+    assert partition_name(NOW, "hour") == "api_log_2025041215"
+    assert partitions_for_range(NOW - timedelta(days=2), NOW, "day") == ["api_log_20250412", "api_log_20250411", "api_log_20250410"]
+
+async def test_rows_go_to_their_partition_and_queries_prune(engine):
+    partitions = log_partitions_module.log_partitions
+    rows = [ApiLog(endpoint="POST /x", status_code=200, timestamp=NOW - timedelta(days=d)) for d in range(4)]
+    async with AsyncSession(engine) as session:
+        await partitions.write(session, rows)
+        await session.commit()
+    names = await _table_names(engine)
+    assert {"api_log_20250412", "api_log_20250411", "api_log_20250410", "api_log_20250409"} <= set(names)
+
+    async with AsyncSession(engine) as session:
+        recent = await partitions.fetch(session, NOW - timedelta(hours=30), NOW, limit=10)
+    assert [row["timestamp"] for row in recent] == [NOW, NOW - timedelta(days=1)]
+
+async def test_maintenance_archives_and_drops_expired_partitions(engine):
+    partitions = log_partitions_module.log_partitions
+    rows = [ApiLog(endpoint=f"POST /{d}", status_code=200, timestamp=NOW - timedelta(days=d)) for d in range(5)]
+    async with AsyncSession(engine) as session:
+        await partitions.write(session, rows)
+        await session.commit()
+
+    result = await run_partition_maintenance(engine, now=NOW)
+
+    # Retention is 48h: partitions that ended before 2025-04-10 15:30 are archived
+    assert sorted(result["archived"]) == ["api_log_20250408", "api_log_20250409"]
+    names = set(await _table_names(engine))
+    assert "api_log_20250409" not in names and "api_log_20250410" in names
+    assert "api_log_20250413" in names # Next period pre-created
+
+    with gzip.open(f"{settings.LOG_ARCHIVE_DIR}/api_log_20250409.jsonl.gz", "rt") as f:
+        archived = [json.loads(line) for line in f]
+    assert [row["endpoint"] for row in archived] == ["POST /3"]
+
+async def test_maintenance_does_not_hold_the_write_lock_while_archiving(engine, monkeypatch):
+    partitions = log_partitions_module.log_partitions
+    async with AsyncSession(engine) as session:
+        await partitions.write(session, [ApiLog(endpoint="POST /old", status_code=200, timestamp=NOW - timedelta(days=4))])
+        await session.commit()
+
+    archive = partitions.archive
+    async def archive_while_logging(conn, name, archive_dir):
+        # A request is logged mid-archive; it would wait on (and time out behind) a maintenance write transaction
+        async with AsyncSession(engine) as session:
+            await partitions.write(session, [ApiLog(endpoint="POST /new", status_code=200, timestamp=NOW)])
+            await session.commit()
+        return await archive(conn, name, archive_dir)
+    monkeypatch.setattr(partitions, "archive", archive_while_logging)
+
+    result = await run_partition_maintenance(engine, now=NOW)
+    assert result["archived"] == {"api_log_20250408": 1}
+
+async def test_failed_partition_ddl_is_forgotten(engine, monkeypatch):
+    partitions = log_partitions_module.log_partitions
+    async def failing_ensure(conn, name):
+        partitions._known.add(name)
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(partitions, "ensure", failing_ensure)
+
+    with pytest.raises(RuntimeError):
+        await run_partition_maintenance(engine, now=NOW)
+    assert not partitions._known
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.log import ApiLog
+from app.services.log_rollups import query_stats, update_rollups
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+START = datetime(2025, 4, 12, 10, 0)
+
+async def test_rollups_accumulate_across_batches(engine):
+    """Test that rows written in several batches are summarised per endpoint from minute buckets."""
+    analyze, remix = "POST /api/v1/prompts/analyze", "POST /api/v1/prompts/remix"
+    batches = [
+        [ApiLog(endpoint=analyze, status_code=200, processing_time_ms=float(ms), timestamp=START + timedelta(seconds=ms)) for ms in range(1, 101)],
+        [ApiLog(endpoint=analyze, status_code=503, processing_time_ms=1000.0, timestamp=START + timedelta(minutes=1))],
+        [ApiLog(endpoint=remix, status_code=422, processing_time_ms=5.0, timestamp=START + timedelta(minutes=2))],
+    ]
+    for batch in batches:
+        async with AsyncSession(engine) as session:
+            await update_rollups(session, batch)
+            await session.commit()
+
+    async with AsyncSession(engine) as session:
+        stats = await query_stats(session, START, START + timedelta(minutes=10))
+    assert stats["buckets_read"] == 3 # analyze: 2 minutes (the second shared with the 503), remix: 1
+    a = stats["endpoints"][analyze]
+    assert a["requests"] == 101 and a["server_errors"] == 1
+    assert a["error_rate"] == pytest.approx(1 / 101)
+    assert a["p50_ms"] == pytest.approx(51, rel=0.02)
+    assert a["p99_ms"] == pytest.approx(100, rel=0.02)
+    assert stats["endpoints"][remix]["client_errors"] == 1
+    assert stats["total"]["requests"] == 102
+
+    async with AsyncSession(engine) as session:
+        only_first_minute = await query_stats(session, START, START + timedelta(minutes=1), endpoint=analyze)
+    assert only_first_minute["total"]["requests"] == 59
+
+async def test_concurrent_writers_do_not_lose_counts(engine):
+    """Test that two transactions folding into the same new bucket both count, and neither hits a key conflict."""
+    analyze = "POST /api/v1/prompts/analyze"
+    first, second = AsyncSession(engine), AsyncSession(engine)
+    try:
+        # Both writers start before either has created the bucket
+        await update_rollups(first, [ApiLog(endpoint=analyze, status_code=200, processing_time_ms=10.0, timestamp=START)])
+        pending = asyncio.create_task(update_rollups(second, [ApiLog(endpoint=analyze, status_code=500, processing_time_ms=30.0, timestamp=START)]))
+        await asyncio.sleep(0.05)
+        await first.commit()
+        await pending
+        await second.commit()
+    finally:
+        await first.close()
+        await second.close()
+
+    async with AsyncSession(engine) as session:
+        stats = await query_stats(session, START, START + timedelta(minutes=1))
+    a = stats["endpoints"][analyze]
+    assert stats["buckets_read"] == 1
+    assert a["requests"] == 2 and a["server_errors"] == 1
+    assert a["avg_ms"] == pytest.approx(20, rel=0.02)
@@ -0,0 +1,70 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlmodel import select
+
+from app.core.config import settings
+from app.models.log import ApiLog
+from app.services.log_writer import ApiLogWriter
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+def plain_log_table(monkeypatch):
+    # Write to the plain api_log table; partitioning is covered in test_log_partitions.py
+    monkeypatch.setattr(settings, "LOG_PARTITIONING_ENABLED", False)
+
+async def _count(session_factory) -> int:
+    async with session_factory() as session:
+        return len((await session.exec(select(ApiLog))).all())
+
+def _row(i: int) -> ApiLog:
+    return ApiLog(endpoint=f"POST /test/{i}", status_code=200, processing_time_ms=1.0)
+
+async def test_flushes_when_batch_is_full(session_factory):
+    """Test that a full batch is written without waiting for the flush interval."""
+    writer = ApiLogWriter(batch_size=5, flush_interval_ms=60_000, session_factory=session_factory)
+    writer.start()
+    for i in range(5):
+        writer.enqueue(_row(i))
+    for _ in range(100):
+        if writer.flushed == 5:
+            break
+        await asyncio.sleep(0.01)
+    assert await _count(session_factory) == 5
+    assert writer.stats()["batches"] == 1
+    await writer.stop()
+
+async def test_flushes_partial_batch_on_interval(session_factory):
+    writer = ApiLogWriter(batch_size=100, flush_interval_ms=20, session_factory=session_factory)
+    writer.start()
+    writer.enqueue(_row(1))
+    await asyncio.sleep(0.2)
+    assert writer.flushed == 1
+    await writer.stop()
+
+async def test_drop_oldest_when_full_and_flush_on_stop(session_factory):
+    """Test that the oldest rows are dropped when the queue is full, and the rest are written on stop."""
+    writer = ApiLogWriter(max_queue=3, batch_size=100, flush_interval_ms=60_000, session_factory=session_factory)
+    for i in range(5):
+        writer.enqueue(_row(i))
+    assert writer.stats()["queue_depth"] == 3
+    assert writer.dropped == 2 and writer.queued == 5
+
+    await writer.stop() # Never started: stop still drains the queue
+    async with session_factory() as session:
+        endpoints = [row.endpoint for row in (await session.exec(select(ApiLog).order_by(ApiLog.id))).all()]
+    assert endpoints == ["POST /test/2", "POST /test/3", "POST /test/4"]
+
+async def test_failed_batch_is_counted_not_raised():
+    @asynccontextmanager
+    async def broken_factory():
+        raise RuntimeError("database unavailable")
+        yield
+
+    writer = ApiLogWriter(batch_size=10, session_factory=broken_factory)
+    writer.enqueue(_row(1))
+    assert await writer.flush() == 0
+    assert writer.failed == 1
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.prompt_mgmt import Prompt
+from app.schemas.prompt_mgmt import PromptCreate
+from app.services.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.services.prompt_mgmt_service import PromptManagementService, PromptManagementServiceError
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+async def service(engine, session_factory):
+    async with engine.begin() as conn:
+        # Ten prompts sharing two timestamps, so pages have to break ties on id
+        await conn.execute(insert(Prompt), [
+            {"title": f"Prompt {i}", "full_prompt": "Review this code" if i % 2 else "Summarize this text",
+             "created_at": datetime(2025, 4, 12, 10 + i // 5)}
+            for i in range(10)
+        ])
+    async with session_factory() as session:
+        yield PromptManagementService(session)
+
+async def _all_pages(fetch, limit):
+    titles, cursor = [], None
+    while True:
+        page = await fetch(limit=limit, cursor=cursor)
+        titles += [p.title for p in page.items]
+        if page.next_cursor is None:
+            return titles
+        cursor = page.next_cursor
+
+def test_cursor_round_trip_and_rejects_tampering():
+    values = [datetime(2025, 4, 12, 10, 30), 7]
+    assert decode_cursor(encode_cursor(values), 2) == values
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor(values), 3)
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor", 2)
+
+async def test_cursor_pages_match_a_single_listing(service):
+    everything = [p.title for p in (await service.list_prompts(limit=100)).items]
+    assert everything[:2] == ["Prompt 9", "Prompt 8"] # Newest first, then highest id
+    assert await _all_pages(service.list_prompts, limit=3) == everything
+
+async def test_ranked_search_pages_follow_relevance_order(service):
+    everything = [p.title for p in (await service.search_prompts(query="review", limit=100)).items]
+    assert len(everything) == 5
+    assert await _all_pages(lambda **kw: service.search_prompts(query="review", **kw), limit=2) == everything
+
+async def test_estimated_totals_are_reused_until_a_write(service):
+    assert (await service.list_prompts(count="estimate")).total_is_estimate is False # First call counts
+    page = await service.list_prompts(count="estimate")
+    assert (page.total, page.total_is_estimate) == (10, True)
+    assert (await service.list_prompts(count="none")).total is None
+
+    await service.create_prompt(PromptCreate(title="New", full_prompt="New"))
+    page = await service.list_prompts(count="estimate")
+    assert (page.total, page.total_is_estimate) == (11, False)
+
+async def test_invalid_cursor_is_a_client_error(service):
+    with pytest.raises(PromptManagementServiceError) as e:
+        await service.list_prompts(cursor="garbage")
+    assert e.value.status_code == 400
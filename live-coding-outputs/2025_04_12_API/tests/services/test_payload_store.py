@@ -0,0 +1,113 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.log import ApiLog, PayloadBlob
+from app.services import log_partitions as log_partitions_module
+from app.services import payload_store
+from app.services.log_partitions import LogPartitions, resolve_payloads, run_partition_maintenance, write_log_rows
+from app.services.response_cache import ResponseCache
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+NOW = datetime(2025, 4, 12, 15, 30)
+
+@pytest.fixture(autouse=True)
+def daily_partitions(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PARTITION_GRANULARITY", "day")
+    monkeypatch.setattr(settings, "LOG_RETENTION_HOURS", 48)
+    monkeypatch.setattr(settings, "LOG_ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(settings, "LOG_ROLLUPS_ENABLED", False)
+    monkeypatch.setattr(log_partitions_module, "log_partitions", LogPartitions())
+    monkeypatch.setattr(payload_store, "_known_hashes", ResponseCache(max_entries=100))
+
+async def test_sampling_always_keeps_errors_and_slow_requests(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_SLOW_MS", 2000.0)
+    error = ApiLog(endpoint="POST /x", status_code=502, processing_time_ms=5, request_payload="req", response_payload="err")
+    slow = ApiLog(endpoint="POST /x", status_code=200, processing_time_ms=2500, request_payload="req", response_payload="ok")
+    fast = ApiLog(endpoint="POST /x", status_code=200, processing_time_ms=5, request_payload="req", response_payload="ok")
+    for entry in (error, slow, fast):
+        payload_store.apply_payload_sampling(entry)
+
+    assert (error.request_payload, error.response_payload) == ("req", "err")
+    assert (slow.request_payload, slow.response_payload) == ("req", "ok")
+    assert (fast.request_payload, fast.response_payload) == (None, None)
+
+async def test_sampling_keeps_everything_at_rate_one(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+    entry = ApiLog(endpoint="POST /x", status_code=200, processing_time_ms=5, request_payload="req")
+    payload_store.apply_payload_sampling(entry)
+    assert entry.request_payload == "req"
+
+async def test_repeated_payloads_are_stored_once_and_resolved_by_hash(engine, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PARTITIONING_ENABLED", True)
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_DEDUP_ENABLED", True)
+    # Two separate batches, so the second one finds the blobs in the database
+    for _ in range(2):
+        rows = [ApiLog(endpoint="POST /x", status_code=200, timestamp=NOW, request_payload='{"prompt": "hi"}', response_payload='{"ok": true}') for _ in range(3)]
+        async with AsyncSession(engine) as session:
+            await write_log_rows(session, rows)
+            await session.commit()
+
+    async with AsyncSession(engine) as session:
+        blobs = (await session.exec(select(PayloadBlob))).all()
+        assert sorted(blob.content for blob in blobs) == ['{"ok": true}', '{"prompt": "hi"}']
+
+        logged = await log_partitions_module.log_partitions.fetch(session, NOW - timedelta(hours=1), NOW, limit=10)
+        assert len(logged) == 6
+        assert all(row["request_payload"] is None for row in logged) # Only the hash is stored on the row
+        await resolve_payloads(await session.connection(), logged)
+    assert {(row["request_payload"], row["response_payload"]) for row in logged} == {('{"prompt": "hi"}', '{"ok": true}')}
+
+async def test_maintenance_archives_payloads_and_prunes_unreferenced_blobs(engine, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PARTITIONING_ENABLED", True)
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_DEDUP_ENABLED", True)
+    rows = [
+        ApiLog(endpoint="POST /old", status_code=500, timestamp=NOW - timedelta(days=4), request_payload="old only", response_payload="shared"),
+        ApiLog(endpoint="POST /new", status_code=500, timestamp=NOW, request_payload="new only", response_payload="shared"),
+    ]
+    async with AsyncSession(engine) as session:
+        await write_log_rows(session, rows)
+        await session.commit()
+
+    result = await run_partition_maintenance(engine, now=NOW)
+    assert result["archived"] == {"api_log_20250408": 1}
+    assert result["pruned_blobs"] == 1
+    with gzip.open(f"{settings.LOG_ARCHIVE_DIR}/api_log_20250408.jsonl.gz", "rt") as archive:
+        archived = json.loads(archive.readline())
+    assert (archived["request_payload"], archived["response_payload"]) == ("old only", "shared")
+
+    async with AsyncSession(engine) as session:
+        remaining = {blob.content for blob in (await session.exec(select(PayloadBlob))).all()}
+    assert remaining == {"new only", "shared"}
+
+async def test_hashes_are_only_remembered_after_commit(engine, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PARTITIONING_ENABLED", True)
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_DEDUP_ENABLED", True)
+
+    async def failing_write(session, entries):
+        raise RuntimeError("partition write failed")
+    monkeypatch.setattr(log_partitions_module.log_partitions, "write", failing_write)
+    rows = [ApiLog(endpoint="POST /x", status_code=500, timestamp=NOW, request_payload="lost")]
+    async with AsyncSession(engine) as session:
+        with pytest.raises(RuntimeError):
+            await write_log_rows(session, rows)
+        await session.rollback()
+    # The blob insert was rolled back, so the next batch must insert it again
+    assert payload_store.payload_hash("lost") not in payload_store._known_hashes
+
+async def test_blob_stored_concurrently_does_not_fail_the_batch(engine):
+    # Another writer inserted the blob between this batch's existence check and its insert
+    row = {"hash": payload_store.payload_hash("same"), "content": "same", "size": 4}
+    async with AsyncSession(engine) as session:
+        await session.exec(payload_store._insert_blobs(session), params=[row])
+        await session.exec(payload_store._insert_blobs(session), params=[row])
+        await session.commit()
+        assert [blob.content for blob in (await session.exec(select(PayloadBlob))).all()] == ["same"]
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db import session as session_module
+from app.db.session import TrackedAsyncSession
+from app.services.prompt_mgmt_service import PromptManagementService, _ndjson_lines, stream_prompt_export
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+async def _body(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+@pytest.fixture
+async def service(engine, monkeypatch):
+    factory = sessionmaker(bind=engine, class_=TrackedAsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(session_module, "AsyncSessionFactory", factory) # Used by the export's own session
+    monkeypatch.setattr(settings, "PROMPT_BULK_CHUNK_SIZE", 2)
+    async with factory() as session:
+        yield PromptManagementService(session)
+
+async def test_lines_are_split_across_chunks_and_oversized_lines_reported():
+    lines = [item async for item in _ndjson_lines(_body(b'{"a"', b': 1}\n\n  \n{"b": 2}\n', b"x" * 20, b"\nlast"), max_line_bytes=10)]
+    assert lines == [(1, b'{"a": 1}'), (4, b'{"b": 2}'), (5, None), (6, b"last")]
+
+async def test_bulk_import_reports_bad_lines_and_imports_the_rest(service):
+    body = b"\n".join([
+        json.dumps({"title": "One", "full_prompt": "1", "tags": ["x", "y", "x"]}).encode(),
+        b"{not json",
+        json.dumps({"title": "Two", "full_prompt": "2", "tags": ["y"]}).encode(),
+        json.dumps({"title": "No body"}).encode(),
+        json.dumps({"title": "Three", "full_prompt": "3"}).encode(),
+    ])
+    report = await service.bulk_import(_body(body))
+    assert (report.created, report.failed) == (3, 2)
+    assert [(e.line, e.detail) for e in report.errors][1] == (4, "full_prompt: Field required")
+
+    page = await service.list_prompts(limit=10)
+    assert {p.title: sorted(t.name for t in p.tags) for p in page.items} == {"One": ["x", "y"], "Two": ["y"], "Three": []}
+
+async def test_export_streams_every_prompt_and_round_trips(service):
+    lines = [json.dumps({"title": f"P{i}", "full_prompt": "body", "tags": [f"t{i % 3}"]}) for i in range(7)]
+    await service.bulk_import(_body("\n".join(lines).encode()))
+
+    batches = [batch async for batch in stream_prompt_export(batch_size=3)]
+    assert len(batches) == 3
+    exported = [json.loads(line) for batch in batches for line in batch.splitlines()]
+    assert [(item["title"], item["tags"]) for item in exported] == [(f"P{i}", [f"t{i % 3}"]) for i in range(7)]
+
+    report = await service.bulk_import(_body("".join(batches).encode()))
+    assert (report.created, report.failed) == (7, 0)
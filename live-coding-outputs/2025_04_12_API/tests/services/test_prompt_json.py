@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from app.schemas.prompt_mgmt import PaginatedPromptSearchResponse, PromptCreate, PromptSearchResult, PromptUpdate
+from app.services import prompt_json
+from app.services.prompt_mgmt_service import PromptManagementService
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+async def service(session_factory):
+    async with session_factory() as session:
+        service = PromptManagementService(session)
+        created = await service.create_prompt(PromptCreate(title="Café menu", description="Überblick", full_prompt="Write a menu", tags=["food", "fr"]))
+        await service.update_prompt(created.id, PromptUpdate(full_prompt="Write a short menu"))
+        await service.create_prompt(PromptCreate(title="Menu critic", full_prompt="Review a menu"))
+        await service.create_prompt(PromptCreate(title="Haiku", full_prompt="Write a haiku", tags=["poetry"]))
+        yield service
+
+def _sorted_tags(body: bytes) -> dict:
+    # Tag order within a prompt is not specified by either path
+    page = json.loads(body)
+    for item in page["items"]:
+        item["tags"].sort(key=lambda tag: tag["id"])
+    return page
+
+async def test_projected_search_page_matches_the_response_model(service):
+    orm_page = await service.search_prompts(query="menu", limit=1, with_facets=True)
+    expected = PaginatedPromptSearchResponse(
+        items=[PromptSearchResult.model_validate(p).model_copy(update={"snippet": orm_page.snippets.get(p.id)}) for p in orm_page.items],
+        facets=[{"name": name, "count": n} for name, n in orm_page.facets],
+        total=orm_page.total, size=1, page=1, next_cursor=orm_page.next_cursor,
+    ).model_dump_json().encode("utf-8")
+
+    page = await service.search_prompts(query="menu", limit=1, with_facets=True, projection=True)
+    items = [dict(item, snippet=page.snippets.get(item["id"])) for item in page.items]
+    body = prompt_json.dumps({
+        "items": items, "total": page.total, "total_is_estimate": False, "page": 1, "size": 1,
+        "next_cursor": page.next_cursor, "facets": [{"name": name, "count": n} for name, n in page.facets],
+    })
+    assert _sorted_tags(body) == _sorted_tags(expected)
+    assert "<mark>" in items[0]["snippet"]
+    # The edited prompt reports its version like the ORM path does
+    second = await service.search_prompts(query="menu", cursor=page.next_cursor, projection=True)
+    assert {item["title"]: item["version"] for item in second.items} == {"Café menu": 2}
+
+async def test_projected_list_pages_follow_the_same_cursor(service):
+    first = await service.list_prompts(limit=2, projection=True)
+    assert [item["title"] for item in first.items] == ["Haiku", "Menu critic"]
+    rest = await service.list_prompts(limit=2, cursor=first.next_cursor, projection=True)
+    assert [(item["title"], sorted(tag["name"] for tag in item["tags"])) for item in rest.items] == [("Café menu", ["food", "fr"])]
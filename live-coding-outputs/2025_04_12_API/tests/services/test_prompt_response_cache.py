@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.endpoints import prompt_mgmt as prompt_endpoints
+from app.schemas.prompt_mgmt import PromptCreate, PromptUpdate
+from app.services.prompt_mgmt_service import PromptManagementService, get_prompt_mgmt_service
+from app.services.prompt_response_cache import etag_matches, prompt_etag
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+async def client(session_factory):
+    async def service():
+        async with session_factory() as session:
+            yield PromptManagementService(session)
+
+    app = FastAPI()
+    app.include_router(prompt_endpoints.router)
+    app.dependency_overrides[get_prompt_mgmt_service] = service
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+def test_if_none_match_parsing():
+    etag = prompt_etag(7, datetime(2025, 4, 12), 3)
+    assert etag == '"p7-6328980054000-v3"'
+    assert etag_matches(f'"p7-6328980054000-v2", {etag}', etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"p7-6328980054000-v2"', etag)
+    assert not etag_matches(None, etag)
+
+async def test_versions_and_generation_follow_writes(session_factory):
+    async with session_factory() as session:
+        service = PromptManagementService(session)
+        assert await service.library_generation() == 0
+        created = await service.create_prompt(PromptCreate(title="A", full_prompt="x", tags=["keep", "drop"]))
+        assert created.version == 1 and await service.library_generation() == 1
+
+        updated = await service.update_prompt(created.id, PromptUpdate(title="B"))
+        assert updated.version == 2 and updated.updated_at is not None
+        # Removing a tag changes the prompt's representation, so it bumps the version too
+        await service.delete_tag("drop")
+        assert (await service.get_prompt_revision(created.id))[1] == 3
+        assert await service.library_generation() == 3
+
+        await service.delete_prompt(created.id)
+        assert await service.get_prompt_revision(created.id) is None
+        assert await service.library_generation() == 4
+
+async def test_conditional_get_of_a_prompt(client):
+    created = (await client.post("/prompts/", json={"title": "A", "full_prompt": "x"})).json()
+    prompt_id, created_at = created["id"], datetime.fromisoformat(created["created_at"])
+    first = await client.get(f"/prompts/{prompt_id}")
+    etag = first.headers["etag"]
+    assert etag == prompt_etag(prompt_id, created_at, 1)
+
+    not_modified = await client.get(f"/prompts/{prompt_id}", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.headers["etag"] == etag
+    # Served from the cached body, byte for byte
+    assert (await client.get(f"/prompts/{prompt_id}")).content == first.content
+
+    await client.put(f"/prompts/{prompt_id}", json={"title": "B"})
+    changed = await client.get(f"/prompts/{prompt_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["title"] == "B"
+    assert changed.headers["etag"] == prompt_etag(prompt_id, created_at, 2)
+
+    await client.delete(f"/prompts/{prompt_id}")
+    assert (await client.get(f"/prompts/{prompt_id}", headers={"If-None-Match": "*"})).status_code == 404
+
+async def test_a_reused_id_does_not_match_the_deleted_prompt(client):
+    """SQLite hands a deleted prompt's id to the next prompt; its ETag and cached body must not carry over."""
+    prompt_id = (await client.post("/prompts/", json={"title": "Old", "full_prompt": "x"})).json()["id"]
+    old = await client.get(f"/prompts/{prompt_id}") # Also caches the old body
+    await client.delete(f"/prompts/{prompt_id}")
+
+    recreated = (await client.post("/prompts/", json={"title": "New", "full_prompt": "y"})).json()
+    assert recreated["id"] == prompt_id
+    fresh = await client.get(f"/prompts/{prompt_id}", headers={"If-None-Match": old.headers["etag"]})
+    assert fresh.status_code == 200 and fresh.json()["title"] == "New"
+    assert fresh.headers["etag"] != old.headers["etag"]
+
+async def test_list_etag_changes_with_any_write(client):
+    await client.post("/prompts/", json={"title": "A", "full_prompt": "x"})
+    etag = (await client.get("/prompts/")).headers["etag"]
+    assert (await client.get("/prompts/", headers={"If-None-Match": etag})).status_code == 304
+    # Another query has its own ETag
+    assert (await client.get("/prompts/?limit=5", headers={"If-None-Match": etag})).status_code == 200
+
+    await client.post("/prompts/", json={"title": "B", "full_prompt": "y"})
+    page = await client.get("/prompts/", headers={"If-None-Match": etag})
+    assert page.status_code == 200 and page.json()["total"] == 2
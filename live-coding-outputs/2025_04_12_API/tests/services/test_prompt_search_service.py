@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.schemas.prompt_mgmt import PromptCreate, PromptUpdate
+from app.services.prompt_mgmt_service import PromptManagementService
+from app.services.prompt_search import BACKEND_FTS5, ensure_search_index, fts5_match_query, tsquery
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+async def service(engine, session_factory):
+    assert await ensure_search_index(engine) == BACKEND_FTS5 # Already created; reports the backend
+    async with session_factory() as session:
+        yield PromptManagementService(session)
+
+def test_queries_are_quoted_prefix_terms():
+    assert fts5_match_query('pyth "OR" tut*') == '"pyth"* "OR"* "tut"*'
+    assert tsquery("pyth tut") == "pyth:* & tut:*"
+    assert fts5_match_query("!!!") is None
+
+async def test_ranked_prefix_search_with_snippets(service):
+    await service.create_prompt(PromptCreate(title="Kitchen helper", full_prompt="Suggest a recipe that uses python-shaped pasta"))
+    await service.create_prompt(PromptCreate(title="Python tutor", description="Teaches Python", full_prompt="Explain Python decorators"))
+    await service.create_prompt(PromptCreate(title="JavaScript guide", full_prompt="Explain closures"))
+
+    page = await service.search_prompts(query="pyth")
+    assert page.total == 2
+    # Title and description hits outrank a single mention in the body
+    assert [p.title for p in page.items] == ["Python tutor", "Kitchen helper"]
+    assert "<mark>Python</mark>" in page.snippets[page.items[0].id]
+
+async def test_index_follows_updates_and_deletes(service):
+    created = await service.create_prompt(PromptCreate(title="Haiku writer", full_prompt="Write a haiku"))
+    await service.update_prompt(created.id, PromptUpdate(title="Limerick writer", full_prompt="Write a limerick"))
+    assert (await service.search_prompts(query="haiku")).total == 0
+    assert (await service.search_prompts(query="limerick")).total == 1
+
+    await service.delete_prompt(created.id)
+    assert (await service.search_prompts(query="limerick")).total == 0
+
+async def test_existing_prompts_are_indexed_when_the_index_is_created(unindexed_engine):
+    async with unindexed_engine.begin() as conn:
+        await conn.execute(text("INSERT INTO prompt (title, full_prompt, created_at) VALUES ('Legacy summarizer', 'Summarize', '2025-01-01')"))
+    await ensure_search_index(unindexed_engine)
+    async with AsyncSession(unindexed_engine) as session:
+        page = await PromptManagementService(session).search_prompts(query="summar")
+    assert page.total == 1 and page.items[0].title == "Legacy summarizer"
@@ -0,0 +1,40 @@
+import pytest
+
+from app.services.prompt_templates import TEMPLATES, TRUNCATION_MARKER, PromptTooLargeError, TokenCounter
+
+counter = TokenCounter("gpt-3.5-turbo")
+
+def test_system_message_is_static_across_requests():
+    """Test that the remix system message no longer varies with the requested styles."""
+    a = TEMPLATES["remix"].build(counter, "Tell me about dogs", context_window=16385, max_input_tokens=8000, styles="shorter")
+    b = TEMPLATES["remix"].build(counter, "Tell me about cats", context_window=16385, max_input_tokens=8000, styles="formal")
+    assert a.messages[0] == b.messages[0]
+    assert "Styles/guidelines: shorter" in a.messages[1]["content"]
+    assert a.messages[1]["content"].endswith("Tell me about dogs")
+
+def test_max_tokens_scales_with_input_within_bounds():
+    """Test that the completion budget grows with the input and stays within the template's bounds."""
+    template = TEMPLATES["remix"]
+    short = template.build(counter, "Summarize this.", context_window=16385, max_input_tokens=8000, styles="shorter")
+    longer = template.build(counter, "word " * 30, context_window=16385, max_input_tokens=8000, styles="shorter")
+    huge = template.build(counter, "word " * 5000, context_window=16385, max_input_tokens=8000, styles="shorter")
+    assert short.max_tokens == template.min_output_tokens
+    assert template.min_output_tokens < longer.max_tokens < template.max_output_tokens
+    assert huge.max_tokens == template.max_output_tokens
+
+def test_oversized_input_is_truncated_to_fit():
+    """Test that an input larger than the allowed budget is truncated and marked."""
+    built = TEMPLATES["analyze"].build(counter, "x" * 100_000, context_window=4096, max_input_tokens=8000)
+    assert built.truncated
+    assert built.messages[1]["content"].endswith(TRUNCATION_MARKER)
+    assert built.input_tokens + built.max_tokens <= 4096
+
+def test_small_input_is_untouched():
+    built = TEMPLATES["create"].build(counter, "Goal: write a haiku", context_window=16385, max_input_tokens=8000)
+    assert not built.truncated
+    assert built.messages[1]["content"] == "Generate a prompt for the following goal:\nGoal: write a haiku"
+
+def test_no_room_for_input_raises():
+    """Test that a context too small for even the fixed parts is rejected rather than sent."""
+    with pytest.raises(PromptTooLargeError):
+        TEMPLATES["analyze"].build(counter, "Tell me about dogs", context_window=500, max_input_tokens=8000)
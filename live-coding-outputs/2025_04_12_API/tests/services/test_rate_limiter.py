@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import pytest
+import respx
+from httpx import Response
+
+from app.core.config import settings
+from app.services.llm_service import LLMService
+from app.services.rate_limiter import TokenBucket, UpstreamRateLimiter, estimate_request_tokens
+from app.schemas.prompt import AnalyzeRequest
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+MOCK_BASE_URL = "https://llm.test/v1"
+
+def _completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-3.5-turbo",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    }
+
+async def test_token_bucket_wait_time():
+    """Test that the bucket reports how long until enough tokens have refilled."""
+    bucket = TokenBucket(capacity=10, refill_per_second=5)
+    assert bucket.time_until_available(10) == 0
+    bucket.consume(10)
+    assert bucket.time_until_available(5) == pytest.approx(1.0, abs=0.05)
+    # Requests larger than the bucket are clamped to its capacity
+    assert bucket.time_until_available(1000) == pytest.approx(2.0, abs=0.05)
+
+async def test_limiter_queues_instead_of_failing():
+    """Test that calls beyond the tokens-per-minute budget wait for refill."""
+    limiter = UpstreamRateLimiter(requests_per_minute=0, tokens_per_minute=600)  # 10 tokens/second
+    await limiter.acquire(600)  # Drain the bucket
+
+    start = time.monotonic()
+    waits = await asyncio.gather(limiter.acquire(2), limiter.acquire(2))
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= 0.35
+    assert max(waits) >= 0.35
+    stats = limiter.stats()
+    assert stats["acquired"] == 3
+    assert stats["waited"] == 2
+    assert stats["queue_depth"] == 0
+
+async def test_estimate_request_tokens_includes_max_tokens():
+    """Test the token estimate counts the prompt and the completion budget."""
+    messages = [{"role": "user", "content": "x" * 400}]
+    assert estimate_request_tokens(messages, 300) == 100 + 4 + 300
+
+@respx.mock
+async def test_rate_limit_error_is_retried_after_retry_after(monkeypatch):
+    """Test that a 429 with retry-after is retried instead of surfacing to the caller."""
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY_SECONDS", 0.01)
+    route = respx.post(f"{MOCK_BASE_URL}/chat/completions").mock(side_effect=[
+        Response(429, headers={"retry-after-ms": "50"}, json={"error": {"message": "Rate limit reached"}}),
+        Response(200, json=_completion('{"clarity_score": 90, "issues": [], "suggestions": []}')),
+    ])
+    service = LLMService(api_key="test-key", base_url=MOCK_BASE_URL)
+
+    start = time.monotonic()
+    response = await service.analyze(AnalyzeRequest(prompt="Summarize this text"), use_cache=False)
+
+    assert response.clarity_score == 90
+    assert route.call_count == 2
+    assert time.monotonic() - start >= 0.05
+    assert service.stats()["rate_limiter"]["retries"] == 1
@@ -0,0 +1,76 @@
+import pytest
+
+from app.services import response_cache
+from app.services.response_cache import ResponseCache, make_chat_cache_key
+from app.services.llm_service import LLMService
+from app.schemas.prompt import AnalyzeRequest
+
+
+def test_cache_key_depends_on_all_parameters():
+    """Test that the cache key changes with messages, model, temperature and max_tokens."""
+    messages = [{"role": "user", "content": "hello"}]
+    base = make_chat_cache_key(messages, "gpt-3.5-turbo", 0.2, 300)
+    assert base == make_chat_cache_key([dict(m) for m in messages], "gpt-3.5-turbo", 0.2, 300)
+    assert base != make_chat_cache_key([{"role": "user", "content": "hello!"}], "gpt-3.5-turbo", 0.2, 300)
+    assert base != make_chat_cache_key(messages, "gpt-4o", 0.2, 300)
+    assert base != make_chat_cache_key(messages, "gpt-3.5-turbo", 0.3, 300)
+    assert base != make_chat_cache_key(messages, "gpt-3.5-turbo", 0.2, 301)
+
+def test_lru_eviction_and_counters():
+    """Test that the least recently used entry is evicted and hits/misses are counted."""
+    cache = ResponseCache(max_entries=2, default_ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)           # Evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+
+def test_ttl_expiry(monkeypatch):
+    """Test that entries expire after their TTL."""
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache = ResponseCache(max_entries=10)
+    cache.set("k", "v", ttl_seconds=5)
+    assert cache.get("k") == "v"
+    now[0] += 6
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+def test_clear_returns_flushed_count():
+    """Test flushing the cache."""
+    cache = ResponseCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.clear() == 2
+    assert cache.get("a") is None
+
+async def test_llm_service_serves_repeats_from_cache(monkeypatch):
+    """Test that identical analyze calls only reach the upstream API once unless bypassed."""
+    service = LLMService(api_key="test-key")
+    calls = []
+
+    async def fake_request_completion(messages, model, temperature, max_tokens):
+        calls.append(messages)
+        return '{"clarity_score": 80, "issues": [], "suggestions": []}', "gpt-3.5-turbo"
+
+    monkeypatch.setattr(service, "_request_completion", fake_request_completion)
+
+    first = await service.analyze(AnalyzeRequest(prompt="Tell me about dogs"))
+    second = await service.analyze(AnalyzeRequest(prompt="Tell me about dogs"))
+    assert first == second
+    assert len(calls) == 1
+
+    await service.analyze(AnalyzeRequest(prompt="Tell me about dogs"), use_cache=False)
+    assert len(calls) == 2
+    assert service.stats()["cache"]["hits"] == 1
+
+    assert service.clear_cache() == 1
+    await service.analyze(AnalyzeRequest(prompt="Tell me about dogs"))
+    assert len(calls) == 3
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from app.schemas.prompt import AnalyzeRequest
+from app.services.llm_service import LLMService
+from app.services.semantic_cache import SemanticCache
+
+pytest.importorskip("numpy")
+
+def _cache(**kwargs) -> SemanticCache:
+    return SemanticCache(**{"threshold": 0.8, "max_entries": 8, "dimensions": 1024, "ttl_seconds": 60, **kwargs})
+
+def test_whitespace_and_case_variants_hit():
+    """Test that prompts differing only in whitespace or casing are treated as identical."""
+    cache = _cache()
+    cache.add("Write a short poem about the sea", "poem-analysis")
+    value, similarity = cache.lookup("  write a SHORT poem\nabout the sea ")
+    assert value == "poem-analysis"
+    assert similarity == pytest.approx(1.0)
+
+def test_near_duplicate_hits_and_unrelated_misses():
+    cache = _cache()
+    cache.add("Explain how a binary search works on a sorted list of integers", "search")
+    cache.add("Write a cover letter for a junior data analyst position", "letter")
+
+    value, similarity = cache.lookup("Explain how binary search works on a sorted list of integers")
+    assert value == "search"
+    assert 0.8 <= similarity < 1.0
+
+    value, similarity = cache.lookup("Recommend three novels set in Japan")
+    assert value is None
+    assert similarity < 0.8
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_lru_eviction_and_expiry(monkeypatch):
+    """Test that the least recently used entry is replaced when full, and expired entries are ignored."""
+    cache = _cache(max_entries=2)
+    cache.add("first prompt about gardening", 1)
+    cache.add("second prompt about astronomy", 2)
+    assert cache.lookup("first prompt about gardening")[0] == 1 # Refreshes "first"
+    cache.add("third prompt about cooking", 3) # Evicts "second"
+    assert len(cache) == 2
+    assert cache.lookup("second prompt about astronomy")[0] is None
+    assert cache.lookup("first prompt about gardening")[0] == 1
+
+    real_monotonic = time.monotonic
+    monkeypatch.setattr(time, "monotonic", lambda: real_monotonic() + 120)
+    assert cache.lookup("first prompt about gardening") == (None, None)
+    assert len(cache) == 0
+
+def test_clear():
+    cache = _cache()
+    cache.add("some prompt", "x")
+    assert cache.clear() == 1
+    assert cache.lookup("some prompt") == (None, None)
+
+def test_same_words_refresh_one_entry():
+    cache = _cache()
+    for value, text in enumerate(["Summarize this article about tides", "  summarize THIS article\nabout tides"] * 2):
+        cache.add(text, value)
+    assert len(cache) == 1
+    assert cache.lookup("summarize this article about tides")[0] == 3
+
+def test_vectors_are_stored_sparse():
+    cache = _cache(max_entries=2048, dimensions=4096)
+    cache.add("Write a haiku about autumn leaves", "haiku")
+    rows, indices, values = cache._flat_entries()
+    # One row per non-zero feature, not a dense max_entries x dimensions matrix
+    assert rows.size == indices.size == values.size < 20
+
+async def test_llm_service_learns_each_prompt_once(monkeypatch):
+    service = LLMService(api_key="test-key")
+
+    async def fake_request_completion(messages, model, temperature, max_tokens):
+        return '{"clarity_score": 80, "issues": [], "suggestions": []}', "gpt-3.5-turbo"
+    monkeypatch.setattr(service, "_request_completion", fake_request_completion)
+
+    for _ in range(5):
+        await service.analyze(AnalyzeRequest(prompt="Tell me about dogs"))
+    assert len(service._semantic_cache) == 1
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+async def test_concurrent_calls_share_one_execution():
+    """Test that identical concurrent calls run the underlying work only once."""
+    flight = SingleFlight()
+    started = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal started
+        started += 1
+        await release.wait()
+        return "result"
+
+    waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert results == ["result"] * 5
+    assert started == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4}
+
+async def test_cancelling_one_waiter_does_not_cancel_shared_call():
+    """Test that a cancelled waiter leaves the shared call running for the others."""
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return 42
+
+    first = asyncio.create_task(flight.do("key", work))
+    second = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    release.set()
+    assert await second == 42
+
+async def test_errors_reach_every_waiter():
+    """Test that an exception from the shared call is raised to all waiters."""
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        raise ValueError("upstream failed")
+
+    waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in results)
+    # A new call after completion starts fresh work
+    release.clear()
+    release.set()
+    with pytest.raises(ValueError):
+        await flight.do("key", work)
+    assert flight.stats()["executions"] == 2
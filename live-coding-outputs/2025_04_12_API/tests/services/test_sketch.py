@@ -0,0 +1,49 @@
+import math
+import random
+
+import pytest
+
+from app.services.sketch import DDSketch
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(42)
+    values = [rng.lognormvariate(math.log(300), 0.6) for _ in range(20000)]
+    sketch = DDSketch(alpha=0.01)
+    for v in values:
+        sketch.add(v)
+    for q in (0.5, 0.95, 0.99):
+        assert sketch.quantile(q) == pytest.approx(_exact(values, q), rel=0.02)
+
+def test_merge_matches_single_sketch():
+    """Test that merging per-bucket sketches gives the same answer as one sketch over all values."""
+    rng = random.Random(7)
+    parts = [[rng.uniform(1, 1000) for _ in range(500)] for _ in range(6)]
+    combined, merged = DDSketch(), DDSketch()
+    for part in parts:
+        piece = DDSketch()
+        for v in part:
+            piece.add(v)
+            combined.add(v)
+        merged.merge(DDSketch.from_json(piece.to_json()))
+    assert merged.count == combined.count == 3000
+    for q in (0.5, 0.95, 0.99):
+        assert merged.quantile(q) == combined.quantile(q)
+
+def test_empty_and_zero_values():
+    sketch = DDSketch()
+    assert sketch.quantile(0.5) is None
+    sketch.add(0.0)
+    sketch.add(10.0)
+    assert sketch.quantile(0.0) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(10.0, rel=0.01)
+
+def test_bucket_limit_collapses_lowest_values():
+    sketch = DDSketch(alpha=0.01, max_buckets=50)
+    for i in range(1, 10001):
+        sketch.add(float(i))
+    assert len(sketch.buckets) <= 50
+    assert sketch.quantile(0.99) == pytest.approx(9900, rel=0.01) # High quantiles are unaffected
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from app.schemas.prompt_mgmt import PromptCreate
+from app.services import tag_cache
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+def _record_statements(engine):
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+async def test_cached_tags_resolve_without_queries(engine, new_service):
+    await new_service().create_prompt(PromptCreate(title="First", full_prompt="x", tags=["python", "sql"]))
+
+    statements = _record_statements(engine)
+    prompt = await new_service().create_prompt(PromptCreate(title="Second", full_prompt="y", tags=["sql", "python", "sql"]))
+    assert sorted(tag.name for tag in prompt.tags) == ["python", "sql"]
+    # The write is just the two inserts; the only tag query is the refresh of the response
+    assert [s.split(" (")[0] for s in statements[:2]] == ["INSERT INTO prompt", "INSERT INTO prompttag"]
+    assert not any("INTO tag " in s for s in statements)
+
+async def test_warm_up_and_rollback_do_not_cache_uncommitted_tags(engine, new_service):
+    await new_service().create_prompt(PromptCreate(title="First", full_prompt="x", tags=["python"]))
+    tag_cache._tag_ids.clear()
+    assert await tag_cache.warm_tag_cache(engine) == 1
+
+    service = new_service()
+    await service._resolve_tag_ids(["draft"])
+    await service.session.rollback()
+    service._discard_tags()
+    assert tag_cache.lookup(service.cache_scope, ["python", "draft"]) == ({"python": 1}, ["draft"])
+
+async def test_concurrent_creates_of_a_new_tag_share_one_row(new_service):
+    prompts = await asyncio.gather(*(
+        new_service().create_prompt(PromptCreate(title=f"P{i}", full_prompt="x", tags=["fresh"])) for i in range(3)
+    ))
+    assert len({prompt.tags[0].id for prompt in prompts}) == 1
+
+async def test_deleting_a_tag_unlinks_it_and_evicts_the_cache(new_service):
+    service = new_service()
+    prompt = await service.create_prompt(PromptCreate(title="First", full_prompt="x", tags=["old", "keep"]))
+    old_id = tag_cache.lookup(service.cache_scope, ["old"])[0]["old"]
+
+    assert await service.delete_tag("old") is True
+    assert tag_cache.lookup(service.cache_scope, ["old"]) == ({}, ["old"])
+    assert [tag.name for tag in (await new_service().get_prompt_by_id(prompt.id)).tags] == ["keep"]
+
+    recreated = await new_service().create_prompt(PromptCreate(title="Second", full_prompt="y", tags=["old"]))
+    assert recreated.tags[0].id != old_id
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from app.models.prompt_mgmt import PromptTag, Tag, TagStat
+from app.schemas.prompt_mgmt import PromptCreate, PromptUpdate
+from app.services.tag_stats import ensure_tag_stats
+
+# Mark all tests in this module as async
+pytestmark = pytest.mark.asyncio
+
+async def _body(data: bytes):
+    yield data
+
+async def _grouped_counts(engine):
+    async with engine.connect() as conn:
+        rows = await conn.execute(select(Tag.name, func.count()).join(PromptTag, PromptTag.tag_id == Tag.id).group_by(Tag.name))
+        return dict(rows.all())
+
+async def test_counts_follow_every_write_path(engine, new_service):
+    first = await new_service().create_prompt(PromptCreate(title="A", full_prompt="x", tags=["py", "web"]))
+    second = await new_service().create_prompt(PromptCreate(title="B", full_prompt="x", tags=["py"]))
+    lines = [json.dumps({"title": f"Bulk {i}", "full_prompt": "x", "tags": ["py", "bulk"]}) for i in range(3)]
+    await new_service().bulk_import(_body("\n".join(lines).encode()))
+    await new_service().update_prompt(first.id, PromptUpdate(tags=["web", "js"]))
+    await new_service().delete_prompt(second.id)
+
+    counts = {name: n for _, name, n in await new_service().list_tags(with_counts=True)}
+    assert counts == {"bulk": 3, "js": 1, "py": 3, "web": 1}
+    assert {name: n for name, n in counts.items() if n} == await _grouped_counts(engine)
+
+    await new_service().delete_tag("py")
+    assert "py" not in {name for _, name, _ in await new_service().list_tags(with_counts=True)}
+
+async def test_counts_are_backfilled_for_existing_links(engine, new_service):
+    await new_service().create_prompt(PromptCreate(title="A", full_prompt="x", tags=["py", "web"]))
+    await new_service().create_prompt(PromptCreate(title="B", full_prompt="x", tags=["py"]))
+    async with engine.begin() as conn:
+        await conn.execute(delete(TagStat))
+
+    await ensure_tag_stats(engine)
+    assert {name: n for _, name, n in await new_service().list_tags(with_counts=True)} == {"py": 2, "web": 1}
+
+async def test_search_facets_count_all_matches_not_just_the_page(new_service):
+    for i in range(4):
+        await new_service().create_prompt(PromptCreate(title=f"Review {i}", full_prompt="x", tags=["code"] + (["sql"] if i % 2 else [])))
+    await new_service().create_prompt(PromptCreate(title="Summarize", full_prompt="x", tags=["text"]))
+
+    page = await new_service().search_prompts(query="review", limit=1, with_facets=True)
+    assert len(page.items) == 1
+    assert page.facets == [("code", 4), ("sql", 2)]
+    assert (await new_service().search_prompts(with_facets=True)).facets == [("code", 4), ("sql", 2), ("text", 1)]
+    assert (await new_service().search_prompts(query="review")).facets is None